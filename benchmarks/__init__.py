@@ -0,0 +1,11 @@
+"""
+Performance benchmarks for Musical Brain.
+"""
+
+import sys
+from pathlib import Path
+
+# Add src directory to Python path for imports
+src_path = Path(__file__).parent.parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
@@ -0,0 +1,102 @@
+"""
+Benchmark JSON encoding of API response pages.
+
+Compares FastAPI's default path (``jsonable_encoder`` + ``JSONResponse``),
+``response_model`` validation, and the encoders behind
+``FastJSONResponse``, for album pages shaped like ``GET /albums``. Usage::
+
+    python -m benchmarks.encode --sizes 100,1000 --iterations 200
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from benchmarks.harness import check_regressions, format_table, run_metadata, summarize, write_results
+from musical_brain.models import Album
+from musical_brain.responses import dumps_orjson, dumps_stdlib, orjson
+from musical_brain.synthetic import CatalogueGenerator, CatalogueSpec
+
+DEFAULT_OUTPUT = Path("benchmarks/results/encode.json")
+
+_albums_adapter = TypeAdapter(List[Album])
+
+
+def album_page(size: int, seed: int = 42) -> Dict[str, Any]:
+    """A ``list_nodes_page`` result of ``size`` albums, as the database returns them."""
+    spec = CatalogueSpec(seed=seed, artists=size, batch_size=size)
+    now = datetime(2025, 1, 1, tzinfo=UTC)
+    items = []
+    for batch in CatalogueGenerator(spec).albums():
+        for row in batch:
+            stamp = (now - timedelta(minutes=len(items))).isoformat()
+            items.append({**row, "id": str(uuid.UUID(int=len(items))), "created_at": stamp, "updated_at": stamp})
+            if len(items) == size:
+                return {"items": items, "next_cursor": "eyJjIjoiMjAyNS0wMS0wMVQwMDowMDowMCJ9"}
+    raise ValueError(f"Catalogue too small for {size} albums")
+
+
+def response_model_path(page: Dict[str, Any]) -> bytes:
+    """What FastAPI does with ``response_model=List[Album]``: validate, then serialise."""
+    return _albums_adapter.dump_json(_albums_adapter.validate_python(page["items"]))
+
+
+ENCODERS: Dict[str, Callable[[Dict[str, Any]], bytes]] = {
+    "jsonable_encoder": lambda page: JSONResponse(jsonable_encoder(page)).body,
+    "response_model": response_model_path,
+    "stdlib": dumps_stdlib,
+}
+if orjson is not None:
+    ENCODERS["orjson"] = dumps_orjson
+
+
+def time_encoder(encode: Callable[[Dict[str, Any]], bytes], page: Dict[str, Any], iterations: int) -> Dict[str, Any]:
+    """Time ``iterations`` encodes of ``page`` after one warm-up call."""
+    size = len(encode(page))
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        op_started = time.perf_counter()
+        encode(page)
+        latencies.append(time.perf_counter() - op_started)
+    summary = summarize(latencies, time.perf_counter() - started)
+    summary["bytes"] = size
+    return summary
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", default="100,1000", help="Comma-separated albums per page")
+    parser.add_argument("--iterations", type=int, default=200, help="Encodes per encoder and size")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Where to write JSON results")
+    parser.add_argument("--baseline", type=Path, help="Results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression, 0.2 = 20%%")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    results = {}
+    for size in (int(size) for size in args.sizes.split(",") if size.strip()):
+        page = album_page(size)
+        results[f"page-{size}"] = {
+            name: time_encoder(encode, page, args.iterations) for name, encode in ENCODERS.items()
+        }
+
+    meta = run_metadata(iterations=args.iterations, encoders=list(ENCODERS))
+    write_results(args.output, meta, results)
+    print(format_table(results))
+    print(f"Results written to {args.output}")
+    return check_regressions(results, args.baseline, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
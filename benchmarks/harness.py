@@ -0,0 +1,146 @@
+"""
+Timing, reporting and regression checks shared by the benchmarks.
+"""
+
+import bisect
+import json
+import math
+import platform
+import time
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+# Metrics where a higher value is worse; every other metric is better higher
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "mean_ms", "max_ms", "error_rate")
+
+# Upper bounds (ms) of latency histogram buckets; the last bucket is unbounded
+HISTOGRAM_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Percentile of ``samples`` with linear interpolation between ranks."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(latencies: Sequence[float], elapsed: float) -> Dict[str, float]:
+    """Throughput and latency percentiles of one benchmarked operation.
+
+    ``latencies`` and ``elapsed`` are in seconds; latencies are reported in ms.
+    """
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "ops": len(ms),
+        "throughput": round(len(ms) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(ms) / len(ms), 4) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 4),
+        "p95_ms": round(percentile(ms, 95), 4),
+        "p99_ms": round(percentile(ms, 99), 4),
+    }
+
+
+def histogram(latencies_ms: Sequence[float], buckets: Sequence[float] = HISTOGRAM_BUCKETS_MS) -> Dict[str, int]:
+    """Count latencies per bucket, keyed ``"<=bound"`` plus ``"+Inf"`` (not cumulative)."""
+    counts = {f"<={bound:g}": 0 for bound in buckets}
+    counts["+Inf"] = 0
+    for latency in latencies_ms:
+        index = bisect.bisect_left(buckets, latency)
+        key = f"<={buckets[index]:g}" if index < len(buckets) else "+Inf"
+        counts[key] += 1
+    return counts
+
+
+async def measure(operation: Callable[[int], Awaitable[Any]], iterations: int) -> Dict[str, float]:
+    """Await ``operation(i)`` for each iteration and summarize the timings."""
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        op_started = time.perf_counter()
+        await operation(i)
+        latencies.append(time.perf_counter() - op_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_metadata(**extra: Any) -> Dict[str, Any]:
+    """Environment details recorded next to the results."""
+    return {
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **extra,
+    }
+
+
+def write_results(path: Path, meta: Dict[str, Any], results: Dict[str, Dict[str, Dict[str, float]]]):
+    """Write ``{"meta": ..., "results": {scenario: {operation: metrics}}}`` as JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"meta": meta, "results": results}, indent=2, sort_keys=True) + "\n")
+
+
+def load_results(path: Path) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Read the results section of a file written by ``write_results``."""
+    return json.loads(path.read_text())["results"]
+
+
+def compare(
+    current: Dict[str, Dict[str, Dict[str, float]]],
+    baseline: Dict[str, Dict[str, Dict[str, float]]],
+    threshold: float,
+    metrics: Sequence[str] = ("throughput", "p95_ms"),
+) -> List[str]:
+    """Describe every metric that regressed by more than ``threshold`` (0.2 = 20%).
+
+    Only scenarios and operations present in both runs are compared.
+    """
+    regressions = []
+    for scenario, operations in current.items():
+        for operation, values in operations.items():
+            base = baseline.get(scenario, {}).get(operation)
+            if not base:
+                continue
+            for metric in metrics:
+                now, before = values.get(metric), base.get(metric)
+                if not now or not before:
+                    continue
+                change = (now - before) / before
+                worse = change > threshold if metric in LOWER_IS_BETTER else -change > threshold
+                if worse:
+                    regressions.append(
+                        f"{scenario}/{operation} {metric}: {before:g} -> {now:g} ({change:+.1%})"
+                    )
+    return regressions
+
+
+def format_table(results: Dict[str, Dict[str, Dict[str, float]]]) -> str:
+    """Plain-text table of the results for the console."""
+    lines = [f"{'scenario':<12} {'operation':<14} {'ops/s':>12} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}"]
+    for scenario, operations in results.items():
+        for operation, m in operations.items():
+            lines.append(
+                f"{scenario:<12} {operation:<14} {m['throughput']:>12.1f} "
+                f"{m['p50_ms']:>10.3f} {m['p95_ms']:>10.3f} {m['p99_ms']:>10.3f}"
+            )
+    return "\n".join(lines)
+
+
+def check_regressions(
+    results: Dict[str, Dict[str, Dict[str, float]]],
+    baseline_path: Optional[Path],
+    threshold: float,
+) -> int:
+    """Print regressions against a baseline file; returns a process exit code."""
+    if baseline_path is None or not baseline_path.exists():
+        return 0
+    regressions = compare(results, load_results(baseline_path), threshold)
+    if not regressions:
+        print(f"No regressions beyond {threshold:.0%} against {baseline_path}")
+        return 0
+    print(f"Regressions beyond {threshold:.0%} against {baseline_path}:")
+    for regression in regressions:
+        print(f"  {regression}")
+    return 1
@@ -0,0 +1,331 @@
+"""
+HTTP load test for the Musical Brain API.
+
+Starts uvicorn in this process, on its own thread and event loop, with the
+in-memory backend, so results measure API and serialisation overhead rather
+than database time. ``--target`` drives an already running server instead.
+Usage::
+
+    python -m benchmarks.loadtest --duration 30 --concurrency 50
+    python -m benchmarks.loadtest --rate 500 --mix get_album=60,list_albums=20,search=20
+
+Closed loop (default) runs ``--concurrency`` workers back to back. Open loop
+(``--rate``) sends Poisson arrivals at a fixed rate, and latency counts from
+the scheduled send time, so a slow server can't hide its queueing delay.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterator, List, Tuple
+
+import httpx
+import uvicorn
+
+from benchmarks.harness import (
+    check_regressions, format_table, histogram, run_metadata, summarize, write_results
+)
+from musical_brain.synthetic import CatalogueGenerator, CatalogueSpec
+
+DEFAULT_MIX = "health=5,get_album=35,list_albums=15,search=10,create_album=15,update_album=15,delete_album=5"
+DEFAULT_OUTPUT = Path("benchmarks/results/loadtest.json")
+
+# Status codes that count as success, per operation
+EXPECTED_STATUS = {"create_album": 201, "delete_album": 204}
+
+
+class LoadState:
+    """Album IDs the operations pick from, shared by all workers."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.album_ids: List[str] = []
+        self.created: List[str] = []
+        self.counter = 0
+
+    def album_body(self) -> dict:
+        self.counter += 1
+        return {
+            "title": f"Load Test Album {self.counter}",
+            "album_type": "LP",
+            "release_year": self.rng.randint(1950, 2025),
+            "review_score": self.rng.randint(0, 50) / 10,
+        }
+
+
+async def health(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    return await client.get("/health")
+
+
+async def get_album(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    return await client.get(f"/albums/{state.rng.choice(state.album_ids)}")
+
+
+async def list_albums(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    return await client.get("/albums", params={"limit": 100})
+
+
+async def search(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    return await client.get("/search", params={"q": f"album {state.rng.randrange(len(state.album_ids))}"})
+
+
+async def create_album(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    response = await client.post("/albums", json=state.album_body())
+    if response.status_code == 201:
+        state.created.append(response.json()["id"])
+    return response
+
+
+async def update_album(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    album_id = state.rng.choice(state.album_ids)
+    return await client.put(f"/albums/{album_id}", json={"review_score": state.rng.randint(0, 50) / 10})
+
+
+async def delete_album(client: httpx.AsyncClient, state: LoadState) -> httpx.Response:
+    """Delete an album this run created, creating one first if none is left.
+
+    A failed create is returned as the delete's response, so it is recorded
+    as an error rather than raised.
+    """
+    if state.created:
+        return await client.delete(f"/albums/{state.created.pop()}")
+    response = await client.post("/albums", json=state.album_body())
+    if response.status_code != 201:
+        return response
+    return await client.delete(f"/albums/{response.json()['id']}")
+
+
+OPERATIONS: Dict[str, Callable[[httpx.AsyncClient, LoadState], Awaitable[httpx.Response]]] = {
+    "health": health,
+    "get_album": get_album,
+    "list_albums": list_albums,
+    "search": search,
+    "create_album": create_album,
+    "update_album": update_album,
+    "delete_album": delete_album,
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse ``name=weight,...`` into operation weights."""
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("Request mix needs at least one positive weight")
+    return weights
+
+
+class Recorder:
+    """Collects latency and outcome per operation once warm-up is over."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.dropped = 0
+        self.active = False
+        self.started = 0.0
+        self.stopped = 0.0
+
+    def start(self):
+        self.active = True
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.active = False
+        self.stopped = time.perf_counter()
+
+    def record(self, name: str, latency: float, ok: bool):
+        if not self.active:
+            return
+        self.latencies[name].append(latency)
+        if not ok:
+            self.errors[name] += 1
+
+    def results(self) -> Dict[str, dict]:
+        elapsed = self.stopped - self.started
+        results = {}
+        everything: List[float] = []
+        for name, latencies in sorted(self.latencies.items()):
+            results[name] = self._summary(latencies, self.errors[name], elapsed)
+            everything.extend(latencies)
+        results["all"] = self._summary(everything, sum(self.errors.values()), elapsed)
+        results["all"]["dropped"] = self.dropped
+        return results
+
+    @staticmethod
+    def _summary(latencies: List[float], errors: int, elapsed: float) -> dict:
+        summary = summarize(latencies, elapsed)
+        summary["errors"] = errors
+        summary["error_rate"] = round(errors / len(latencies), 6) if latencies else 0.0
+        summary["max_ms"] = round(max(latencies) * 1000, 4) if latencies else 0.0
+        summary["histogram_ms"] = histogram([latency * 1000 for latency in latencies])
+        return summary
+
+
+async def issue(name: str, client: httpx.AsyncClient, state: LoadState, recorder: Recorder, sent_at: float):
+    """Send one request and record its latency from ``sent_at``."""
+    try:
+        response = await OPERATIONS[name](client, state)
+        ok = response.status_code == EXPECTED_STATUS.get(name, 200)
+    except httpx.HTTPError:
+        ok = False
+    recorder.record(name, time.perf_counter() - sent_at, ok)
+
+
+async def closed_loop(client, state, recorder, weights, concurrency: int, deadline: float):
+    names, values = list(weights), list(weights.values())
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            name = state.rng.choices(names, values)[0]
+            await issue(name, client, state, recorder, time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def open_loop(client, state, recorder, weights, rate: float, max_in_flight: int, deadline: float):
+    names, values = list(weights), list(weights.values())
+    in_flight = set()
+    next_send = time.perf_counter()
+    while next_send < deadline:
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            if recorder.active:
+                recorder.dropped += 1
+        else:
+            name = state.rng.choices(names, values)[0]
+            task = asyncio.create_task(issue(name, client, state, recorder, next_send))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        next_send += state.rng.expovariate(rate)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def seed_albums(client: httpx.AsyncClient, state: LoadState, count: int, concurrency: int):
+    """Create albums through the API for reads and updates to pick from."""
+    rows = (
+        {key: value for key, value in row.items() if key != "id"}
+        for batch in CatalogueGenerator(CatalogueSpec(artists=max(1, count // 3), note_words=0)).albums()
+        for row in batch
+    )
+    queue = [row for _, row in zip(range(count), rows)]
+
+    async def worker():
+        while queue:
+            response = await client.post("/albums", json=queue.pop())
+            response.raise_for_status()
+            state.album_ids.append(response.json()["id"])
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+@contextmanager
+def serve_in_thread(uri: str) -> Iterator[str]:
+    """Run the app under uvicorn on a background thread; yields its base URL.
+
+    The server gets its own event loop, so client scheduling doesn't delay
+    it, but both still share the GIL: for CPU-bound numbers run the server
+    separately and use ``--target``.
+    """
+    from musical_brain.app import app
+
+    previous_uri = os.environ.get("MUSICAL_BRAIN_NEO4J_URI")
+    os.environ["MUSICAL_BRAIN_NEO4J_URI"] = uri
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", access_log=False)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, name="loadtest-server", daemon=True)
+    try:
+        thread.start()
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("Server failed to start")
+            time.sleep(0.01)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+        if previous_uri is None:
+            os.environ.pop("MUSICAL_BRAIN_NEO4J_URI", None)
+        else:
+            os.environ["MUSICAL_BRAIN_NEO4J_URI"] = previous_uri
+
+
+async def run_load(base_url: str, args: argparse.Namespace) -> Tuple[str, Dict[str, dict]]:
+    weights = parse_mix(args.mix)
+    state = LoadState(random.Random(args.seed))
+    recorder = Recorder()
+    max_connections = args.concurrency if args.rate is None else args.max_in_flight
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        await seed_albums(client, state, args.albums, min(args.concurrency, 32))
+        asyncio.get_running_loop().call_later(args.warmup, recorder.start)
+        deadline = time.perf_counter() + args.warmup + args.duration
+        if args.rate is None:
+            scenario = f"closed-c{args.concurrency}"
+            await closed_loop(client, state, recorder, weights, args.concurrency, deadline)
+        else:
+            scenario = f"open-r{args.rate:g}"
+            await open_loop(client, state, recorder, weights, args.rate, args.max_in_flight, deadline)
+        recorder.stop()
+    return scenario, recorder.results()
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load test the Musical Brain API.")
+    parser.add_argument("--target", help="Base URL of a running server (default: start one in process)")
+    parser.add_argument("--uri", default="memory://", help="Database URI for the in-process server")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted request mix, name=weight,...")
+    parser.add_argument("--concurrency", type=int, default=32, help="Closed-loop workers")
+    parser.add_argument("--rate", type=float, help="Open-loop arrival rate in requests/s")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Open-loop cap on outstanding requests")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--albums", type=int, default=1000, help="Albums created before the run")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the request sequence")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Where to write JSON results")
+    parser.add_argument("--baseline", type=Path, help="Results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression, 0.2 = 20%%")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    if args.target:
+        scenario, results = asyncio.run(run_load(args.target, args))
+    else:
+        with serve_in_thread(args.uri) as base_url:
+            scenario, results = asyncio.run(run_load(base_url, args))
+
+    meta = run_metadata(
+        target=args.target or f"in-process ({args.uri})",
+        mix=args.mix,
+        duration=args.duration,
+        concurrency=args.concurrency,
+        rate=args.rate,
+    )
+    write_results(args.output, meta, {scenario: results})
+    print(format_table({scenario: results}))
+    total = results["all"]
+    print(f"errors: {total['errors']} ({total['error_rate']:.2%}), dropped: {total['dropped']}")
+    print(f"Results written to {args.output}")
+    return check_regressions({scenario: results}, args.baseline, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,68 @@
+"""
+Benchmark converting stored album rows into ``Album`` models.
+
+Compares per-row ``model_validate`` and ``model_construct`` with the bulk
+helpers in ``musical_brain.models``. Usage::
+
+    python -m benchmarks.models --sizes 100,1000 --iterations 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from benchmarks.encode import album_page
+from benchmarks.harness import check_regressions, format_table, run_metadata, summarize, write_results
+from musical_brain.models import Album, from_db_rows, validate_many
+
+DEFAULT_OUTPUT = Path("benchmarks/results/models.json")
+
+CONVERTERS: Dict[str, Callable[[List[Dict[str, Any]]], list]] = {
+    "model_validate": lambda rows: [Album.model_validate(row) for row in rows],
+    "model_construct": lambda rows: [Album.model_construct(**row) for row in rows],
+    "validate_many": lambda rows: validate_many(Album, rows),
+    "from_db_rows": lambda rows: from_db_rows(Album, rows),
+}
+
+
+def time_converter(convert: Callable[[List[Dict[str, Any]]], list], rows: List[Dict[str, Any]], iterations: int):
+    """Time ``iterations`` conversions of ``rows`` after one warm-up call."""
+    convert(rows)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        op_started = time.perf_counter()
+        convert(rows)
+        latencies.append(time.perf_counter() - op_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--sizes", default="100,1000", help="Comma-separated rows per conversion")
+    parser.add_argument("--iterations", type=int, default=200, help="Conversions per method and size")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Where to write JSON results")
+    parser.add_argument("--baseline", type=Path, help="Results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression, 0.2 = 20%%")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    results = {}
+    for size in (int(size) for size in args.sizes.split(",") if size.strip()):
+        rows = album_page(size)["items"]
+        results[f"rows-{size}"] = {
+            name: time_converter(convert, rows, args.iterations) for name, convert in CONVERTERS.items()
+        }
+
+    write_results(args.output, run_metadata(iterations=args.iterations), results)
+    print(format_table(results))
+    print(f"Results written to {args.output}")
+    return check_regressions(results, args.baseline, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,159 @@
+"""
+Benchmark the services CRUD hot paths at several dataset sizes.
+
+Runs against the in-memory backend by default, or against Neo4j with
+``--uri bolt://localhost:7687`` (use a scratch database: nodes are created
+with a ``bench_run`` marker and removed afterwards). Usage::
+
+    python -m benchmarks.services --sizes 1000,100000 --output results.json \
+        --baseline benchmarks/results/baseline.json --threshold 0.2
+
+Exits with status 1 when a metric regressed beyond the threshold.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.harness import check_regressions, format_table, measure, run_metadata, write_results
+from musical_brain.cache import node_cache
+from musical_brain.config import DatabaseSettings
+from musical_brain.database import db
+from musical_brain.services import (
+    count_nodes, create_node, create_nodes, delete_node, get_node, initialize_schema, list_nodes, update_node
+)
+
+DEFAULT_SIZES = "1000,100000,1000000"
+DEFAULT_OUTPUT = Path("benchmarks/results/latest.json")
+DEFAULT_BASELINE = Path("benchmarks/results/baseline.json")
+
+
+def album_row(i: int, run_id: str) -> Dict:
+    """Album properties for the i-th generated node."""
+    return {
+        "title": f"Bench Album {i}",
+        "album_type": "LP",
+        "release_year": 1950 + i % 75,
+        "review_score": round((i % 51) / 10, 1),
+        "bench_run": run_id,
+    }
+
+
+async def seed(label: str, size: int, run_id: str, batch_size: int) -> List[str]:
+    """Create ``size`` nodes through the bulk write path."""
+    return await create_nodes(label, (album_row(i, run_id) for i in range(size)), batch_size=batch_size)
+
+
+async def cleanup(label: str, run_id: str, batch_size: int):
+    """Remove this run's nodes in batches so large runs don't need one huge transaction."""
+    query = f"""
+    MATCH (n:{label} {{bench_run: $run_id}})
+    WITH n LIMIT $batch_size
+    DETACH DELETE n
+    RETURN count(*) AS deleted
+    """
+    while True:
+        result = await db.run_write(query, {"run_id": run_id, "batch_size": batch_size})
+        if not result or result[0]["deleted"] == 0:
+            return
+
+
+async def bench_size(label: str, size: int, args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    """Seed ``size`` nodes, time each operation, then remove them."""
+    run_id = str(uuid.uuid4())
+    rng = random.Random(args.seed)
+    ids = await seed(label, size, run_id, args.batch_size)
+    created: List[str] = []
+
+    async def create(i: int):
+        node = await create_node(label, album_row(size + i, run_id))
+        created.append(node["id"])
+
+    async def get(i: int):
+        await get_node(label, rng.choice(ids))
+
+    async def update(i: int):
+        await update_node(label, rng.choice(ids), {"review_score": rng.randint(0, 50) / 10})
+
+    async def list_page(i: int):
+        await list_nodes(label, limit=100, offset=rng.randrange(0, max(1, min(size, 10_000) - 100)))
+
+    async def count(i: int):
+        await count_nodes(label)
+
+    async def delete(i: int):
+        await delete_node(label, created[i])
+
+    try:
+        results = {
+            "create_node": await measure(create, args.ops),
+            "get_node": await measure(get, args.ops),
+            "update_node": await measure(update, args.ops),
+            "list_nodes": await measure(list_page, args.scan_ops),
+            "count_nodes": await measure(count, args.scan_ops),
+            "delete_node": await measure(delete, args.ops),
+        }
+    finally:
+        await cleanup(label, run_id, args.batch_size)
+    return results
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--uri", help="Database URI (default: memory://, or MUSICAL_BRAIN_NEO4J_URI if set)")
+    parser.add_argument("--label", default="Album", help="Node label to benchmark")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated dataset sizes")
+    parser.add_argument("--ops", type=int, default=500, help="Iterations of each point operation")
+    parser.add_argument("--scan-ops", type=int, default=20, help="Iterations of list_nodes and count_nodes")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Batch size for seeding and cleanup")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the access pattern")
+    parser.add_argument("--cache", action="store_true", help="Keep the node cache enabled for get_node")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Where to write JSON results")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression, 0.2 = 20%%")
+    return parser.parse_args(argv)
+
+
+async def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    settings = DatabaseSettings.from_env()
+    if args.uri:
+        settings = settings.model_copy(update={"uri": args.uri})
+    elif "MUSICAL_BRAIN_NEO4J_URI" not in os.environ:
+        settings = settings.model_copy(update={"uri": "memory://"})
+    if not args.cache:
+        node_cache.configure(enabled=False)
+
+    await db.connect(settings=settings)
+    try:
+        await initialize_schema()
+        results = {}
+        for size in sizes:
+            print(f"Benchmarking {args.label} with {size} nodes...", file=sys.stderr)
+            results[str(size)] = await bench_size(args.label, size, args)
+    finally:
+        await db.disconnect()
+
+    meta = run_metadata(
+        backend=settings.uri.split("://")[0],
+        label=args.label,
+        ops=args.ops,
+        scan_ops=args.scan_ops,
+        cache=args.cache,
+    )
+    write_results(args.output, meta, results)
+    print(format_table(results))
+    print(f"Results written to {args.output}")
+    return check_regressions(results, args.baseline if args.baseline != args.output else None, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
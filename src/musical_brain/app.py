@@ -2,33 +2,72 @@
 Musical Brain - A simple music knowledge graph API.
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from neo4j.exceptions import ConstraintError
+from pydantic import ValidationError
 
+from musical_brain import metrics, services
+from musical_brain.cache import node_cache
+from musical_brain.config import CacheSettings, DatabaseSettings, GenreSettings, HealthSettings
 from musical_brain.database import db
+from musical_brain.genres import genre_closure, list_albums_in_genre, load_genre_closure, watch_genre_closure
+from musical_brain.health import health_monitor
+from musical_brain.influence import list_artists_by_score
+from musical_brain.models import (
+    CREATE_MODELS, UPDATE_MODELS, Album, AlbumUpdate, Artist, BatchAction, BatchOperation, BatchRequest, validate_many
+)
+from musical_brain.responses import FastJSONResponse, dumps
 
 logger = logging.getLogger(__name__)
 
+# Nodes per chunk written to NDJSON streaming responses
+NDJSON_CHUNK_SIZE = 500
+
+# Server-assigned fields ignored in request bodies
+SERVER_FIELDS = {"id", "created_at", "updated_at"}
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Musical Brain...")
     try:
-        await db.connect()
+        node_cache.configure(**CacheSettings.from_env().model_dump())
+        await db.connect(settings=DatabaseSettings.from_env())
+        health = HealthSettings.from_env()
+        health_monitor.configure(health.interval_seconds, health.timeout_seconds, health.stale_after_seconds)
+        await health_monitor.start()
         logger.info("Musical Brain startup completed")
     except Exception as e:
         logger.error(f"Failed to start Musical Brain: {e}")
         raise
+    genres = GenreSettings.from_env()
+    genre_closure.persist_mode = genres.persist_closure
+    background = [asyncio.create_task(metrics.monitor_event_loop())]
+    if genres.load_closure:
+        try:
+            await load_genre_closure(persist=genres.persist_closure)
+        except Exception as e:
+            logger.warning(f"Genre closure not loaded, genre filters will traverse SUBGENRE_OF: {e}")
+        if genres.refresh_seconds:
+            background.append(asyncio.create_task(watch_genre_closure(genres.refresh_seconds)))
 
     yield
 
     # Shutdown
     logger.info("Shutting down Musical Brain...")
+    for task in background:
+        task.cancel()
     try:
+        await health_monitor.stop()
         await db.disconnect()
         logger.info("Musical Brain shutdown completed")
     except Exception as e:
@@ -40,7 +79,16 @@ app = FastAPI(
     description="A simple music knowledge graph API",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+@app.exception_handler(ConstraintError)
+async def constraint_conflict(request: Request, exc: ConstraintError):
+    """A write clashed with a uniqueness constraint, e.g. a duplicate genre name."""
+    logger.info(f"Write to {request.url.path} rejected by a constraint: {exc}")
+    return FastJSONResponse({"detail": "Conflicts with an existing node"}, status_code=409)
 
 
 @app.get("/")
@@ -51,17 +99,46 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Check if the API and database are working."""
-    logger.debug("Health check requested")
-    db_ok = await db.test_connection()
-    status = "healthy" if db_ok else "unhealthy"
-    logger.info(f"Health check result: {status}")
+    """Report API and database health from the last background check."""
+    state = health_monitor.snapshot()
     return {
-        "status": status,
-        "database": "connected" if db_ok else "disconnected",
+        "status": "healthy" if state["ready"] else "unhealthy",
+        **state,
+        "pool": db.pool_stats(),
     }
 
 
+@app.get("/livez")
+async def liveness():
+    """Liveness probe: the process is up and serving requests."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness probe: the last background database check passed recently."""
+    state = health_monitor.snapshot()
+    return FastJSONResponse(
+        {"status": "ready" if state["ready"] else "not ready", **state},
+        status_code=200 if state["ready"] else 503,
+    )
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Request, query, pool and cache metrics in Prometheus text format."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/queries")
+async def query_stats(limit: int = Query(50, ge=1, le=1000)):
+    """Per-query latency aggregates, the most total time first, and the recent slow queries."""
+    return FastJSONResponse({
+        "queries": db.query_stats.snapshot()[:limit],
+        "slow_queries": db.query_stats.slow_queries(),
+    })
+
+
 @app.get("/test-neo4j")
 async def test_neo4j():
     """Simple test to see if Neo4j is working."""
@@ -77,5 +154,179 @@ async def test_neo4j():
         return {"success": False, "error": str(e)}
 
 
+async def ndjson_nodes(label: str, chunk_size: int = NDJSON_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Serialise nodes of a label as NDJSON, a fixed number of lines per chunk."""
+    lines = []
+    async for node in services.iter_nodes(label):
+        lines.append(dumps(node))
+        if len(lines) >= chunk_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+@app.get("/albums")
+async def list_albums(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    genre: Optional[str] = None,
+    include_subgenres: bool = True,
+):
+    """List albums newest first, paginated with an opaque cursor.
+
+    ``genre`` keeps albums of that genre and, unless ``include_subgenres``
+    is false, of all its subgenres.
+    """
+    try:
+        if genre is not None:
+            page = await list_albums_in_genre(genre, include_subgenres, limit=limit, cursor=cursor)
+        else:
+            page = await services.list_nodes_page("Album", limit=limit, cursor=cursor)
+        return FastJSONResponse(page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/albums/stream")
+async def stream_albums():
+    """Stream every album as newline-delimited JSON."""
+    return StreamingResponse(ndjson_nodes("Album"), media_type="application/x-ndjson")
+
+
+@app.get("/albums/{album_id}")
+async def get_album(album_id: str):
+    """Get album details."""
+    album = await services.get_node("Album", album_id)
+    if album is None:
+        raise HTTPException(status_code=404, detail="Album not found")
+    return FastJSONResponse(album)
+
+
+@app.post("/albums", status_code=201)
+async def create_album(album: Album):
+    """Create a new album review."""
+    data = album.model_dump(mode="json", exclude_none=True, exclude=SERVER_FIELDS)
+    return FastJSONResponse(await services.create_node("Album", data), status_code=201)
+
+
+@app.put("/albums/{album_id}")
+async def update_album(album_id: str, updates: AlbumUpdate):
+    """Update an album review with the fields that are set."""
+    data = updates.model_dump(mode="json", exclude_unset=True)
+    album = await services.update_node("Album", album_id, data)
+    if album is None:
+        raise HTTPException(status_code=404, detail="Album not found")
+    return FastJSONResponse(album)
+
+
+@app.delete("/albums/{album_id}", status_code=204)
+async def delete_album(album_id: str):
+    """Delete an album."""
+    if not await services.delete_node("Album", album_id):
+        raise HTTPException(status_code=404, detail="Album not found")
+
+
+@app.get("/artists")
+async def list_artists(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+):
+    """List artists newest first, paginated with an opaque cursor.
+
+    ``sort`` (pagerank, in_degree, out_degree or betweenness) lists scored
+    artists by that influence score instead, highest first.
+    """
+    try:
+        if sort is not None:
+            page = await list_artists_by_score(sort, limit=limit, cursor=cursor)
+        else:
+            page = await services.list_nodes_page("Artist", limit=limit, cursor=cursor)
+        return FastJSONResponse(page)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/artists/stream")
+async def stream_artists():
+    """Stream every artist as newline-delimited JSON."""
+    return StreamingResponse(ndjson_nodes("Artist"), media_type="application/x-ndjson")
+
+
+@app.get("/artists/{artist_id}")
+async def get_artist(artist_id: str):
+    """Get artist details."""
+    artist = await services.get_node("Artist", artist_id)
+    if artist is None:
+        raise HTTPException(status_code=404, detail="Artist not found")
+    return FastJSONResponse(artist)
+
+
+@app.post("/artists", status_code=201)
+async def create_artist(artist: Artist):
+    """Create a new artist."""
+    data = artist.model_dump(mode="json", exclude_none=True, exclude=SERVER_FIELDS)
+    return FastJSONResponse(await services.create_node("Artist", data), status_code=201)
+
+
+def validate_batch(operations: List[BatchOperation]) -> List[services.BatchWrite]:
+    """Validate batch data in bulk, one call per action and label."""
+    groups: Dict[tuple, List[int]] = {}
+    for index, operation in enumerate(operations):
+        if operation.op is not BatchAction.DELETE:
+            groups.setdefault((operation.op, operation.label), []).append(index)
+
+    data: Dict[int, Dict[str, Any]] = {}
+    errors = []
+    for (action, label), indexes in groups.items():
+        create = action is BatchAction.CREATE
+        model = CREATE_MODELS[label] if create else UPDATE_MODELS[label]
+        try:
+            validated = validate_many(model, [operations[i].data for i in indexes])
+        except ValidationError as e:
+            for error in e.errors(include_url=False):
+                row, *loc = error["loc"]
+                errors.append({**error, "loc": ("body", "operations", indexes[row], "data", *loc)})
+            continue
+        for index, item in zip(indexes, validated):
+            if create:
+                data[index] = item.model_dump(mode="json", exclude_none=True, exclude=SERVER_FIELDS)
+            else:
+                data[index] = item.model_dump(mode="json", exclude_unset=True)
+    if errors:
+        raise RequestValidationError(sorted(errors, key=lambda error: error["loc"][2]))
+
+    return [
+        services.BatchWrite(operation.op.value, operation.label.value, operation.id, data.get(index, {}))
+        for index, operation in enumerate(operations)
+    ]
+
+
+@app.post("/batch")
+async def batch_write(batch: BatchRequest):
+    """Apply creates, updates and deletes of albums, artists and genres in one transaction."""
+    writes = validate_batch(batch.operations)
+    results = await services.apply_batch(writes)
+    return FastJSONResponse({
+        "results": [
+            {"op": write.action, "label": write.label, **result}
+            for write, result in zip(writes, results)
+        ],
+    })
+
+
+@app.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Search albums by title and artists by name."""
+    return FastJSONResponse({
+        "albums": await services.search_nodes("Album", q, limit=limit),
+        "artists": await services.search_nodes("Artist", q, limit=limit),
+    })
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,159 @@
+"""
+In-process node cache for Musical Brain.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+
+class NodeCache:
+    """Size-bounded LRU cache of node dicts keyed by (label, id), with a TTL.
+
+    Every operation is synchronous and guarded by a lock, so it is safe to
+    share between coroutines and worker threads. Cached dicts are copied on
+    the way in and out so callers can't mutate each other's results.
+
+    A read that started before a write can finish after the write's
+    invalidation. To keep it from caching the old node again, readers take
+    the key's :meth:`generation` before querying and pass it to :meth:`set`.
+    The set is skipped if the key has been invalidated since.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        ttl_seconds: float = 60.0,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Invalidation counter, the count at each key's last invalidation,
+        # and the highest count dropped from _invalidated to bound it
+        self._invalidations = 0
+        self._invalidated: "OrderedDict[CacheKey, int]" = OrderedDict()
+        self._generation_floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def configure(
+        self,
+        max_size: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        enabled: Optional[bool] = None,
+    ):
+        """Resize, retune or toggle the cache; disabling it drops all entries."""
+        with self._lock:
+            if max_size is not None:
+                self.max_size = max_size
+            if ttl_seconds is not None:
+                self.ttl_seconds = ttl_seconds
+            if enabled is not None:
+                self.enabled = enabled
+            if not self.enabled:
+                self._entries.clear()
+            self._evict_overflow()
+        logger.info(
+            f"Node cache configured (enabled={self.enabled}, max_size={self.max_size}, "
+            f"ttl={self.ttl_seconds}s)"
+        )
+
+    def get(self, label: str, node_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached node, or None on a miss."""
+        if not self.enabled:
+            return None
+        key = (label, node_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, node = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(node)
+
+    def generation(self, label: str, node_id: str) -> int:
+        """Token that changes whenever the node is invalidated, for :meth:`set`."""
+        with self._lock:
+            return self._invalidated.get((label, node_id), self._generation_floor)
+
+    def set(self, label: str, node_id: str, node: Dict[str, Any], generation: Optional[int] = None):
+        """Cache a copy of the node, evicting the least recently used overflow.
+
+        With ``generation``, the node is only cached if it hasn't been
+        invalidated since that :meth:`generation` was taken.
+        """
+        if not self.enabled or self.max_size < 1:
+            return
+        key = (label, node_id)
+        with self._lock:
+            if generation is not None and self._invalidated.get(key, self._generation_floor) != generation:
+                return
+            self._entries[key] = (self._clock() + self.ttl_seconds, dict(node))
+            self._entries.move_to_end(key)
+            self._evict_overflow()
+
+    def invalidate(self, label: str, node_id: str):
+        """Drop a node from the cache and change its generation."""
+        key = (label, node_id)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._invalidations += 1
+            self._invalidated[key] = self._invalidations
+            self._invalidated.move_to_end(key)
+            # Forgetting a key's count falls back to the floor, which changes
+            # the generation of every key without a count of its own; pending
+            # sets for those are skipped, never let through stale
+            while len(self._invalidated) > max(self.max_size, 1):
+                _, count = self._invalidated.popitem(last=False)
+                self._generation_floor = count
+
+    def clear(self):
+        """Drop every cached node and change every generation."""
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+            self._invalidated.clear()
+            self._generation_floor = self._invalidations
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _evict_overflow(self):
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# Global node cache instance
+node_cache = NodeCache()
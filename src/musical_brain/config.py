@@ -0,0 +1,104 @@
+"""
+Environment-driven settings for Musical Brain.
+"""
+
+import os
+from typing import Literal, Mapping, Optional, Type, TypeVar
+
+from pydantic import BaseModel, Field
+
+SettingsT = TypeVar("SettingsT", bound=BaseModel)
+
+
+def load_from_env(
+    model: Type[SettingsT],
+    prefix: str,
+    environ: Optional[Mapping[str, str]] = None,
+) -> SettingsT:
+    """Build a settings model from ``<PREFIX><FIELD>`` environment variables.
+
+    Unset or empty variables fall back to the model defaults; values are
+    coerced and validated by pydantic.
+    """
+    environ = os.environ if environ is None else environ
+    values = {}
+    for name in model.model_fields:
+        raw = environ.get(f"{prefix}{name.upper()}")
+        if raw:
+            values[name] = raw
+    return model.model_validate(values)
+
+
+class DatabaseSettings(BaseModel):
+    """Neo4j connection and driver tuning settings.
+
+    Read from ``MUSICAL_BRAIN_NEO4J_*`` variables, e.g.
+    ``MUSICAL_BRAIN_NEO4J_MAX_CONNECTION_POOL_SIZE=200``.
+    """
+    uri: str = "bolt://localhost:7687"
+    user: str = "neo4j"
+    password: str = "password"
+    database: Optional[str] = None
+    max_connection_pool_size: int = Field(100, ge=1)
+    connection_acquisition_timeout: float = Field(60.0, gt=0)  # seconds
+    max_connection_lifetime: float = Field(3600.0, gt=0)  # seconds
+    keep_alive: bool = True
+    fetch_size: int = Field(1000, ge=-1)  # records per batch, -1 fetches all at once
+    liveness_check_timeout: Optional[float] = Field(None, ge=0)  # seconds idle before a ping
+    query_stats: bool = True  # collect per-query latency aggregates
+    slow_query_ms: float = Field(500.0, ge=0)  # log queries at least this slow
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "DatabaseSettings":
+        """Load settings from ``MUSICAL_BRAIN_NEO4J_*`` environment variables."""
+        return load_from_env(cls, "MUSICAL_BRAIN_NEO4J_", environ)
+
+
+class CacheSettings(BaseModel):
+    """Node cache settings, read from ``MUSICAL_BRAIN_CACHE_*`` variables."""
+    enabled: bool = True
+    max_size: int = Field(10_000, ge=0)
+    ttl_seconds: float = Field(60.0, gt=0)
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "CacheSettings":
+        """Load settings from ``MUSICAL_BRAIN_CACHE_*`` environment variables."""
+        return load_from_env(cls, "MUSICAL_BRAIN_CACHE_", environ)
+
+
+class HealthSettings(BaseModel):
+    """Background health check settings, read from ``MUSICAL_BRAIN_HEALTH_*`` variables."""
+    interval_seconds: float = Field(5.0, gt=0)  # time between database pings
+    timeout_seconds: float = Field(2.0, gt=0)  # a slower ping counts as a failure
+    stale_after_seconds: float = Field(30.0, gt=0)  # not ready if the last ping is older
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "HealthSettings":
+        """Load settings from ``MUSICAL_BRAIN_HEALTH_*`` environment variables."""
+        return load_from_env(cls, "MUSICAL_BRAIN_HEALTH_", environ)
+
+
+class GenreSettings(BaseModel):
+    """Genre closure settings, read from ``MUSICAL_BRAIN_GENRES_*`` variables."""
+    load_closure: bool = True  # build the closure at startup
+    persist_closure: Optional[Literal["edges", "property"]] = None  # also keep it in the database
+    refresh_seconds: float = Field(30.0, ge=0.0)  # pick up changes made by other replicas; 0 disables
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "GenreSettings":
+        """Load settings from ``MUSICAL_BRAIN_GENRES_*`` environment variables."""
+        return load_from_env(cls, "MUSICAL_BRAIN_GENRES_", environ)
+
+
+class SimilaritySettings(BaseModel):
+    """Album similarity settings, read from ``MUSICAL_BRAIN_SIMILARITY_*`` variables."""
+    top_k: int = Field(10, ge=1, le=100)  # SIMILAR_TO edges per album
+    min_score: float = Field(0.1, ge=0.0, le=1.0)  # weaker pairs aren't linked
+    block_size: int = Field(1024, ge=1)  # albums per side of each matrix product
+    max_terms: int = Field(2048, ge=0)  # review_notes vocabulary for TF-IDF
+    index_path: Optional[str] = None  # where the CLI saves the index for --update
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "SimilaritySettings":
+        """Load settings from ``MUSICAL_BRAIN_SIMILARITY_*`` environment variables."""
+        return load_from_env(cls, "MUSICAL_BRAIN_SIMILARITY_", environ)
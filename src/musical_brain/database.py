@@ -2,31 +2,137 @@
 Simple Neo4j database connection for Musical Brain.
 """
 
+import asyncio
 import logging
-from typing import Optional
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 
-from neo4j import AsyncGraphDatabase, AsyncDriver
+from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncManagedTransaction, AsyncSession, AsyncTransaction
+
+from musical_brain.config import DatabaseSettings
+from musical_brain.querystats import QueryStats, QueryTiming
+
+# URIs with this scheme use the in-memory backend instead of a Neo4j server
+MEMORY_URI_SCHEME = "memory://"
+
+# Explicit transaction shared by every query in the current task, if any,
+# the task that opened it and the callbacks to run when it ends
+_current_tx: ContextVar[Optional[Tuple[AsyncTransaction, Optional[asyncio.Task], List[Callable[[], None]]]]] = (
+    ContextVar("current_tx", default=None)
+)
+
+
+def _shared_tx() -> Optional[AsyncTransaction]:
+    """The transaction of the enclosing ``transaction()`` block, if any.
+
+    Tasks spawned inside the block inherit it through their context, but
+    the driver rejects concurrent use of one transaction, so only the task
+    that opened it may run queries in it.
+    """
+    current = _current_tx.get()
+    if current is None:
+        return None
+    tx, owner, _ = current
+    if asyncio.current_task() is not owner:
+        raise RuntimeError("A transaction() block can only be used by the task that opened it")
+    return tx
+
+
+async def _fetch_all(
+    tx: AsyncManagedTransaction,
+    query: str,
+    parameters: dict,
+    timing: Optional[QueryTiming] = None,
+) -> list:
+    """Transaction function that runs a query and buffers its records."""
+    if timing is not None:
+        timing.work_started()
+    result = await tx.run(query, parameters)
+    records = [record async for record in result]
+    summary = await result.consume()
+    decode_started = time.perf_counter()
+    data = [record.data() for record in records]
+    if timing is not None:
+        timing.decode_ms = (time.perf_counter() - decode_started) * 1000
+        timing.records = len(data)
+        timing.set_summary(summary)
+    return data
+
+
+def _pool_usage(driver: Optional[AsyncDriver]) -> Tuple[int, int]:
+    """``(in_use, idle)`` connections of the driver's pool, or zeros if unknown.
+
+    The driver has no public API for this. It reads the private
+    ``driver._pool.connections``, a dict of address to connections with an
+    ``in_use`` flag, as in neo4j 5.x and 6.x. It returns zeros, not errors,
+    if a driver upgrade changes that layout.
+    """
+    in_use = idle = 0
+    try:
+        for connections in list(driver._pool.connections.values()):
+            for connection in list(connections):
+                if connection.in_use:
+                    in_use += 1
+                else:
+                    idle += 1
+    except (AttributeError, TypeError):
+        return 0, 0
+    return in_use, idle
 
 
 class DatabaseManager:
     """Simple Neo4j database manager."""
 
-    def __init__(self):
+    def __init__(self, settings: Optional[DatabaseSettings] = None):
         self.driver: Optional[AsyncDriver] = None
+        self.settings = settings or DatabaseSettings()
         self.logger = logging.getLogger(__name__)
+        self.query_stats = QueryStats(self.settings.slow_query_ms, enabled=self.settings.query_stats)
+        self._active_sessions = 0
 
     async def connect(
         self,
-        uri: str = "bolt://localhost:7687",
-        user: str = "neo4j",
-        password: str = "password",
+        uri: Optional[str] = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        settings: Optional[DatabaseSettings] = None,
     ):
-        """Connect to Neo4j database."""
+        """Connect to Neo4j database.
+
+        Explicit ``uri``/``user``/``password`` override the ones in ``settings``.
+        A ``memory://`` URI connects to a fresh in-process graph instead.
+        """
+        if settings is not None:
+            self.settings = settings
+        updates = {"uri": uri, "user": user, "password": password}
+        self.settings = self.settings.model_copy(
+            update={key: value for key, value in updates.items() if value is not None}
+        )
+        cfg = self.settings
+        self.query_stats.configure(slow_query_ms=cfg.slow_query_ms, enabled=cfg.query_stats)
         try:
-            self.driver = AsyncGraphDatabase.driver(uri, auth=(user, password))
+            if cfg.uri.startswith(MEMORY_URI_SCHEME):
+                # Imported lazily so the Neo4j path never pays for the interpreter
+                from musical_brain.inmemory import MemoryDriver
+
+                self.driver = MemoryDriver()
+            else:
+                self.driver = AsyncGraphDatabase.driver(
+                    cfg.uri,
+                    auth=(cfg.user, cfg.password),
+                    max_connection_pool_size=cfg.max_connection_pool_size,
+                    connection_acquisition_timeout=cfg.connection_acquisition_timeout,
+                    max_connection_lifetime=cfg.max_connection_lifetime,
+                    keep_alive=cfg.keep_alive,
+                    liveness_check_timeout=cfg.liveness_check_timeout,
+                )
             # Test the connection
             await self.driver.verify_connectivity()
-            self.logger.info(f"Connected to Neo4j at {uri}")
+            self.logger.info(
+                f"Connected to Neo4j at {cfg.uri} (pool size {cfg.max_connection_pool_size})"
+            )
         except Exception as e:
             self.logger.error(f"Failed to connect to Neo4j: {e}")
             raise
@@ -37,22 +143,181 @@ class DatabaseManager:
             await self.driver.close()
             self.logger.info("Disconnected from Neo4j")
 
-    async def run_query(self, query: str, parameters: dict = None) -> list:
-        """Run a simple Cypher query and return results."""
+    @property
+    def in_transaction(self) -> bool:
+        """Whether the current task is inside a ``transaction()`` block."""
+        return _current_tx.get() is not None
+
+    def after_transaction(self, callback: Callable[[], None]):
+        """Call ``callback`` once the current ``transaction()`` block ends, committed or rolled back.
+
+        Outside a transaction it is called right away.
+        """
+        current = _current_tx.get()
+        if current is None:
+            callback()
+        else:
+            current[2].append(callback)
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Connection pool usage gauges.
+
+        ``in_use``/``idle`` come from :func:`_pool_usage`. ``active_sessions``
+        counts open sessions; a session holds a connection only while a
+        query runs, so sessions above ``max_size`` don't mean anyone is
+        queued for a connection.
+        """
+        in_use, idle = _pool_usage(self.driver)
+        return {
+            "max_size": self.settings.max_connection_pool_size,
+            "in_use": in_use,
+            "idle": idle,
+            "active_sessions": self._active_sessions,
+        }
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[AsyncSession]:
+        """Open a session with the configured database and fetch size."""
+        self._active_sessions += 1
+        try:
+            async with self.driver.session(
+                database=self.settings.database,
+                fetch_size=self.settings.fetch_size,
+            ) as session:
+                yield session
+        finally:
+            self._active_sessions -= 1
+
+    def _require_driver(self):
         if not self.driver:
             self.logger.error("Attempted to run query without database connection")
             raise RuntimeError("Not connected to database. Call connect() first.")
 
+    async def _execute(self, query: str, parameters: Optional[dict], access: Optional[str]) -> list:
+        """Run a query in the shared transaction, a managed one or auto-commit."""
+        self._require_driver()
         self.logger.debug(f"Executing query: {query[:100]}{'...' if len(query) > 100 else ''}")
+        timing = QueryTiming()
+        error = None
         try:
-            async with self.driver.session() as session:
-                result = await session.run(query, parameters or {})
-                data = await result.data()
-                self.logger.debug(f"Query returned {len(data)} records")
-                return data
+            tx = _shared_tx()
+            if tx is not None:
+                data = await _fetch_all(tx, query, parameters or {}, timing)
+            else:
+                async with self._session() as session:
+                    if access == "read":
+                        data = await session.execute_read(_fetch_all, query, parameters or {}, timing)
+                    elif access == "write":
+                        data = await session.execute_write(_fetch_all, query, parameters or {}, timing)
+                    else:
+                        data = await _fetch_all(session, query, parameters or {}, timing)
+            self.logger.debug(f"Query returned {len(data)} records")
+            return data
         except Exception as e:
+            error = e
             self.logger.error(f"Query execution failed: {e}")
             raise
+        finally:
+            timing.finish()
+            self.query_stats.record(query, parameters, timing, error)
+
+    async def run_query(self, query: str, parameters: dict = None) -> list:
+        """Run a simple Cypher query and return results."""
+        return await self._execute(query, parameters, access=None)
+
+    async def run_read(self, query: str, parameters: dict = None) -> list:
+        """Run a read query in a managed transaction, retried on transient errors.
+
+        Inside ``transaction()`` the query joins the shared transaction instead.
+        """
+        return await self._execute(query, parameters, access="read")
+
+    async def run_write(self, query: str, parameters: dict = None) -> list:
+        """Run a write query in a managed transaction, retried on transient errors.
+
+        Inside ``transaction()`` the query joins the shared transaction instead.
+        """
+        return await self._execute(query, parameters, access="write")
+
+    async def stream_query(self, query: str, parameters: dict = None) -> AsyncIterator[dict]:
+        """Run a query and yield records as the driver fetches them.
+
+        Records arrive in batches of the configured fetch size, so memory
+        stays bounded no matter how large the result is. The session stays
+        open until the generator is exhausted or closed. The recorded query
+        time covers the whole stream, including time spent by the consumer.
+        """
+        self._require_driver()
+        self.logger.debug(f"Streaming query: {query[:100]}{'...' if len(query) > 100 else ''}")
+        timing = QueryTiming()
+        error = None
+        try:
+            tx = _shared_tx()
+            if tx is not None:
+                async for data in self._stream_records(tx, query, parameters or {}, timing):
+                    yield data
+            else:
+                async with self._session() as session:
+                    async for data in self._stream_records(session, query, parameters or {}, timing):
+                        yield data
+            self.logger.debug(f"Query streamed {timing.records} records")
+        except Exception as e:
+            error = e
+            self.logger.error(f"Query streaming failed after {timing.records} records: {e}")
+            raise
+        finally:
+            timing.finish()
+            self.query_stats.record(query, parameters, timing, error)
+
+    @staticmethod
+    async def _stream_records(runner, query: str, parameters: dict, timing: QueryTiming) -> AsyncIterator[dict]:
+        timing.work_started()
+        result = await runner.run(query, parameters)
+        async for record in result:
+            decode_started = time.perf_counter()
+            data = record.data()
+            timing.decode_ms += (time.perf_counter() - decode_started) * 1000
+            timing.records += 1
+            yield data
+        timing.set_summary(await result.consume())
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[AsyncTransaction]:
+        """Share one session and one commit across every query in the block.
+
+        All ``run_query``/``run_read``/``run_write`` calls made by the current
+        task inside the block join the transaction. It commits when the block
+        exits normally and rolls back on error. Nested blocks join the
+        outermost transaction. Tasks spawned inside the block can't use it,
+        see :func:`_shared_tx`. Callbacks registered with
+        :meth:`after_transaction` run after the outermost block ends.
+        """
+        self._require_driver()
+        tx = _shared_tx()
+        if tx is not None:
+            yield tx
+            return
+
+        async with self._session() as session:
+            tx = await session.begin_transaction()
+            callbacks: List[Callable[[], None]] = []
+            token = _current_tx.set((tx, asyncio.current_task(), callbacks))
+            try:
+                yield tx
+                await tx.commit()
+                self.logger.debug("Transaction committed")
+            except BaseException:
+                # The driver closes the transaction itself when the commit
+                # fails or the task is cancelled; rolling back then would
+                # raise and hide the original error
+                if not tx.closed():
+                    await tx.rollback()
+                self.logger.warning("Transaction rolled back")
+                raise
+            finally:
+                _current_tx.reset(token)
+                for callback in callbacks:
+                    callback()
 
     async def test_connection(self) -> bool:
         """Test if database is working."""
@@ -0,0 +1,426 @@
+"""
+Genre hierarchy transitive closure for Musical Brain.
+
+Keeps the ancestors of every genre along ``SUBGENRE_OF`` in memory, so
+"this genre and all its subgenres" is a lookup instead of a variable-length
+traversal. Change ``SUBGENRE_OF`` through :func:`link_subgenres` and
+:func:`unlink_subgenres` to keep the closure (and its persisted copy) in
+step. Changes made any other way, including by other processes, are picked
+up by :func:`refresh_genre_closure`, which the app runs periodically.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from musical_brain.database import db
+from musical_brain.metrics import instrumented
+from musical_brain.services import (
+    DEFAULT_EDGE_BATCH_SIZE, create_relationships, decode_cursor, delete_relationships, encode_cursor
+)
+
+logger = logging.getLogger(__name__)
+
+# Ways to persist the closure: ANCESTOR_OF edges or an ancestor_ids property
+PERSIST_MODES = ("edges", "property")
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+# Serialises closure changes and reloads within this process
+_closure_lock = asyncio.Lock()
+
+# Genre count, SUBGENRE_OF count and newest SUBGENRE_OF created_at, compared by refresh_genre_closure
+_VERSION_QUERY = """
+MATCH (g:Genre)
+WITH count(g) AS genres
+OPTIONAL MATCH (:Genre)-[r:SUBGENRE_OF]->(:Genre)
+RETURN genres, count(r) AS edges, max(r.created_at) AS latest
+"""
+
+
+class GenreClosure:
+    """Ancestor sets per genre as sorted int32 arrays, updated incrementally.
+
+    Genres are numbered in the order they are first seen. Descendants are
+    the inverse of the ancestor sets, packed on demand into CSR arrays
+    (``offsets``/``values``) and cached until the next change.
+    """
+
+    def __init__(self, persist_mode: Optional[str] = None):
+        self.persist_mode = persist_mode  # default for link_subgenres/unlink_subgenres
+        self.clear()
+
+    def clear(self):
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._parents: List[Set[int]] = []
+        self._ancestors: List[np.ndarray] = []
+        self._descendants: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self.loaded = False
+        self.version: Optional[Tuple[Any, ...]] = None  # database state it was loaded from
+
+    def copy(self) -> "GenreClosure":
+        """An independent copy to stage changes on; ancestor arrays are shared, never mutated."""
+        other = GenreClosure(self.persist_mode)
+        other.ids = list(self.ids)
+        other.index = dict(self.index)
+        other._parents = [set(parents) for parents in self._parents]
+        other._ancestors = list(self._ancestors)
+        other._descendants = self._descendants
+        other.loaded = self.loaded
+        other.version = self.version
+        return other
+
+    def replace(self, other: "GenreClosure"):
+        """Take over the contents of ``other``, keeping this object's identity."""
+        self.ids, self.index = other.ids, other.index
+        self._parents, self._ancestors, self._descendants = other._parents, other._ancestors, other._descendants
+        self.loaded = other.loaded
+        self.version = other.version
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _add_genre(self, genre_id: str) -> int:
+        index = self.index.get(genre_id)
+        if index is None:
+            index = self.index[genre_id] = len(self.ids)
+            self.ids.append(genre_id)
+            self._parents.append(set())
+            self._ancestors.append(_EMPTY)
+            self._descendants = None
+        return index
+
+    def _inherit(self, node: int) -> np.ndarray:
+        """Ancestors of ``node`` from its parents' current ancestor sets."""
+        parents = self._parents[node]
+        if not parents:
+            return _EMPTY
+        parts = [np.fromiter(parents, dtype=np.int32, count=len(parents))]
+        parts.extend(self._ancestors[parent] for parent in parents)
+        return np.unique(np.concatenate(parts))
+
+    def build(self, genre_ids: Iterable[str], edges: Iterable[Tuple[str, str]]):
+        """Compute the closure from scratch; ``edges`` are ``(child_id, parent_id)``."""
+        self.clear()
+        for genre_id in genre_ids:
+            self._add_genre(genre_id)
+        for child_id, parent_id in edges:
+            child, parent = self._add_genre(child_id), self._add_genre(parent_id)
+            if child != parent:
+                self._parents[child].add(parent)
+
+        # Kahn's algorithm: a genre is done once all its parents are
+        pending = [len(parents) for parents in self._parents]
+        children: List[List[int]] = [[] for _ in self.ids]
+        for child, parents in enumerate(self._parents):
+            for parent in parents:
+                children[parent].append(child)
+        ready = [node for node, count in enumerate(pending) if count == 0]
+        done = 0
+        while ready:
+            node = ready.pop()
+            self._ancestors[node] = self._inherit(node)
+            done += 1
+            for child in children[node]:
+                pending[child] -= 1
+                if pending[child] == 0:
+                    ready.append(child)
+        if done != len(self.ids):
+            cyclic = [self.ids[node] for node, count in enumerate(pending) if count]
+            self.clear()
+            raise ValueError(f"SUBGENRE_OF cycle among genres: {', '.join(cyclic[:10])}")
+        self.loaded = True
+        logger.info(f"Built genre closure for {len(self.ids)} genres")
+
+    def _descendant_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._descendants is None:
+            n = len(self.ids)
+            counts = np.fromiter((len(a) for a in self._ancestors), dtype=np.int64, count=n)
+            ancestors = np.concatenate(self._ancestors) if n else _EMPTY
+            owners = np.repeat(np.arange(n, dtype=np.int32), counts)
+            order = np.argsort(ancestors, kind="stable")
+            offsets = np.zeros(n + 1, dtype=np.int32)
+            np.cumsum(np.bincount(ancestors, minlength=n), out=offsets[1:])
+            self._descendants = (offsets, owners[order])
+        return self._descendants
+
+    def _descendant_indexes(self, node: int) -> np.ndarray:
+        offsets, values = self._descendant_csr()
+        return values[offsets[node]:offsets[node + 1]]
+
+    def ancestors(self, genre_id: str) -> List[str]:
+        """IDs of every genre ``genre_id`` is a subgenre of, directly or not."""
+        index = self.index.get(genre_id)
+        if index is None:
+            return []
+        return [self.ids[i] for i in self._ancestors[index].tolist()]
+
+    def descendants(self, genre_id: str, include_self: bool = False) -> List[str]:
+        """IDs of every subgenre of ``genre_id``, directly or not."""
+        index = self.index.get(genre_id)
+        if index is None:
+            return [genre_id] if include_self else []
+        ids = [self.ids[i] for i in self._descendant_indexes(index).tolist()]
+        return [genre_id, *ids] if include_self else ids
+
+    def add_edge(self, child_id: str, parent_id: str) -> List[str]:
+        """Record ``child SUBGENRE_OF parent``; returns the genres whose ancestors changed."""
+        child, parent = self._add_genre(child_id), self._add_genre(parent_id)
+        if child == parent or child in set(self._ancestors[parent].tolist()):
+            raise ValueError(f"Linking {child_id} under {parent_id} would create a SUBGENRE_OF cycle")
+        if parent in self._parents[child]:
+            return []
+        self._parents[child].add(parent)
+        gained = np.unique(np.append(self._ancestors[parent], np.int32(parent)))
+        affected = [child, *self._descendant_indexes(child).tolist()]
+        changed = []
+        for node in affected:
+            merged = np.union1d(self._ancestors[node], gained).astype(np.int32)
+            if len(merged) != len(self._ancestors[node]):
+                self._ancestors[node] = merged
+                changed.append(self.ids[node])
+        self._descendants = None
+        return changed
+
+    def remove_edge(self, child_id: str, parent_id: str) -> List[str]:
+        """Forget ``child SUBGENRE_OF parent``; returns the genres whose ancestors changed."""
+        child, parent = self.index.get(child_id), self.index.get(parent_id)
+        if child is None or parent is None or parent not in self._parents[child]:
+            return []
+        self._parents[child].discard(parent)
+        affected = [child, *self._descendant_indexes(child).tolist()]
+        # An ancestor always has fewer ancestors than its descendants: a topological order
+        affected.sort(key=lambda node: len(self._ancestors[node]))
+        changed = []
+        for node in affected:
+            ancestors = self._inherit(node)
+            if not np.array_equal(ancestors, self._ancestors[node]):
+                self._ancestors[node] = ancestors
+                changed.append(self.ids[node])
+        self._descendants = None
+        return changed
+
+    def ancestor_pairs(self, genre_ids: Sequence[str]) -> List[Tuple[str, str]]:
+        """``(ancestor_id, genre_id)`` pairs for the given genres."""
+        return [
+            (self.ids[ancestor], genre_id)
+            for genre_id in genre_ids
+            for ancestor in self._ancestors[self.index[genre_id]].tolist()
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        sizes = [len(ancestors) for ancestors in self._ancestors]
+        return {
+            "genres": len(self.ids),
+            "edges": sum(len(parents) for parents in self._parents),
+            "closure_pairs": sum(sizes),
+            "max_ancestors": max(sizes, default=0),
+        }
+
+
+# Global genre closure instance
+genre_closure = GenreClosure()
+
+
+async def _read_version() -> Tuple[Any, ...]:
+    result = await db.run_read(_VERSION_QUERY)
+    row = result[0] if result else {"genres": 0, "edges": 0, "latest": None}
+    return (row["genres"], row["edges"], row["latest"])
+
+
+async def _load(persist: Optional[str]) -> GenreClosure:
+    genres = await db.run_read("MATCH (g:Genre) RETURN g.id AS id")
+    edges = await db.run_read(
+        "MATCH (c:Genre)-[r:SUBGENRE_OF]->(p:Genre) RETURN c.id AS child, p.id AS parent, r.created_at AS created_at"
+    )
+    genre_closure.build((row["id"] for row in genres), ((row["child"], row["parent"]) for row in edges))
+    stamps = [row["created_at"] for row in edges if row["created_at"] is not None]
+    genre_closure.version = (len(genres), len(edges), max(stamps, default=None))
+    if persist:
+        await persist_closure(genre_closure.ids, persist)
+    return genre_closure
+
+
+async def load_genre_closure(persist: Optional[str] = None) -> GenreClosure:
+    """Build the closure from the database, optionally persisting all of it."""
+    async with _closure_lock:
+        return await _load(persist)
+
+
+@instrumented
+async def refresh_genre_closure() -> bool:
+    """Reload the closure if the genres or ``SUBGENRE_OF`` edges changed since it was loaded.
+
+    One count query detects links, unlinks and new genres written by other
+    processes. Returns whether the closure was reloaded.
+    """
+    version = await _read_version()
+    async with _closure_lock:
+        if genre_closure.loaded and genre_closure.version == version:
+            return False
+        await _load(persist=None)
+    logger.info(f"Reloaded genre closure: {len(genre_closure)} genres")
+    return True
+
+
+async def watch_genre_closure(interval: float):
+    """Refresh the closure every ``interval`` seconds, until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await refresh_genre_closure()
+        except Exception as e:
+            logger.warning(f"Genre closure refresh failed: {e}")
+
+
+@instrumented
+async def persist_closure(genre_ids: Sequence[str], mode: str = "edges", closure: Optional[GenreClosure] = None):
+    """Write the ancestors of ``genre_ids`` to the database in one transaction.
+
+    ``edges`` replaces their incoming ``(ancestor)-[:ANCESTOR_OF]->(genre)``
+    relationships; ``property`` sets ``ancestor_ids`` on the genre nodes.
+    ``closure`` defaults to the global one.
+    """
+    if mode not in PERSIST_MODES:
+        raise ValueError(f"Unknown closure persist mode: {mode}")
+    closure = genre_closure if closure is None else closure
+    batches = [genre_ids[i:i + DEFAULT_EDGE_BATCH_SIZE] for i in range(0, len(genre_ids), DEFAULT_EDGE_BATCH_SIZE)]
+    async with db.transaction():
+        if mode == "edges":
+            for batch in batches:
+                await db.run_write(
+                    """
+                    UNWIND $ids AS id
+                    MATCH (:Genre)-[r:ANCESTOR_OF]->(g:Genre {id: id})
+                    DELETE r
+                    """,
+                    {"ids": batch},
+                )
+            await create_relationships("Genre", "ANCESTOR_OF", "Genre", closure.ancestor_pairs(genre_ids))
+        else:
+            for batch in batches:
+                rows = [{"id": genre_id, "ancestors": closure.ancestors(genre_id)} for genre_id in batch]
+                await db.run_write(
+                    """
+                    UNWIND $rows AS row
+                    MATCH (g:Genre {id: row.id})
+                    SET g.ancestor_ids = row.ancestors
+                    """,
+                    {"rows": rows},
+                )
+    logger.info(f"Persisted closure of {len(genre_ids)} genres as {mode}")
+
+
+async def _linked_pairs(edges: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """The ``(child_id, parent_id)`` pairs of ``edges`` that are linked by ``SUBGENRE_OF``."""
+    rows = [{"child": child_id, "parent": parent_id} for child_id, parent_id in edges]
+    result = await db.run_read(
+        """
+        UNWIND $rows AS row
+        MATCH (c:Genre {id: row.child})-[:SUBGENRE_OF]->(p:Genre {id: row.parent})
+        RETURN DISTINCT c.id AS child, p.id AS parent
+        """,
+        {"rows": rows},
+    )
+    return [(record["child"], record["parent"]) for record in result]
+
+
+async def _change_subgenres(edges: List[Tuple[str, str]], link: bool, persist: Optional[str]) -> int:
+    """Write SUBGENRE_OF changes and apply the ones that took effect to the closure.
+
+    The changes are staged on a copy of the closure inside the transaction,
+    so a cycle or a failed write leaves the live closure untouched. Only
+    links that exist after the write (or existed before an unlink) are
+    applied, and the copy replaces the live closure once the transaction
+    has committed. The copy takes the version read after the write, so the
+    next refresh doesn't reload it, unless the database had already moved
+    on from the closure's version before the write.
+    """
+    async with _closure_lock:
+        staged = genre_closure.copy()
+        changed: Set[str] = set()
+        async with db.transaction():
+            current = await _read_version() == genre_closure.version
+            if link:
+                count = await create_relationships("Genre", "SUBGENRE_OF", "Genre", edges, merge=True)
+                for child_id, parent_id in await _linked_pairs(edges):
+                    changed.update(staged.add_edge(child_id, parent_id))
+            else:
+                linked = await _linked_pairs(edges)
+                count = await delete_relationships("Genre", "SUBGENRE_OF", "Genre", linked)
+                for child_id, parent_id in linked:
+                    changed.update(staged.remove_edge(child_id, parent_id))
+            persist = persist or genre_closure.persist_mode
+            if persist and changed:
+                await persist_closure(sorted(changed), persist, closure=staged)
+            if current:
+                staged.version = await _read_version()
+        genre_closure.replace(staged)
+    logger.info(f"{'Linked' if link else 'Unlinked'} {count} subgenres; {len(changed)} genres changed ancestors")
+    return count
+
+
+async def link_subgenres(edges: Iterable[Tuple[str, str]], persist: Optional[str] = None) -> int:
+    """Create ``(child)-[:SUBGENRE_OF]->(parent)`` links and update the closure.
+
+    Links that would create a cycle raise ValueError and nothing is written.
+    ``persist`` defaults to the closure's ``persist_mode``. Returns the
+    number of relationships written.
+    """
+    return await _change_subgenres(list(edges), link=True, persist=persist)
+
+
+async def unlink_subgenres(edges: Iterable[Tuple[str, str]], persist: Optional[str] = None) -> int:
+    """Delete ``(child)-[:SUBGENRE_OF]->(parent)`` links and update the closure.
+
+    Returns the number of relationships deleted.
+    """
+    return await _change_subgenres(list(edges), link=False, persist=persist)
+
+
+@instrumented
+async def list_albums_in_genre(
+    genre_id: str,
+    include_subgenres: bool = True,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """List albums of a genre, and by default its subgenres, newest first.
+
+    Subgenres come from the in-memory closure, so the query is an ID index
+    lookup. Before the closure is loaded it falls back to a ``SUBGENRE_OF*``
+    traversal. Paginated like ``list_nodes_page``.
+    """
+    params: Dict[str, Any] = {"limit": limit + 1}
+    if include_subgenres and not genre_closure.loaded:
+        params["id"] = genre_id
+        match = "MATCH (:Genre {id: $id})<-[:SUBGENRE_OF*0..]-(g:Genre)"
+    else:
+        params["ids"] = genre_closure.descendants(genre_id, include_self=True) if include_subgenres else [genre_id]
+        match = "MATCH (g:Genre) WHERE g.id IN $ids"
+    if cursor:
+        params["created_at"], params["id_after"] = decode_cursor(cursor)
+        where = "a.created_at <= $created_at AND (a.created_at < $created_at OR a.id < $id_after)"
+    else:
+        where = "a.created_at IS NOT NULL"
+
+    query = f"""
+    {match}
+    MATCH (a:Album)-[:BELONGS_TO_GENRE]->(g)
+    WITH DISTINCT a
+    WHERE {where}
+    RETURN a
+    ORDER BY a.created_at DESC, a.id DESC
+    LIMIT $limit
+    """
+
+    result = await db.run_read(query, params)
+    albums = [dict(record["a"]) for record in result]
+    next_cursor = None
+    if len(albums) > limit:
+        albums = albums[:limit]
+        next_cursor = encode_cursor(albums[-1]["created_at"], albums[-1]["id"])
+    return {"items": albums, "next_cursor": next_cursor}
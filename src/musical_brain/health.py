@@ -0,0 +1,128 @@
+"""
+Background database health monitor for Musical Brain.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, UTC
+from typing import Any, Callable, Dict, Optional
+
+from musical_brain.database import db
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """Pings the database on an interval and caches the outcome.
+
+    Probes read the cached state instead of doing a round trip, so they
+    answer immediately and add no database load. The database counts as
+    ready when the last ping succeeded and is younger than ``stale_after``.
+    """
+
+    def __init__(
+        self,
+        interval: float = 5.0,
+        timeout: float = 2.0,
+        stale_after: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._clock = clock
+        self._task: Optional[asyncio.Task] = None
+        self.ok: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.latency_ms: Optional[float] = None
+        self.checked_at: Optional[datetime] = None
+        self.consecutive_failures = 0
+        self._checked_monotonic: Optional[float] = None
+
+    def configure(
+        self,
+        interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+        stale_after: Optional[float] = None,
+    ):
+        """Change the ping interval, timeout or staleness limit."""
+        if interval is not None:
+            self.interval = interval
+        if timeout is not None:
+            self.timeout = timeout
+        if stale_after is not None:
+            self.stale_after = stale_after
+
+    async def check(self) -> bool:
+        """Ping the database once and record the outcome."""
+        started = time.perf_counter()
+        try:
+            ok = await asyncio.wait_for(db.test_connection(), self.timeout)
+            error = None if ok else "connection test failed"
+        except asyncio.TimeoutError:
+            ok, error = False, f"no response within {self.timeout:g}s"
+        except Exception as e:
+            ok, error = False, str(e)
+
+        if ok != self.ok:
+            log = logger.info if ok else logger.warning
+            log(f"Database health changed to {'healthy' if ok else 'unhealthy'}" + (f": {error}" if error else ""))
+        self.ok = ok
+        self.error = error
+        self.latency_ms = (time.perf_counter() - started) * 1000
+        self.checked_at = datetime.now(UTC)
+        self._checked_monotonic = self._clock()
+        self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+        return ok
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the last ping, or None if there hasn't been one."""
+        if self._checked_monotonic is None:
+            return None
+        return self._clock() - self._checked_monotonic
+
+    @property
+    def ready(self) -> bool:
+        age = self.age
+        return bool(self.ok) and age is not None and age <= self.stale_after
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The cached state of the last ping."""
+        age = self.age
+        return {
+            "ready": self.ready,
+            "database": "connected" if self.ok else "disconnected",
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "latency_ms": round(self.latency_ms, 3) if self.latency_ms is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "error": self.error,
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    async def start(self):
+        """Run a first check, then keep checking in the background."""
+        await self.stop()
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background checks."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# Global health monitor instance
+health_monitor = HealthMonitor()
@@ -0,0 +1,285 @@
+"""
+Artist influence scores for Musical Brain.
+
+Ranks artists along ``INFLUENCED_BY`` with PageRank, in/out-degree and
+sampled betweenness, computed in-process with NumPy over a graph snapshot
+and written back to the ``Artist`` nodes. ``(a)-[:INFLUENCED_BY]->(b)``
+credits ``b``, so an artist's in-degree is how many artists it influenced.
+Run it as a job with ``python -m musical_brain.influence``.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from datetime import datetime, UTC
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from musical_brain.cache import node_cache
+from musical_brain.config import DatabaseSettings
+from musical_brain.database import db
+from musical_brain.metrics import instrumented
+from musical_brain.services import DEFAULT_BATCH_SIZE, decode_cursor, encode_cursor
+from musical_brain.snapshot import CSR, GraphSnapshot, pack_csr, refresh_graph_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Sort keys for the artist list and the Artist properties they read
+SCORE_FIELDS = {
+    "pagerank": "influence_pagerank",
+    "in_degree": "influence_in_degree",
+    "out_degree": "influence_out_degree",
+    "betweenness": "influence_betweenness",
+}
+
+# BFS sources sampled for approximate betweenness
+DEFAULT_BETWEENNESS_SAMPLES = 64
+
+# Artists and their influences, kept between runs so each job only refreshes
+influence_snapshot = GraphSnapshot(labels=["Artist"], rel_types=["INFLUENCED_BY"])
+
+
+class InfluenceScores(NamedTuple):
+    """Scores per artist; the arrays line up with ``ids``."""
+    ids: List[str]
+    pagerank: np.ndarray
+    in_degree: np.ndarray
+    out_degree: np.ndarray
+    betweenness: np.ndarray
+    iterations: int
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """One ``{id, pagerank, in_degree, out_degree, betweenness}`` dict per artist."""
+        return [
+            {"id": artist_id, "pagerank": pagerank, "in_degree": in_degree,
+             "out_degree": out_degree, "betweenness": betweenness}
+            for artist_id, pagerank, in_degree, out_degree, betweenness in zip(
+                self.ids, self.pagerank.tolist(), self.in_degree.tolist(),
+                self.out_degree.tolist(), self.betweenness.tolist(),
+            )
+        ]
+
+
+def pagerank(
+    sources: np.ndarray,
+    targets: np.ndarray,
+    n: int,
+    damping: float = 0.85,
+    tolerance: float = 1e-10,
+    max_iterations: int = 100,
+) -> Tuple[np.ndarray, int]:
+    """PageRank of ``n`` nodes by power iteration; returns the ranks and iterations run.
+
+    Each iteration is one weighted ``bincount`` over the edge arrays. Rank
+    of nodes without out-edges is spread evenly, so ranks sum to 1.
+    """
+    if n == 0:
+        return np.zeros(0), 0
+    out_degree = np.bincount(sources, minlength=n)
+    dangling = out_degree == 0
+    share = np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)
+    rank = np.full(n, 1.0 / n)
+    for iteration in range(1, max_iterations + 1):
+        spread = np.bincount(targets, weights=(rank * share)[sources], minlength=n)
+        new = damping * (spread + rank[dangling].sum() / n) + (1.0 - damping) / n
+        error = np.abs(new - rank).sum()
+        rank = new
+        if error < n * tolerance:
+            break
+    return rank, iteration
+
+
+def _frontier_edges(csr: CSR, frontier: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Every ``(u, v)`` edge leaving the nodes in ``frontier``."""
+    starts = csr.offsets[frontier]
+    lengths = csr.offsets[frontier + 1] - starts
+    total = int(lengths.sum())
+    shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return np.repeat(frontier, lengths), csr.targets[np.arange(total) + shifts]
+
+
+def betweenness(csr: CSR, samples: int = DEFAULT_BETWEENNESS_SAMPLES, seed: int = 0) -> np.ndarray:
+    """Approximate betweenness centrality from ``samples`` random BFS sources.
+
+    Brandes' algorithm run level by level: a forward pass counts shortest
+    paths over the BFS edges of each level, a backward pass accumulates
+    dependencies. The sum is scaled by ``n / samples`` to estimate the
+    exact, unnormalised score; with ``samples >= n`` it is exact.
+    """
+    n = len(csr.offsets) - 1
+    centrality = np.zeros(n)
+    if n == 0 or samples <= 0:
+        return centrality
+    rng = np.random.default_rng(seed)
+    sources = np.arange(n) if samples >= n else rng.choice(n, size=samples, replace=False)
+    for source in sources.tolist():
+        distance = np.full(n, -1, dtype=np.int32)
+        paths = np.zeros(n)
+        distance[source], paths[source] = 0, 1.0
+        frontier = np.array([source], dtype=np.int32)
+        levels = []
+        depth = 0
+        while len(frontier):
+            u, v = _frontier_edges(csr, frontier)
+            reached = v[distance[v] < 0]
+            distance[reached] = depth + 1
+            on_path = distance[v] == depth + 1
+            u, v = u[on_path], v[on_path]
+            np.add.at(paths, v, paths[u])
+            levels.append((u, v))
+            frontier = np.unique(reached)
+            depth += 1
+        dependency = np.zeros(n)
+        for u, v in reversed(levels):
+            np.add.at(dependency, u, paths[u] / paths[v] * (1.0 + dependency[v]))
+        dependency[source] = 0.0
+        centrality += dependency
+    return centrality * (n / len(sources))
+
+
+def compute_influence(
+    snapshot: GraphSnapshot,
+    rel_type: str = "INFLUENCED_BY",
+    damping: float = 0.85,
+    samples: int = DEFAULT_BETWEENNESS_SAMPLES,
+    seed: int = 0,
+) -> InfluenceScores:
+    """Score every artist of ``snapshot`` along ``rel_type``."""
+    artists = snapshot.nodes_with_label("Artist")
+    n = len(artists)
+    position = np.full(len(snapshot), -1, dtype=np.int32)
+    position[artists] = np.arange(n, dtype=np.int32)
+    sources, targets = snapshot.edges(rel_type)
+    sources, targets = position[sources], position[targets]
+    between_artists = (sources >= 0) & (targets >= 0)
+    sources, targets = sources[between_artists], targets[between_artists]
+
+    ranks, iterations = pagerank(sources, targets, n, damping)
+    return InfluenceScores(
+        ids=[snapshot.ids[i] for i in artists.tolist()],
+        pagerank=ranks,
+        in_degree=np.bincount(targets, minlength=n),
+        out_degree=np.bincount(sources, minlength=n),
+        betweenness=betweenness(pack_csr(sources, targets, n), samples, seed),
+        iterations=iterations,
+    )
+
+
+@instrumented
+async def write_influence_scores(scores: InfluenceScores, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Set the influence properties of the scored artists, committing each batch on its own.
+
+    No transaction spans all artists, so a batch holds locks on at most
+    ``batch_size`` nodes. Until the last batch commits, readers may see a mix
+    of old and new scores; ``influence_computed_at`` tells them apart.
+    Returns the number of artists updated.
+    """
+    query = f"""
+    UNWIND $rows AS row
+    MATCH (a:Artist {{id: row.id}})
+    SET {", ".join(f"a.{field} = row.{key}" for key, field in SCORE_FIELDS.items())},
+        a.influence_computed_at = $now
+    RETURN count(a) AS updated_count
+    """
+    now = datetime.now(UTC).isoformat()
+    rows = scores.rows()
+    updated = 0
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        result = await db.run_write(query, {"rows": batch, "now": now})
+        updated += result[0]["updated_count"] if result else 0
+        for row in batch:
+            node_cache.invalidate("Artist", row["id"])
+    logger.info(f"Wrote influence scores of {updated} artists")
+    return updated
+
+
+async def run_influence_job(
+    damping: float = 0.85,
+    samples: int = DEFAULT_BETWEENNESS_SAMPLES,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Refresh the influence snapshot, score every artist and write the scores back."""
+    started = time.perf_counter()
+    await refresh_graph_snapshot(influence_snapshot)
+    loaded = time.perf_counter()
+    scores = compute_influence(influence_snapshot, damping=damping, samples=samples, seed=seed)
+    computed = time.perf_counter()
+    updated = await write_influence_scores(scores)
+    stats = {
+        "artists": len(scores.ids),
+        "edges": influence_snapshot.edge_count("INFLUENCED_BY"),
+        "updated": updated,
+        "iterations": scores.iterations,
+        "snapshot_ms": round((loaded - started) * 1000, 1),
+        "compute_ms": round((computed - loaded) * 1000, 1),
+        "write_ms": round((time.perf_counter() - computed) * 1000, 1),
+    }
+    logger.info(f"Influence job finished: {stats}")
+    return stats
+
+
+@instrumented
+async def list_artists_by_score(score: str, limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """List artists by an influence score, highest first, paginated like ``list_nodes_page``.
+
+    Artists that haven't been scored yet are left out.
+    """
+    field = SCORE_FIELDS.get(score)
+    if field is None:
+        raise ValueError(f"Unknown sort: {score}; expected one of {', '.join(SCORE_FIELDS)}")
+    params: Dict[str, Any] = {"limit": limit + 1}
+    if cursor:
+        params["value"], params["id"] = decode_cursor(cursor, kind=(int, float))
+        where = f"a.{field} <= $value AND (a.{field} < $value OR a.id < $id)"
+    else:
+        where = f"a.{field} IS NOT NULL"
+
+    query = f"""
+    MATCH (a:Artist)
+    WHERE {where}
+    RETURN a
+    ORDER BY a.{field} DESC, a.id DESC
+    LIMIT $limit
+    """
+
+    result = await db.run_read(query, params)
+    artists = [dict(record["a"]) for record in result]
+    next_cursor = None
+    if len(artists) > limit:
+        artists = artists[:limit]
+        next_cursor = encode_cursor(artists[-1][field], artists[-1]["id"])
+    return {"items": artists, "next_cursor": next_cursor}
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compute artist influence scores and write them to the database.")
+    parser.add_argument("--damping", type=float, default=0.85, help="PageRank damping factor")
+    parser.add_argument("--samples", type=int, default=DEFAULT_BETWEENNESS_SAMPLES,
+                        help="BFS sources for approximate betweenness")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for sampling betweenness sources")
+    parser.add_argument("--uri", help="Database URI (default from MUSICAL_BRAIN_NEO4J_URI)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    settings = DatabaseSettings.from_env()
+    if args.uri:
+        settings = settings.model_copy(update={"uri": args.uri})
+    await db.connect(settings=settings)
+    try:
+        stats = await run_influence_job(args.damping, args.samples, args.seed)
+    finally:
+        await db.disconnect()
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
@@ -0,0 +1,9 @@
+"""
+In-memory graph backend, usable in place of a Neo4j server.
+"""
+
+from musical_brain.inmemory.cypher import CypherError, compile_query
+from musical_brain.inmemory.driver import MemoryDriver
+from musical_brain.inmemory.graph import MemoryGraph
+
+__all__ = ["CypherError", "MemoryDriver", "MemoryGraph", "compile_query"]
@@ -0,0 +1,1916 @@
+"""
+Interpreter for the subset of Cypher that Musical Brain emits.
+
+Queries are tokenised, parsed into clauses and compiled into a pipeline of
+Python closures over rows (dicts of variable bindings). Compiled queries are
+cached by text, much like Neo4j's plan cache. Supported:
+
+- ``MATCH``/``OPTIONAL MATCH`` with node and relationship patterns (including
+  variable length), ``WHERE``, ``UNWIND``, ``WITH`` and ``RETURN`` with
+  ``DISTINCT``, aggregation, ``ORDER BY``, ``SKIP`` and ``LIMIT``
+- ``CREATE``, ``MERGE ... ON CREATE SET ... ON MATCH SET``, ``SET``,
+  ``REMOVE``, ``DELETE`` and ``DETACH DELETE``
+- ``CREATE``/``DROP`` ``CONSTRAINT``/``INDEX`` (hash indexes are added for the
+  named properties; constraints are not enforced)
+"""
+
+import heapq
+import math
+import re
+from datetime import datetime, UTC
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from musical_brain.inmemory.graph import Journal, MemoryGraph, Node, Relationship
+
+Row = Dict[Any, Any]
+Expr = Callable[[Row, "Context"], Any]
+Step = Callable[[Iterator[Row], "Context"], Iterator[Row]]
+
+
+class CypherError(Exception):
+    """Raised for queries outside the supported subset or that fail to run."""
+
+
+class Context:
+    """Per-execution state shared by the compiled closures."""
+
+    __slots__ = ("graph", "params", "journal")
+
+    def __init__(self, graph: MemoryGraph, params: Dict[str, Any], journal: Journal):
+        self.graph = graph
+        self.params = params
+        self.journal = journal
+
+
+# Tokenizer
+
+_TOKEN_RE = re.compile(
+    r"""
+      (?P<ws>\s+|//[^\n]*)
+    | (?P<float>\d+\.\d+(?:[eE][-+]?\d+)?|\d+[eE][-+]?\d+)
+    | (?P<int>\d+)
+    | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    | (?P<param>\$[A-Za-z_][A-Za-z0-9_]*)
+    | (?P<ident>[A-Za-z_][A-Za-z0-9_]*|`[^`]+`)
+    | (?P<op><>|<=|>=|\+=|=~|\.\.|->|<-|[-+*/%^=<>(){}\[\],.:|;])
+    """,
+    re.VERBOSE,
+)
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\", "'": "'", '"': '"'}
+
+
+class Token:
+    __slots__ = ("kind", "value", "start", "end")
+
+    def __init__(self, kind: str, value: Any, start: int, end: int):
+        self.kind = kind
+        self.value = value
+        self.start = start
+        self.end = end
+
+    def is_keyword(self, *words: str) -> bool:
+        return self.kind == "ident" and isinstance(self.value, str) and self.value.upper() in words
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.value!r})"
+
+
+def _tokenize(text: str) -> List[Token]:
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match:
+            raise CypherError(f"Unexpected character {text[pos]!r} at position {pos}")
+        kind = match.lastgroup
+        raw = match.group()
+        if kind == "float":
+            tokens.append(Token("number", float(raw), pos, match.end()))
+        elif kind == "int":
+            tokens.append(Token("number", int(raw), pos, match.end()))
+        elif kind == "string":
+            value = re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), raw[1:-1])
+            tokens.append(Token("string", value, pos, match.end()))
+        elif kind == "param":
+            tokens.append(Token("param", raw[1:], pos, match.end()))
+        elif kind == "ident":
+            if raw.startswith("`"):
+                tokens.append(Token("name", raw[1:-1], pos, match.end()))
+            else:
+                tokens.append(Token("ident", raw, pos, match.end()))
+        elif kind == "op":
+            tokens.append(Token("op", raw, pos, match.end()))
+        pos = match.end()
+    tokens.append(Token("eof", None, len(text), len(text)))
+    return tokens
+
+
+# AST
+
+class Ast:
+    """Base class for expression syntax nodes."""
+
+    __slots__ = ()
+
+
+class Literal(Ast):
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class Param(Ast):
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Var(Ast):
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class Prop(Ast):
+    __slots__ = ("subject", "key")
+
+    def __init__(self, subject, key):
+        self.subject = subject
+        self.key = key
+
+
+class Index(Ast):
+    __slots__ = ("subject", "index")
+
+    def __init__(self, subject, index):
+        self.subject = subject
+        self.index = index
+
+
+class MapLit(Ast):
+    __slots__ = ("items",)
+
+    def __init__(self, items):
+        self.items = items
+
+
+class ListLit(Ast):
+    __slots__ = ("items",)
+
+    def __init__(self, items):
+        self.items = items
+
+
+class ListComp(Ast):
+    __slots__ = ("var", "source", "where", "project")
+
+    def __init__(self, var, source, where, project):
+        self.var = var
+        self.source = source
+        self.where = where
+        self.project = project
+
+
+class Call(Ast):
+    __slots__ = ("name", "args", "distinct", "star")
+
+    def __init__(self, name, args, distinct=False, star=False):
+        self.name = name
+        self.args = args
+        self.distinct = distinct
+        self.star = star
+
+
+class Op(Ast):
+    __slots__ = ("op", "args")
+
+    def __init__(self, op, args):
+        self.op = op
+        self.args = args
+
+
+class Case(Ast):
+    __slots__ = ("subject", "whens", "default")
+
+    def __init__(self, subject, whens, default):
+        self.subject = subject
+        self.whens = whens
+        self.default = default
+
+
+class NodePattern:
+    def __init__(self, var, labels, props):
+        self.var = var
+        self.labels = labels
+        self.props = props
+
+
+class RelPattern:
+    def __init__(self, var, types, props, direction, length):
+        self.var = var
+        self.types = types
+        self.props = props
+        self.direction = direction
+        self.length = length  # None for a single hop, else (min, max or None)
+
+
+class PathPattern:
+    def __init__(self, nodes, rels):
+        self.nodes = nodes
+        self.rels = rels
+
+
+class ProjectionItem:
+    def __init__(self, expr, alias):
+        self.expr = expr
+        self.alias = alias
+
+
+AGGREGATES = {"count", "collect", "sum", "avg", "min", "max"}
+
+
+# Parser
+
+class Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.anon = 0
+
+    # Token helpers
+
+    @property
+    def tok(self) -> Token:
+        return self.tokens[self.pos]
+
+    def peek(self, offset: int = 1) -> Token:
+        return self.tokens[min(self.pos + offset, len(self.tokens) - 1)]
+
+    def advance(self) -> Token:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def at_op(self, *ops: str) -> bool:
+        return self.tok.kind == "op" and self.tok.value in ops
+
+    def accept_op(self, *ops: str) -> Optional[str]:
+        if self.at_op(*ops):
+            return self.advance().value
+        return None
+
+    def expect_op(self, op: str):
+        if not self.accept_op(op):
+            self.error(f"Expected '{op}'")
+
+    def at_kw(self, *words: str) -> bool:
+        return self.tok.is_keyword(*words)
+
+    def accept_kw(self, *words: str) -> bool:
+        if self.at_kw(*words):
+            self.advance()
+            return True
+        return False
+
+    def expect_kw(self, *words: str):
+        for word in words:
+            if not self.accept_kw(word):
+                self.error(f"Expected {word}")
+
+    def name(self) -> str:
+        if self.tok.kind in ("ident", "name"):
+            return self.advance().value
+        self.error("Expected a name")
+
+    def error(self, message: str):
+        raise CypherError(f"{message} at position {self.tok.start} near {self.text[self.tok.start:self.tok.start + 20]!r}")
+
+    def hidden_name(self, prefix: str) -> str:
+        self.anon += 1
+        return f"  {prefix}{self.anon}"
+
+    # Clauses
+
+    def parse(self) -> List[tuple]:
+        clauses = []
+        while self.tok.kind != "eof":
+            if self.accept_op(";"):
+                continue
+            clauses.append(self.clause())
+        if not clauses:
+            self.error("Empty query")
+        return clauses
+
+    def clause(self) -> tuple:
+        if self.accept_kw("OPTIONAL"):
+            self.expect_kw("MATCH")
+            return self.match(optional=True)
+        if self.accept_kw("MATCH"):
+            return self.match(optional=False)
+        if self.accept_kw("UNWIND"):
+            expr = self.expr()
+            self.expect_kw("AS")
+            return ("unwind", expr, self.name())
+        if self.at_kw("CREATE", "DROP") and self.peek().is_keyword("CONSTRAINT", "INDEX"):
+            return self.schema()
+        if self.accept_kw("CREATE"):
+            return ("create", self.patterns())
+        if self.accept_kw("MERGE"):
+            pattern = self.path()
+            on_create, on_match = [], []
+            while self.accept_kw("ON"):
+                if self.accept_kw("CREATE"):
+                    self.expect_kw("SET")
+                    on_create.extend(self.set_items())
+                else:
+                    self.expect_kw("MATCH")
+                    self.expect_kw("SET")
+                    on_match.extend(self.set_items())
+            return ("merge", pattern, on_create, on_match)
+        if self.accept_kw("SET"):
+            return ("set", self.set_items())
+        if self.accept_kw("REMOVE"):
+            return ("remove", self.remove_items())
+        if self.at_kw("DETACH", "DELETE"):
+            detach = self.accept_kw("DETACH")
+            self.expect_kw("DELETE")
+            exprs = [self.expr()]
+            while self.accept_op(","):
+                exprs.append(self.expr())
+            return ("delete", exprs, detach)
+        if self.accept_kw("WITH"):
+            return ("with",) + self.projection(allow_where=True)
+        if self.accept_kw("RETURN"):
+            return ("return",) + self.projection(allow_where=False)
+        self.error("Unsupported clause")
+
+    def schema(self) -> tuple:
+        # Only the indexed properties matter here: (v.a) or (v.a, v.b)
+        start = self.pos
+        props = []
+        while self.tok.kind != "eof" and not self.at_op(";"):
+            if self.tok.kind in ("ident", "name") and self.peek().kind == "op" and self.peek().value == "." \
+                    and self.peek(2).kind in ("ident", "name"):
+                self.advance()
+                self.advance()
+                props.append(self.advance().value)
+            else:
+                self.advance()
+        is_drop = self.tokens[start].is_keyword("DROP")
+        return ("schema", [] if is_drop else props)
+
+    def match(self, optional: bool) -> tuple:
+        patterns = self.patterns()
+        where = self.expr() if self.accept_kw("WHERE") else None
+        return ("match", patterns, where, optional)
+
+    def patterns(self) -> List[PathPattern]:
+        patterns = [self.path()]
+        while self.accept_op(","):
+            patterns.append(self.path())
+        return patterns
+
+    def path(self) -> PathPattern:
+        if self.tok.kind in ("ident", "name") and self.peek().kind == "op" and self.peek().value == "=":
+            self.error("Named paths are not supported")
+        nodes = [self.node_pattern()]
+        rels = []
+        while self.at_op("-", "<-"):
+            rels.append(self.rel_pattern())
+            nodes.append(self.node_pattern())
+        return PathPattern(nodes, rels)
+
+    def node_pattern(self) -> NodePattern:
+        self.expect_op("(")
+        var = None
+        if self.tok.kind in ("ident", "name"):
+            var = self.advance().value
+        labels = []
+        while self.accept_op(":"):
+            labels.append(self.name())
+        props = None
+        if self.at_op("{"):
+            props = self.map_literal()
+        elif self.tok.kind == "param":
+            props = Param(self.advance().value)
+        self.expect_op(")")
+        return NodePattern(var or self.hidden_name("n"), labels, props)
+
+    def rel_pattern(self) -> RelPattern:
+        left = self.advance().value  # '-' or '<-'
+        var, types, props, length = None, [], None, None
+        if self.accept_op("["):
+            if self.tok.kind in ("ident", "name"):
+                var = self.advance().value
+            if self.accept_op(":"):
+                types.append(self.name())
+                while self.accept_op("|"):
+                    self.accept_op(":")
+                    types.append(self.name())
+            if self.accept_op("*"):
+                low, high = 1, None
+                if self.tok.kind == "number":
+                    low = high = self.advance().value
+                if self.accept_op(".."):
+                    high = self.advance().value if self.tok.kind == "number" else None
+                elif self.tokens[self.pos - 1].kind != "number":
+                    low, high = 1, None
+                length = (low, high)
+            if self.at_op("{"):
+                props = self.map_literal()
+            elif self.tok.kind == "param":
+                props = Param(self.advance().value)
+            self.expect_op("]")
+        right = self.accept_op("->", "-")
+        if right is None:
+            self.error("Expected '-' or '->'")
+        if left == "<-" and right == "->":
+            self.error("Relationship can't point both ways")
+        direction = "in" if left == "<-" else "out" if right == "->" else "both"
+        return RelPattern(var or self.hidden_name("r"), types, props, direction, length)
+
+    def set_items(self) -> List[tuple]:
+        items = [self.set_item()]
+        while self.accept_op(","):
+            items.append(self.set_item())
+        return items
+
+    def set_item(self) -> tuple:
+        var = self.name()
+        if self.accept_op("."):
+            key = self.name()
+            self.expect_op("=")
+            return ("prop", var, key, self.expr())
+        if self.accept_op("="):
+            return ("replace", var, self.expr())
+        if self.accept_op("+="):
+            return ("merge", var, self.expr())
+        if self.at_op(":"):
+            labels = []
+            while self.accept_op(":"):
+                labels.append(self.name())
+            return ("labels", var, labels)
+        self.error("Unsupported SET item")
+
+    def remove_items(self) -> List[tuple]:
+        items = []
+        while True:
+            var = self.name()
+            if self.accept_op("."):
+                items.append(("prop", var, self.name(), Literal(None)))
+            else:
+                labels = []
+                while self.accept_op(":"):
+                    labels.append(self.name())
+                if not labels:
+                    self.error("Unsupported REMOVE item")
+                items.append(("remove_labels", var, labels))
+            if not self.accept_op(","):
+                return items
+
+    def projection(self, allow_where: bool) -> tuple:
+        distinct = self.accept_kw("DISTINCT")
+        items = []
+        star = False
+        if self.accept_op("*"):
+            star = True
+            if not self.accept_op(","):
+                return self.projection_tail(distinct, star, items, allow_where)
+        while True:
+            start = self.tok.start
+            expr = self.expr()
+            raw = self.text[start:self.tokens[self.pos - 1].end]
+            alias = self.name() if self.accept_kw("AS") else raw
+            items.append(ProjectionItem(expr, alias))
+            if not self.accept_op(","):
+                break
+        return self.projection_tail(distinct, star, items, allow_where)
+
+    def projection_tail(self, distinct, star, items, allow_where) -> tuple:
+        order = []
+        if self.accept_kw("ORDER"):
+            self.expect_kw("BY")
+            while True:
+                expr = self.expr()
+                descending = False
+                if self.accept_kw("DESC", "DESCENDING"):
+                    descending = True
+                else:
+                    self.accept_kw("ASC", "ASCENDING")
+                order.append((expr, descending))
+                if not self.accept_op(","):
+                    break
+        skip = self.expr() if self.accept_kw("SKIP") else None
+        limit = self.expr() if self.accept_kw("LIMIT") else None
+        where = self.expr() if allow_where and self.accept_kw("WHERE") else None
+        return (distinct, star, items, order, skip, limit, where)
+
+    # Expressions
+
+    def expr(self) -> Ast:
+        left = self.xor_expr()
+        while self.accept_kw("OR"):
+            left = Op("or", [left, self.xor_expr()])
+        return left
+
+    def xor_expr(self) -> Ast:
+        left = self.and_expr()
+        while self.accept_kw("XOR"):
+            left = Op("xor", [left, self.and_expr()])
+        return left
+
+    def and_expr(self) -> Ast:
+        left = self.not_expr()
+        while self.accept_kw("AND"):
+            left = Op("and", [left, self.not_expr()])
+        return left
+
+    def not_expr(self) -> Ast:
+        if self.accept_kw("NOT"):
+            return Op("not", [self.not_expr()])
+        return self.comparison()
+
+    def comparison(self) -> Ast:
+        left = self.additive()
+        while True:
+            op = self.accept_op("=", "<>", "<", ">", "<=", ">=", "=~")
+            if op:
+                left = Op(op, [left, self.additive()])
+            elif self.accept_kw("IS"):
+                negate = self.accept_kw("NOT")
+                self.expect_kw("NULL")
+                left = Op("is not null" if negate else "is null", [left])
+            elif self.accept_kw("IN"):
+                left = Op("in", [left, self.additive()])
+            elif self.accept_kw("CONTAINS"):
+                left = Op("contains", [left, self.additive()])
+            elif self.at_kw("STARTS") and self.peek().is_keyword("WITH"):
+                self.advance()
+                self.advance()
+                left = Op("starts with", [left, self.additive()])
+            elif self.at_kw("ENDS") and self.peek().is_keyword("WITH"):
+                self.advance()
+                self.advance()
+                left = Op("ends with", [left, self.additive()])
+            else:
+                return left
+
+    def additive(self) -> Ast:
+        left = self.multiplicative()
+        while True:
+            op = self.accept_op("+", "-")
+            if not op:
+                return left
+            left = Op(op, [left, self.multiplicative()])
+
+    def multiplicative(self) -> Ast:
+        left = self.power()
+        while True:
+            op = self.accept_op("*", "/", "%")
+            if not op:
+                return left
+            left = Op(op, [left, self.power()])
+
+    def power(self) -> Ast:
+        left = self.unary()
+        if self.accept_op("^"):
+            return Op("^", [left, self.power()])
+        return left
+
+    def unary(self) -> Ast:
+        if self.accept_op("-"):
+            return Op("neg", [self.unary()])
+        if self.accept_op("+"):
+            return self.unary()
+        return self.postfix()
+
+    def postfix(self) -> Ast:
+        expr = self.atom()
+        while True:
+            if self.at_op(".") and self.peek().kind in ("ident", "name"):
+                self.advance()
+                expr = Prop(expr, self.advance().value)
+            elif self.accept_op("["):
+                expr = Index(expr, self.expr())
+                self.expect_op("]")
+            else:
+                return expr
+
+    def atom(self) -> Ast:
+        tok = self.tok
+        if tok.kind in ("number", "string"):
+            self.advance()
+            return Literal(tok.value)
+        if tok.kind == "param":
+            self.advance()
+            return Param(tok.value)
+        if self.accept_op("("):
+            expr = self.expr()
+            self.expect_op(")")
+            return expr
+        if self.at_op("{"):
+            return self.map_literal()
+        if self.accept_op("["):
+            return self.list_literal()
+        if tok.kind == "name":
+            self.advance()
+            return Var(tok.value)
+        if tok.kind != "ident":
+            self.error("Unexpected token")
+        if tok.is_keyword("TRUE"):
+            self.advance()
+            return Literal(True)
+        if tok.is_keyword("FALSE"):
+            self.advance()
+            return Literal(False)
+        if tok.is_keyword("NULL"):
+            self.advance()
+            return Literal(None)
+        if tok.is_keyword("CASE"):
+            self.advance()
+            return self.case()
+        self.advance()
+        if self.accept_op("("):
+            name = tok.value.lower()
+            if self.accept_op("*"):
+                self.expect_op(")")
+                return Call(name, [], star=True)
+            distinct = self.accept_kw("DISTINCT")
+            args = []
+            if not self.at_op(")"):
+                args.append(self.expr())
+                while self.accept_op(","):
+                    args.append(self.expr())
+            self.expect_op(")")
+            return Call(name, args, distinct=distinct)
+        return Var(tok.value)
+
+    def case(self) -> Ast:
+        subject = None if self.at_kw("WHEN") else self.expr()
+        whens = []
+        while self.accept_kw("WHEN"):
+            condition = self.expr()
+            self.expect_kw("THEN")
+            whens.append((condition, self.expr()))
+        default = self.expr() if self.accept_kw("ELSE") else None
+        self.expect_kw("END")
+        return Case(subject, whens, default)
+
+    def map_literal(self) -> MapLit:
+        self.expect_op("{")
+        items = []
+        if not self.at_op("}"):
+            while True:
+                key = self.name() if self.tok.kind in ("ident", "name") else self.advance().value
+                self.expect_op(":")
+                items.append((key, self.expr()))
+                if not self.accept_op(","):
+                    break
+        self.expect_op("}")
+        return MapLit(items)
+
+    def list_literal(self) -> Ast:
+        # '[' already consumed
+        if self.tok.kind in ("ident", "name") and self.peek().is_keyword("IN"):
+            var = self.advance().value
+            self.advance()
+            source = self.expr()
+            where = self.expr() if self.accept_kw("WHERE") else None
+            project = self.expr() if self.accept_op("|") else None
+            self.expect_op("]")
+            return ListComp(var, source, where, project)
+        items = []
+        if not self.at_op("]"):
+            items.append(self.expr())
+            while self.accept_op(","):
+                items.append(self.expr())
+        self.expect_op("]")
+        return ListLit(items)
+
+
+# Value semantics
+
+def _type_rank(value: Any) -> int:
+    if isinstance(value, dict):
+        return 0
+    if isinstance(value, Node):
+        return 1
+    if isinstance(value, Relationship):
+        return 2
+    if isinstance(value, list):
+        return 3
+    if isinstance(value, str):
+        return 5
+    if isinstance(value, bool):
+        return 6
+    if isinstance(value, (int, float)):
+        return 7
+    return 8
+
+
+def _order_key(value: Any) -> tuple:
+    """Sort key ordering values like Cypher's ORDER BY: by type, then value, nulls last."""
+    if value is None:
+        return (1,)
+    if isinstance(value, (Node, Relationship)):
+        return (0, _type_rank(value), value.element_id)
+    if isinstance(value, dict):
+        return (0, 0)
+    if isinstance(value, list):
+        return (0, 3, tuple(_order_key(item) for item in value))
+    if isinstance(value, float) and math.isnan(value):
+        return (0, 7, math.inf, 1)
+    return (0, _type_rank(value), value)
+
+
+def _sort_rows(pairs: Iterable[Tuple[Row, Row]], keys: List[Tuple[Expr, bool]], ctx: "Context",
+               top: Optional[int]) -> List[Tuple[Row, Row]]:
+    """Order (projected, scope) pairs by ORDER BY keys, keeping the first ``top``.
+
+    Keys are precomputed tuples so comparisons run in C. A single direction
+    sorts once (a heap selection when ``top`` is set); mixed directions use
+    one stable sort per key, last key first.
+    """
+    directions = {descending for _, descending in keys}
+    if len(directions) == 1:
+        descending = directions.pop()
+
+        def key(pair):
+            return tuple(_order_key(fn(pair[1], ctx)) for fn, _ in keys)
+        if top is not None:
+            select = heapq.nlargest if descending else heapq.nsmallest
+            return select(top, pairs, key=key)
+        return sorted(pairs, key=key, reverse=descending)
+    ordered = list(pairs)
+    for fn, descending in reversed(keys):
+        ordered.sort(key=lambda pair: _order_key(fn(pair[1], ctx)), reverse=descending)
+    return ordered if top is None else ordered[:top]
+
+
+def _compare_for_order(a: Any, b: Any) -> int:
+    if a is None or b is None:
+        if a is None and b is None:
+            return 0
+        return 1 if a is None else -1
+    ra, rb = _type_rank(a), _type_rank(b)
+    if ra != rb:
+        return -1 if ra < rb else 1
+    if isinstance(a, (Node, Relationship)):
+        a, b = a.element_id, b.element_id
+    elif isinstance(a, dict):
+        return 0
+    elif isinstance(a, list):
+        for x, y in zip(a, b):
+            c = _compare_for_order(x, y)
+            if c:
+                return c
+        return (len(a) > len(b)) - (len(a) < len(b))
+    if isinstance(a, float) and math.isnan(a):
+        return 0 if isinstance(b, float) and math.isnan(b) else 1
+    return (a > b) - (a < b)
+
+
+def _equals(a: Any, b: Any) -> Optional[bool]:
+    if a is None or b is None:
+        return None
+    if isinstance(a, bool) != isinstance(b, bool):
+        return False
+    if isinstance(a, list) and isinstance(b, list):
+        if len(a) != len(b):
+            return False
+        result = True
+        for x, y in zip(a, b):
+            eq = _equals(x, y)
+            if eq is False:
+                return False
+            if eq is None:
+                result = None
+        return result
+    return a == b
+
+
+def _ordered(op: str, a: Any, b: Any) -> Optional[bool]:
+    if a is None or b is None:
+        return None
+    numeric = (int, float)
+    if isinstance(a, bool) or isinstance(b, bool):
+        if not (isinstance(a, bool) and isinstance(b, bool)):
+            return None
+    elif isinstance(a, numeric) != isinstance(b, numeric):
+        return None
+    elif not isinstance(a, numeric) and type(a) is not type(b):
+        return None
+    try:
+        if op == "<":
+            return a < b
+        if op == ">":
+            return a > b
+        if op == "<=":
+            return a <= b
+        return a >= b
+    except TypeError:
+        return None
+
+
+def _add(a: Any, b: Any) -> Any:
+    if a is None or b is None:
+        return None
+    if isinstance(a, list):
+        return a + (b if isinstance(b, list) else [b])
+    if isinstance(b, list):
+        return [a] + b
+    if isinstance(a, str) or isinstance(b, str):
+        return f"{_to_string(a)}{_to_string(b)}"
+    return a + b
+
+
+def _divide(a: Any, b: Any) -> Any:
+    if a is None or b is None:
+        return None
+    if isinstance(a, int) and isinstance(b, int):
+        if b == 0:
+            raise CypherError("/ by zero")
+        quotient = abs(a) // abs(b)
+        return quotient if (a >= 0) == (b >= 0) else -quotient
+    return a / b if b else (math.copysign(math.inf, a) if a else math.nan)
+
+
+def _modulo(a: Any, b: Any) -> Any:
+    if a is None or b is None:
+        return None
+    if isinstance(a, int) and isinstance(b, int):
+        if b == 0:
+            raise CypherError("/ by zero")
+        return int(math.fmod(a, b))
+    return math.fmod(a, b)
+
+
+def _to_string(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _to_integer(value: Any) -> Optional[int]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return int(float(value)) if isinstance(value, str) else int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _properties(value: Any) -> Optional[Dict[str, Any]]:
+    if value is None:
+        return None
+    if isinstance(value, (Node, Relationship)):
+        return dict(value.properties)
+    if isinstance(value, dict):
+        return dict(value)
+    raise CypherError(f"properties() expects a node, relationship or map, got {type(value).__name__}")
+
+
+def _size(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    if isinstance(value, (list, str)):
+        return len(value)
+    raise CypherError(f"size() expects a list or string, got {type(value).__name__}")
+
+
+def _range(start, end, step=1):
+    if step == 0:
+        raise CypherError("range() step must not be zero")
+    return list(range(start, end + (1 if step > 0 else -1), step))
+
+
+def _null_safe(fn: Callable[..., Any]) -> Callable[..., Any]:
+    def wrapper(*args):
+        if args and args[0] is None:
+            return None
+        return fn(*args)
+    return wrapper
+
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "coalesce": lambda *args: next((arg for arg in args if arg is not None), None),
+    "properties": _properties,
+    "keys": _null_safe(lambda v: list(_properties(v).keys())),
+    "labels": _null_safe(lambda n: sorted(n.labels)),
+    "type": _null_safe(lambda r: r.type),
+    "id": _null_safe(lambda e: e.element_id),
+    "elementid": _null_safe(lambda e: str(e.element_id)),
+    "startnode": _null_safe(lambda r: r.start),
+    "endnode": _null_safe(lambda r: r.end),
+    "tolower": _null_safe(lambda s: s.lower()),
+    "toupper": _null_safe(lambda s: s.upper()),
+    "trim": _null_safe(lambda s: s.strip()),
+    "tostring": _to_string,
+    "tointeger": _to_integer,
+    "tofloat": _to_float,
+    "size": _size,
+    "head": _null_safe(lambda xs: xs[0] if xs else None),
+    "last": _null_safe(lambda xs: xs[-1] if xs else None),
+    "range": _range,
+    "abs": _null_safe(abs),
+    "round": _null_safe(lambda x: float(math.floor(x + 0.5))),
+    "floor": _null_safe(lambda x: float(math.floor(x))),
+    "ceil": _null_safe(lambda x: float(math.ceil(x))),
+    "sqrt": _null_safe(math.sqrt),
+    "split": _null_safe(lambda s, sep: s.split(sep)),
+    "replace": _null_safe(lambda s, old, new: s.replace(old, new)),
+    "datetime": lambda value=None: datetime.now(UTC).isoformat() if value is None else value,
+    "timestamp": lambda: int(datetime.now(UTC).timestamp() * 1000),
+}
+
+
+def _hashable(value: Any) -> Any:
+    """Turn a value into something usable as a dict key (for DISTINCT/grouping)."""
+    if isinstance(value, list):
+        return ("\0list", tuple(_hashable(v) for v in value))
+    if isinstance(value, dict):
+        return ("\0map", tuple(sorted((k, _hashable(v)) for k, v in value.items())))
+    if isinstance(value, bool):
+        return ("\0bool", value)
+    return value
+
+
+# Expression compiler
+
+def _contains_aggregate(ast: Any) -> bool:
+    if isinstance(ast, Call):
+        if ast.name in AGGREGATES:
+            return True
+        return any(_contains_aggregate(arg) for arg in ast.args)
+    if isinstance(ast, Op):
+        return any(_contains_aggregate(arg) for arg in ast.args)
+    if isinstance(ast, (Prop,)):
+        return _contains_aggregate(ast.subject)
+    if isinstance(ast, Index):
+        return _contains_aggregate(ast.subject) or _contains_aggregate(ast.index)
+    if isinstance(ast, MapLit):
+        return any(_contains_aggregate(v) for _, v in ast.items)
+    if isinstance(ast, ListLit):
+        return any(_contains_aggregate(v) for v in ast.items)
+    if isinstance(ast, Case):
+        parts = [ast.subject, ast.default] + [x for pair in ast.whens for x in pair]
+        return any(_contains_aggregate(p) for p in parts if p is not None)
+    return False
+
+
+class _AggregateSlot:
+    """Key under which an aggregate's result is stored in the grouped row."""
+
+    __slots__ = ("index",)
+
+    def __init__(self, index: int):
+        self.index = index
+
+    def __hash__(self):
+        return hash(("\0agg", self.index))
+
+    def __eq__(self, other):
+        return isinstance(other, _AggregateSlot) and other.index == self.index
+
+
+def compile_expr(ast: Ast, aggregates: Optional[List[Call]] = None) -> Expr:
+    """Compile an expression AST into a closure ``f(row, ctx)``.
+
+    When ``aggregates`` is given, aggregate calls are collected into it and
+    compiled as lookups of their result in the grouped row.
+    """
+    if isinstance(ast, Literal):
+        value = ast.value
+        return lambda row, ctx: value
+    if isinstance(ast, Param):
+        name = ast.name
+
+        def param(row, ctx):
+            try:
+                return ctx.params[name]
+            except KeyError:
+                raise CypherError(f"Expected parameter(s): {name}") from None
+        return param
+    if isinstance(ast, Var):
+        name = ast.name
+
+        def var(row, ctx):
+            try:
+                return row[name]
+            except KeyError:
+                raise CypherError(f"Variable `{name}` not defined") from None
+        return var
+    if isinstance(ast, Prop):
+        subject = compile_expr(ast.subject, aggregates)
+        key = ast.key
+
+        def prop(row, ctx):
+            value = subject(row, ctx)
+            if value is None:
+                return None
+            if isinstance(value, (Node, Relationship)):
+                return value.properties.get(key)
+            if isinstance(value, dict):
+                return value.get(key)
+            raise CypherError(f"Type mismatch: expected a map, node or relationship but was {type(value).__name__}")
+        return prop
+    if isinstance(ast, Index):
+        subject = compile_expr(ast.subject, aggregates)
+        index = compile_expr(ast.index, aggregates)
+
+        def index_fn(row, ctx):
+            value, key = subject(row, ctx), index(row, ctx)
+            if value is None or key is None:
+                return None
+            if isinstance(value, (Node, Relationship)):
+                return value.properties.get(key)
+            if isinstance(value, dict):
+                return value.get(key)
+            try:
+                return value[key]
+            except IndexError:
+                return None
+        return index_fn
+    if isinstance(ast, MapLit):
+        items = [(key, compile_expr(value, aggregates)) for key, value in ast.items]
+        return lambda row, ctx: {key: fn(row, ctx) for key, fn in items}
+    if isinstance(ast, ListLit):
+        items = [compile_expr(item, aggregates) for item in ast.items]
+        return lambda row, ctx: [fn(row, ctx) for fn in items]
+    if isinstance(ast, ListComp):
+        source = compile_expr(ast.source, aggregates)
+        where = compile_expr(ast.where) if ast.where else None
+        project = compile_expr(ast.project) if ast.project else None
+        name = ast.var
+
+        def comprehension(row, ctx):
+            values = source(row, ctx)
+            if values is None:
+                return None
+            out = []
+            for value in values:
+                scope = {**row, name: value}
+                if where is None or where(scope, ctx) is True:
+                    out.append(project(scope, ctx) if project else value)
+            return out
+        return comprehension
+    if isinstance(ast, Case):
+        return _compile_case(ast, aggregates)
+    if isinstance(ast, Call):
+        if ast.name in AGGREGATES:
+            if aggregates is None:
+                raise CypherError(f"Aggregation function {ast.name}() is not allowed here")
+            slot = _AggregateSlot(len(aggregates))
+            aggregates.append(ast)
+            return lambda row, ctx: row[slot]
+        fn = FUNCTIONS.get(ast.name)
+        if fn is None:
+            raise CypherError(f"Unknown function '{ast.name}'")
+        args = [compile_expr(arg, aggregates) for arg in ast.args]
+        return lambda row, ctx: fn(*[arg(row, ctx) for arg in args])
+    if isinstance(ast, Op):
+        return _compile_op(ast, aggregates)
+    raise CypherError(f"Unsupported expression {type(ast).__name__}")
+
+
+def _compile_case(ast: Case, aggregates) -> Expr:
+    subject = compile_expr(ast.subject, aggregates) if ast.subject else None
+    whens = [(compile_expr(c, aggregates), compile_expr(v, aggregates)) for c, v in ast.whens]
+    default = compile_expr(ast.default, aggregates) if ast.default else (lambda row, ctx: None)
+
+    def case(row, ctx):
+        if subject is not None:
+            value = subject(row, ctx)
+            for candidate, result in whens:
+                if _equals(value, candidate(row, ctx)) is True:
+                    return result(row, ctx)
+        else:
+            for condition, result in whens:
+                if condition(row, ctx) is True:
+                    return result(row, ctx)
+        return default(row, ctx)
+    return case
+
+
+def _compile_op(ast: Op, aggregates) -> Expr:
+    args = [compile_expr(arg, aggregates) for arg in ast.args]
+    op = ast.op
+    if op == "and":
+        a, b = args
+
+        def and_fn(row, ctx):
+            left = a(row, ctx)
+            if left is False:
+                return False
+            right = b(row, ctx)
+            if right is False:
+                return False
+            return None if left is None or right is None else True
+        return and_fn
+    if op == "or":
+        a, b = args
+
+        def or_fn(row, ctx):
+            left = a(row, ctx)
+            if left is True:
+                return True
+            right = b(row, ctx)
+            if right is True:
+                return True
+            return None if left is None or right is None else False
+        return or_fn
+    if op == "xor":
+        a, b = args
+
+        def xor_fn(row, ctx):
+            left, right = a(row, ctx), b(row, ctx)
+            return None if left is None or right is None else left != right
+        return xor_fn
+    if op == "not":
+        (a,) = args
+
+        def not_fn(row, ctx):
+            value = a(row, ctx)
+            return None if value is None else not value
+        return not_fn
+    if op == "is null":
+        (a,) = args
+        return lambda row, ctx: a(row, ctx) is None
+    if op == "is not null":
+        (a,) = args
+        return lambda row, ctx: a(row, ctx) is not None
+    if op == "neg":
+        (a,) = args
+
+        def neg(row, ctx):
+            value = a(row, ctx)
+            return None if value is None else -value
+        return neg
+    a, b = args
+    if op == "=":
+        return lambda row, ctx: _equals(a(row, ctx), b(row, ctx))
+    if op == "<>":
+        def not_equal(row, ctx):
+            eq = _equals(a(row, ctx), b(row, ctx))
+            return None if eq is None else not eq
+        return not_equal
+    if op in ("<", ">", "<=", ">="):
+        return lambda row, ctx: _ordered(op, a(row, ctx), b(row, ctx))
+    if op == "in":
+        def in_fn(row, ctx):
+            value, values = a(row, ctx), b(row, ctx)
+            if values is None:
+                return None
+            saw_null = False
+            for candidate in values:
+                eq = _equals(value, candidate)
+                if eq is True:
+                    return True
+                if eq is None:
+                    saw_null = True
+            return None if saw_null else False
+        return in_fn
+    if op in ("contains", "starts with", "ends with", "=~"):
+        def string_op(row, ctx):
+            left, right = a(row, ctx), b(row, ctx)
+            if not isinstance(left, str) or not isinstance(right, str):
+                return None
+            if op == "contains":
+                return right in left
+            if op == "starts with":
+                return left.startswith(right)
+            if op == "ends with":
+                return left.endswith(right)
+            return re.fullmatch(right, left) is not None
+        return string_op
+    if op == "+":
+        return lambda row, ctx: _add(a(row, ctx), b(row, ctx))
+    if op == "/":
+        return lambda row, ctx: _divide(a(row, ctx), b(row, ctx))
+    if op == "%":
+        return lambda row, ctx: _modulo(a(row, ctx), b(row, ctx))
+    arithmetic = {
+        "-": lambda x, y: x - y,
+        "*": lambda x, y: x * y,
+        "^": lambda x, y: float(x) ** y,
+    }[op]
+
+    def arithmetic_fn(row, ctx):
+        left, right = a(row, ctx), b(row, ctx)
+        if left is None or right is None:
+            return None
+        return arithmetic(left, right)
+    return arithmetic_fn
+
+
+# Pattern matching
+
+def _conjuncts(ast: Optional[Ast]) -> List[Ast]:
+    if ast is None:
+        return []
+    if isinstance(ast, Op) and ast.op == "and":
+        return _conjuncts(ast.args[0]) + _conjuncts(ast.args[1])
+    return [ast]
+
+
+def _seek_predicates(where: Optional[Ast], var: str) -> List[Tuple[str, Ast, bool]]:
+    """``var.prop = expr`` and ``var.prop IN expr`` conjuncts usable for an index seek."""
+    seeks = []
+    for conjunct in _conjuncts(where):
+        if not isinstance(conjunct, Op) or conjunct.op not in ("=", "in"):
+            continue
+        left, right = conjunct.args
+        if conjunct.op == "=" and isinstance(right, Prop) and not isinstance(left, Prop):
+            left, right = right, left
+        if isinstance(left, Prop) and isinstance(left.subject, Var) and left.subject.name == var \
+                and not _references(right, var):
+            seeks.append((left.key, right, conjunct.op == "in"))
+    return seeks
+
+
+def _references(ast: Any, var: str) -> bool:
+    if isinstance(ast, Var):
+        return ast.name == var
+    if isinstance(ast, Ast):
+        for slot in ast.__slots__:
+            value = getattr(ast, slot)
+            children = value if isinstance(value, list) else [value]
+            for child in children:
+                if isinstance(child, tuple):
+                    if any(_references(c, var) for c in child):
+                        return True
+                elif _references(child, var):
+                    return True
+    return False
+
+
+class _NodeMatcher:
+    """Compiled constraints of a node pattern."""
+
+    def __init__(self, pattern: NodePattern, bound: bool, seeks: List[Tuple[str, Ast, bool]]):
+        self.var = pattern.var
+        self.labels = pattern.labels
+        self.bound = bound
+        self.props = compile_expr(pattern.props) if pattern.props is not None else None
+        self.seeks = [(key, compile_expr(expr), is_in) for key, expr, is_in in seeks]
+
+    def score(self) -> int:
+        if self.bound:
+            return 3
+        if self.props is not None or self.seeks:
+            return 2
+        return 1 if self.labels else 0
+
+    def accepts(self, node: Any, props: Optional[Dict[str, Any]]) -> bool:
+        if not isinstance(node, Node) or node.deleted:
+            return False
+        for label in self.labels:
+            if label not in node.labels:
+                return False
+        if props:
+            for key, value in props.items():
+                if _equals(node.properties.get(key), value) is not True:
+                    return False
+        return True
+
+    def candidates(self, row: Row, ctx: Context) -> Iterable[Node]:
+        props = self.props(row, ctx) if self.props else None
+        if self.bound:
+            node = row.get(self.var)
+            return [node] if self.accepts(node, props) else []
+        graph = ctx.graph
+        found = None
+        if self.labels:
+            label = self.labels[0]
+            for key, value in (props or {}).items():
+                found = graph.lookup(label, key, value)
+                if found is not None:
+                    break
+            if found is None:
+                for key, expr, is_in in self.seeks:
+                    value = expr(row, ctx)
+                    if is_in:
+                        if not isinstance(value, list):
+                            continue
+                        hits, ok = {}, True
+                        for item in value:
+                            nodes = graph.lookup(label, key, item)
+                            if nodes is None:
+                                ok = False
+                                break
+                            for node in nodes:
+                                hits[node.element_id] = node
+                        if ok:
+                            found = list(hits.values())
+                            break
+                    else:
+                        found = graph.lookup(label, key, value)
+                        if found is not None:
+                            break
+            if found is None:
+                found = graph.scan(label)
+        else:
+            found = graph.scan()
+        return [node for node in found if self.accepts(node, props)]
+
+
+class _RelMatcher:
+    """Compiled constraints of a relationship pattern."""
+
+    def __init__(self, pattern: RelPattern, bound: bool):
+        self.var = pattern.var
+        self.types = pattern.types
+        self.direction = pattern.direction
+        self.length = pattern.length
+        self.bound = bound
+        self.props = compile_expr(pattern.props) if pattern.props is not None else None
+
+    def reversed_direction(self) -> str:
+        return {"out": "in", "in": "out", "both": "both"}[self.direction]
+
+    def accepts(self, rel: Relationship, props: Optional[Dict[str, Any]]) -> bool:
+        if props:
+            for key, value in props.items():
+                if _equals(rel.properties.get(key), value) is not True:
+                    return False
+        return True
+
+    def expand(self, node: Node, direction: str, row: Row, ctx: Context) -> Iterator[Tuple[Any, Node]]:
+        props = self.props(row, ctx) if self.props else None
+        if self.length is None:
+            bound_rel = row.get(self.var) if self.bound else None
+            for rel, other in ctx.graph.relationships_of(node, direction, self.types):
+                if bound_rel is not None and rel is not bound_rel:
+                    continue
+                if self.accepts(rel, props):
+                    yield rel, other
+            return
+        low, high = self.length
+        # Depth-first enumeration of paths without repeated relationships
+        stack = [(node, [])]
+        while stack:
+            current, path = stack.pop()
+            if len(path) >= low:
+                yield list(path), current
+            if high is not None and len(path) >= high:
+                continue
+            used = {rel.element_id for rel in path}
+            for rel, other in ctx.graph.relationships_of(current, direction, self.types):
+                if rel.element_id not in used and self.accepts(rel, props):
+                    stack.append((other, path + [rel]))
+
+
+def _compile_path_matcher(path: PathPattern, scope: Set[str], where: Optional[Ast]):
+    """Compile a path pattern into ``match(row, ctx) -> iterator of rows``."""
+    node_matchers = [
+        _NodeMatcher(node, node.var in scope, _seek_predicates(where, node.var)) for node in path.nodes
+    ]
+    rel_matchers = [_RelMatcher(rel, rel.var in scope) for rel in path.rels]
+    start = max(range(len(node_matchers)), key=lambda i: node_matchers[i].score())
+
+    def extend(row: Row, ctx: Context, i: int, step: int) -> Iterator[Row]:
+        # Expand from node i towards the end (step=1) or the start (step=-1)
+        if step == 1 and i == len(node_matchers) - 1:
+            yield from extend(row, ctx, start, -1)
+            return
+        if step == -1 and i == 0:
+            yield row
+            return
+        rel_index = i if step == 1 else i - 1
+        rel_matcher = rel_matchers[rel_index]
+        next_matcher = node_matchers[i + step]
+        direction = rel_matcher.direction if step == 1 else rel_matcher.reversed_direction()
+        for rel, other in rel_matcher.expand(row[node_matchers[i].var], direction, row, ctx):
+            if next_matcher.var in row:
+                if row[next_matcher.var] is not other:
+                    continue
+                if not next_matcher.accepts(other, next_matcher.props(row, ctx) if next_matcher.props else None):
+                    continue
+            elif not next_matcher.accepts(other, next_matcher.props(row, ctx) if next_matcher.props else None):
+                continue
+            if rel_matcher.var in row and not rel_matcher.bound:
+                continue
+            new_row = dict(row)
+            if step == -1 and isinstance(rel, list):
+                rel = list(reversed(rel))
+            new_row[rel_matcher.var] = rel
+            new_row[next_matcher.var] = other
+            yield from extend(new_row, ctx, i + step, step)
+
+    start_matcher = node_matchers[start]
+
+    def match(row: Row, ctx: Context) -> Iterator[Row]:
+        for node in start_matcher.candidates(row, ctx):
+            if start_matcher.bound:
+                yield from extend(row, ctx, start, 1)
+            else:
+                new_row = dict(row)
+                new_row[start_matcher.var] = node
+                yield from extend(new_row, ctx, start, 1)
+
+    return match, [rel.var for rel in path.rels]
+
+
+def _unique_relationships(row: Row, rel_vars: List[str]) -> bool:
+    seen = set()
+    for var in rel_vars:
+        value = row.get(var)
+        rels = value if isinstance(value, list) else [value]
+        for rel in rels:
+            if rel is None:
+                continue
+            if rel.element_id in seen:
+                return False
+            seen.add(rel.element_id)
+    return True
+
+
+def _pattern_vars(path: PathPattern) -> List[str]:
+    return [node.var for node in path.nodes] + [rel.var for rel in path.rels]
+
+
+# Clause compilers
+
+def _compile_match(patterns, where, optional, scope: Set[str]) -> Step:
+    matchers = []
+    rel_vars: List[str] = []
+    local_scope = set(scope)
+    for path in patterns:
+        matcher, path_rel_vars = _compile_path_matcher(path, local_scope, where)
+        matchers.append(matcher)
+        rel_vars.extend(var for var in path_rel_vars if var not in scope)
+        local_scope.update(_pattern_vars(path))
+    new_vars = [var for var in local_scope - scope if not var.startswith("  ")]
+    hidden = [var for var in local_scope - scope if var.startswith("  ")]
+    predicate = compile_expr(where) if where is not None else None
+
+    def match_rows(row: Row, ctx: Context, i: int) -> Iterator[Row]:
+        if i == len(matchers):
+            yield row
+            return
+        for matched in matchers[i](row, ctx):
+            yield from match_rows(matched, ctx, i + 1)
+
+    def step(rows: Iterator[Row], ctx: Context) -> Iterator[Row]:
+        for row in rows:
+            found = False
+            for matched in match_rows(row, ctx, 0):
+                if rel_vars and not _unique_relationships(matched, rel_vars):
+                    continue
+                if predicate is not None and predicate(matched, ctx) is not True:
+                    continue
+                for var in hidden:
+                    matched.pop(var, None)
+                found = True
+                yield matched
+            if optional and not found:
+                yield {**row, **{var: None for var in new_vars}}
+
+    scope.update(new_vars)
+    return step
+
+
+def _compile_unwind(expr: Ast, alias: str, scope: Set[str]) -> Step:
+    fn = compile_expr(expr)
+    scope.add(alias)
+
+    def step(rows: Iterator[Row], ctx: Context) -> Iterator[Row]:
+        for row in rows:
+            values = fn(row, ctx)
+            if values is None:
+                continue
+            if not isinstance(values, list):
+                values = [values]
+            for value in values:
+                new_row = dict(row)
+                new_row[alias] = value
+                yield new_row
+
+    return step
+
+
+def _storable(value: Any, key: str) -> Any:
+    if isinstance(value, (Node, Relationship, dict)):
+        raise CypherError(f"Property values can only be of primitive types or arrays thereof (key {key!r})")
+    if isinstance(value, list):
+        for item in value:
+            if isinstance(item, (Node, Relationship, dict, list)):
+                raise CypherError(f"Property values can only be of primitive types or arrays thereof (key {key!r})")
+        return list(value)
+    return value
+
+
+def _property_map(value: Any) -> Dict[str, Any]:
+    if value is None:
+        return {}
+    if isinstance(value, (Node, Relationship)):
+        return dict(value.properties)
+    if not isinstance(value, dict):
+        raise CypherError(f"Expected a map of properties, got {type(value).__name__}")
+    return {key: _storable(v, key) for key, v in value.items()}
+
+
+def _compile_creator(path: PathPattern, scope: Set[str]) -> Callable[[Row, Context], Row]:
+    """Compile a CREATE of a path; bound nodes are reused, the rest created."""
+    node_steps = []
+    for node in path.nodes:
+        reuse = node.var in scope
+        if reuse and (node.labels or node.props is not None):
+            raise CypherError(f"Can't create node `{node.var}` with labels or properties here, as it is already bound")
+        props = compile_expr(node.props) if node.props is not None else None
+        node_steps.append((node.var, reuse, node.labels, props))
+        scope.add(node.var)
+    rel_steps = []
+    for rel in path.rels:
+        if rel.var in scope:
+            raise CypherError(f"Can't create relationship `{rel.var}`, as it is already bound")
+        if len(rel.types) != 1:
+            raise CypherError("A single relationship type must be specified for CREATE")
+        if rel.direction == "both":
+            raise CypherError("Only directed relationships are supported in CREATE")
+        if rel.length is not None:
+            raise CypherError("Variable length relationships cannot be used in CREATE")
+        props = compile_expr(rel.props) if rel.props is not None else None
+        rel_steps.append((rel.var, rel.types[0], rel.direction, props))
+        scope.add(rel.var)
+
+    def create(row: Row, ctx: Context) -> Row:
+        row = dict(row)
+        nodes = []
+        for var, reuse, labels, props in node_steps:
+            if reuse:
+                node = row[var]
+                if not isinstance(node, Node):
+                    raise CypherError(f"Expected `{var}` to be a node")
+            else:
+                node = ctx.graph.create_node(labels, _property_map(props(row, ctx)) if props else {}, ctx.journal)
+                row[var] = node
+            nodes.append(node)
+        for i, (var, rel_type, direction, props) in enumerate(rel_steps):
+            start, end = nodes[i], nodes[i + 1]
+            if direction == "in":
+                start, end = end, start
+            row[var] = ctx.graph.create_relationship(
+                rel_type, start, end, _property_map(props(row, ctx)) if props else {}, ctx.journal
+            )
+        for var in list(row):
+            if isinstance(var, str) and var.startswith("  "):
+                del row[var]
+        return row
+
+    return create
+
+
+def _compile_create(patterns, scope: Set[str]) -> Step:
+    creators = [_compile_creator(path, scope) for path in patterns]
+
+    def step(rows: Iterator[Row], ctx: Context) -> Iterator[Row]:
+        for row in rows:
+            for creator in creators:
+                row = creator(row, ctx)
+            yield row
+
+    return step
+
+
+def _compile_set_items(items, scope: Set[str]) -> Callable[[Row, Context], None]:
+    compiled = []
+    for item in items:
+        kind, var = item[0], item[1]
+        if var not in scope:
+            raise CypherError(f"Variable `{var}` not defined")
+        if kind == "prop":
+            compiled.append((kind, var, item[2], compile_expr(item[3])))
+        elif kind in ("replace", "merge"):
+            compiled.append((kind, var, None, compile_expr(item[2])))
+        else:
+            compiled.append((kind, var, item[2], None))
+
+    def apply(row: Row, ctx: Context):
+        graph = ctx.graph
+        for kind, var, arg, fn in compiled:
+            entity = row.get(var)
+            if entity is None:
+                continue
+            if not isinstance(entity, (Node, Relationship)):
+                raise CypherError(f"Expected `{var}` to be a node or relationship")
+            if kind == "prop":
+                graph.set_property(entity, arg, _storable(fn(row, ctx), arg), ctx.journal)
+            elif kind == "replace":
+                graph.replace_properties(entity, _property_map(fn(row, ctx)), ctx.journal)
+            elif kind == "merge":
+                for key, value in _property_map(fn(row, ctx)).items():
+                    graph.set_property(entity, key, value, ctx.journal)
+            elif kind == "labels":
+                for label in arg:
+                    graph.add_label(entity, label, ctx.journal)
+            elif kind == "remove_labels":
+                for label in arg:
+                    graph.remove_label(entity, label, ctx.journal)
+
+    return apply
+
+
+def _compile_set(items, scope: Set[str]) -> Step:
+    apply = _compile_set_items(items, scope)
+
+    def step(rows: Iterator[Row], ctx: Context) -> Iterator[Row]:
+        for row in rows:
+            apply(row, ctx)
+            yield row
+
+    return step
+
+
+def _compile_merge(path: PathPattern, on_create, on_match, scope: Set[str]) -> Step:
+    for node in path.nodes:
+        if node.var in scope and (node.labels or node.props is not None) and len(path.nodes) == 1:
+            raise CypherError(f"Can't MERGE on already bound variable `{node.var}`")
+    matcher, rel_vars = _compile_path_matcher(path, scope, None)
+    creator = _compile_creator(path, set(scope))
+    scope.update(var for var in _pattern_vars(path) if not var.startswith("  "))
+    apply_create = _compile_set_items(on_create, scope)
+    apply_match = _compile_set_items(on_match, scope)
+    hidden = [var for var in _pattern_vars(path) if var.startswith("  ")]
+
+    def step(rows: Iterator[Row], ctx: Context) -> Iterator[Row]:
+        for row in rows:
+            matches = [m for m in matcher(row, ctx) if not rel_vars or _unique_relationships(m, rel_vars)]
+            if matches:
+                for matched in matches:
+                    for var in hidden:
+                        matched.pop(var, None)
+                    apply_match(matched, ctx)
+                    yield matched
+            else:
+                created = creator(row, ctx)
+                apply_create(created, ctx)
+                yield created
+
+    return step
+
+
+def _compile_delete(exprs, detach: bool) -> Step:
+    fns = [compile_expr(expr) for expr in exprs]
+
+    def delete(value: Any, ctx: Context):
+        if value is None:
+            return
+        if isinstance(value, list):
+            for item in value:
+                delete(item, ctx)
+        elif isinstance(value, Node):
+            try:
+                ctx.graph.delete_node(value, detach, ctx.journal)
+            except ValueError as e:
+                raise CypherError(str(e)) from None
+        elif isinstance(value, Relationship):
+            ctx.graph.delete_relationship(value, ctx.journal)
+        else:
+            raise CypherError(f"Expected a node or relationship to delete, got {type(value).__name__}")
+
+    def step(rows: Iterator[Row], ctx: Context) -> Iterator[Row]:
+        # Match everything before deleting anything, like Neo4j's eager plans
+        rows = list(rows)
+        for row in rows:
+            for fn in fns:
+                delete(fn(row, ctx), ctx)
+        yield from rows
+
+    return step
+
+
+def _compile_schema(props: List[str]) -> Step:
+    def step(rows: Iterator[Row], ctx: Context) -> Iterator[Row]:
+        for prop in props:
+            ctx.graph.add_index(prop)
+        for _ in rows:
+            pass
+        return iter(())
+
+    return step
+
+
+class _Accumulator:
+    __slots__ = ("name", "distinct", "seen", "values", "count", "total", "best")
+
+    def __init__(self, name: str, distinct: bool):
+        self.name = name
+        self.distinct = distinct
+        self.seen = set() if distinct else None
+        self.values = []
+        self.count = 0
+        self.total = 0
+        self.best = None
+
+    def add(self, value: Any):
+        if value is None:
+            return
+        if self.distinct:
+            key = _hashable(value)
+            if key in self.seen:
+                return
+            self.seen.add(key)
+        self.count += 1
+        if self.name == "collect":
+            self.values.append(value)
+        elif self.name in ("sum", "avg"):
+            self.total += value
+        elif self.name == "min":
+            if self.best is None or _compare_for_order(value, self.best) < 0:
+                self.best = value
+        elif self.name == "max":
+            if self.best is None or _compare_for_order(value, self.best) > 0:
+                self.best = value
+
+    def result(self) -> Any:
+        if self.name == "count":
+            return self.count
+        if self.name == "collect":
+            return self.values
+        if self.name == "sum":
+            return self.total
+        if self.name == "avg":
+            return self.total / self.count if self.count else None
+        return self.best
+
+
+def _compile_projection(clause: tuple, scope: Set[str]) -> Tuple[Step, List[str]]:
+    _, distinct, star, items, order, skip, limit, where = clause
+    if star:
+        items = [ProjectionItem(Var(var), var) for var in sorted(scope)] + items
+    if not items:
+        raise CypherError("Nothing to project")
+    columns = [item.alias for item in items]
+    if len(set(columns)) != len(columns):
+        raise CypherError("Multiple result columns with the same name are not supported")
+
+    aggregating = any(_contains_aggregate(item.expr) for item in items)
+    aggregates: List[Call] = []
+    compiled = [compile_expr(item.expr, aggregates if aggregating else None) for item in items]
+    key_indexes = [i for i, item in enumerate(items) if not _contains_aggregate(item.expr)]
+    agg_args = [
+        None if call.star else compile_expr(call.args[0]) if call.args else None for call in aggregates
+    ]
+    for call in aggregates:
+        if not call.star and len(call.args) != 1:
+            raise CypherError(f"{call.name}() takes exactly one argument")
+
+    order_fns = [(compile_expr(expr, None), desc) for expr, desc in order]
+    skip_fn = compile_expr(skip) if skip is not None else None
+    limit_fn = compile_expr(limit) if limit is not None else None
+    where_fn = compile_expr(where) if where is not None else None
+
+    def project(rows: Iterator[Row], ctx: Context) -> Iterator[Tuple[Row, Row]]:
+        """Yield (projected row, scope for ORDER BY) pairs."""
+        if not aggregating:
+            for row in rows:
+                projected = {column: fn(row, ctx) for column, fn in zip(columns, compiled)}
+                yield projected, {**row, **projected}
+            return
+        groups: Dict[Any, Tuple[Row, List[_Accumulator]]] = {}
+        for row in rows:
+            key_values = [compiled[i](row, ctx) for i in key_indexes]
+            key = tuple(_hashable(v) for v in key_values)
+            group = groups.get(key)
+            if group is None:
+                group = (row, [_Accumulator(call.name, call.distinct) for call in aggregates])
+                groups[key] = group
+            for acc, arg, call in zip(group[1], agg_args, aggregates):
+                acc.add(1 if call.star else arg(row, ctx))
+        if not groups and not key_indexes:
+            groups[()] = ({}, [_Accumulator(call.name, call.distinct) for call in aggregates])
+        for first_row, accumulators in groups.values():
+            grouped = dict(first_row)
+            for index, acc in enumerate(accumulators):
+                grouped[_AggregateSlot(index)] = acc.result()
+            projected = {column: fn(grouped, ctx) for column, fn in zip(columns, compiled)}
+            yield projected, projected
+
+    def step(rows: Iterator[Row], ctx: Context) -> Iterator[Row]:
+        pairs = project(rows, ctx)
+        if distinct:
+            pairs = _distinct_pairs(pairs)
+        skip_n = _count_arg(skip_fn, ctx, "SKIP") if skip_fn else 0
+        limit_n = _count_arg(limit_fn, ctx, "LIMIT") if limit_fn else None
+        if order_fns:
+            top = skip_n + limit_n if limit_n is not None else None
+            pairs = iter(_sort_rows(pairs, order_fns, ctx, top))
+        output = (projected for projected, _ in pairs)
+        if skip_n:
+            output = _skip(output, skip_n)
+        if limit_n is not None:
+            output = _limit(output, limit_n)
+        if where_fn is not None:
+            output = (row for row in output if where_fn(row, ctx) is True)
+        return output
+
+    scope.clear()
+    scope.update(columns)
+    return step, columns
+
+
+def _distinct_pairs(pairs: Iterator[Tuple[Row, Row]]) -> Iterator[Tuple[Row, Row]]:
+    seen = set()
+    for projected, scope_row in pairs:
+        key = tuple(_hashable(v) for v in projected.values())
+        if key not in seen:
+            seen.add(key)
+            yield projected, projected
+
+
+def _count_arg(fn: Expr, ctx: Context, clause: str) -> int:
+    value = fn({}, ctx)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise CypherError(f"{clause} expects a non-negative integer, got {value!r}")
+    return value
+
+
+def _skip(rows: Iterator[Row], n: int) -> Iterator[Row]:
+    for i, row in enumerate(rows):
+        if i >= n:
+            yield row
+
+
+def _limit(rows: Iterator[Row], n: int) -> Iterator[Row]:
+    if n == 0:
+        return
+    for i, row in enumerate(rows, 1):
+        yield row
+        if i >= n:
+            return
+
+
+class CompiledQuery:
+    """A parsed and compiled query, reusable with different parameters."""
+
+    def __init__(self, text: str):
+        clauses = Parser(text).parse()
+        scope: Set[str] = set()
+        self.steps: List[Step] = []
+        self.columns: List[str] = []
+        self.writes = False
+        for i, clause in enumerate(clauses):
+            kind = clause[0]
+            final = i == len(clauses) - 1
+            if kind == "return" and not final:
+                raise CypherError("RETURN can only be used at the end of the query")
+            if kind == "match":
+                self.steps.append(_compile_match(clause[1], clause[2], clause[3], scope))
+            elif kind == "unwind":
+                self.steps.append(_compile_unwind(clause[1], clause[2], scope))
+            elif kind == "create":
+                self.writes = True
+                self.steps.append(_compile_create(clause[1], scope))
+            elif kind == "merge":
+                self.writes = True
+                self.steps.append(_compile_merge(clause[1], clause[2], clause[3], scope))
+            elif kind in ("set", "remove"):
+                self.writes = True
+                self.steps.append(_compile_set(clause[1], scope))
+            elif kind == "delete":
+                self.writes = True
+                self.steps.append(_compile_delete(clause[1], clause[2]))
+            elif kind == "schema":
+                self.writes = True
+                self.steps.append(_compile_schema(clause[1]))
+            elif kind in ("with", "return"):
+                step, columns = _compile_projection(clause, scope)
+                self.steps.append(step)
+                if kind == "return":
+                    self.columns = columns
+
+    def execute(self, graph: MemoryGraph, params: Dict[str, Any], journal: Journal) -> Iterator[Row]:
+        """Run the query lazily, yielding result rows keyed by column."""
+        ctx = Context(graph, params, journal)
+        rows: Iterator[Row] = iter([{}])
+        for step in self.steps:
+            rows = step(rows, ctx)
+        if not self.columns:
+            for _ in rows:
+                pass
+            return iter(())
+        return rows
+
+
+@lru_cache(maxsize=1024)
+def compile_query(text: str) -> CompiledQuery:
+    """Parse and compile a query, cached by its text."""
+    return CompiledQuery(text)
@@ -0,0 +1,283 @@
+"""
+Async driver facade over ``MemoryGraph``.
+
+Mirrors the parts of the ``neo4j`` async driver API that ``DatabaseManager``
+uses, so the rest of the application runs unchanged against an in-process
+graph in tests, benchmarks and local development.
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from musical_brain.inmemory.cypher import CypherError, compile_query
+from musical_brain.inmemory.graph import MemoryGraph, Node, Relationship
+
+# Records handed out before yielding to the event loop while iterating
+YIELD_EVERY = 1000
+
+
+def _to_data(value: Any) -> Any:
+    """Convert graph values the way ``neo4j.Record.data()`` does."""
+    if isinstance(value, Node):
+        return dict(value.properties)
+    if isinstance(value, Relationship):
+        return (dict(value.start.properties), value.type, dict(value.end.properties))
+    if isinstance(value, list):
+        return [_to_data(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_data(item) for key, item in value.items()}
+    return value
+
+
+class MemoryRecord:
+    """A result row, indexable by column name or position."""
+
+    __slots__ = ("_keys", "_values")
+
+    def __init__(self, keys: List[str], row: Dict[str, Any]):
+        self._keys = keys
+        self._values = [row.get(key) for key in keys]
+
+    def keys(self) -> List[str]:
+        return list(self._keys)
+
+    def values(self) -> List[Any]:
+        return list(self._values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def data(self) -> Dict[str, Any]:
+        return {key: _to_data(value) for key, value in zip(self._keys, self._values)}
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._values[key]
+        try:
+            return self._values[self._keys.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return f"<MemoryRecord {self.data()}>"
+
+
+class MemoryResultSummary:
+    """Timings of a consumed result, in milliseconds."""
+
+    def __init__(self, query: str, parameters: Dict[str, Any], available_after: int, consumed_after: int):
+        self.query = query
+        self.parameters = parameters
+        self.result_available_after = available_after
+        self.result_consumed_after = consumed_after
+
+
+class MemoryResult:
+    """Lazily evaluated query result."""
+
+    def __init__(self, query: str, parameters: Dict[str, Any], keys: List[str], rows: Iterator[Dict[str, Any]]):
+        self._query = query
+        self._parameters = parameters
+        self._keys = keys
+        self._rows = rows
+        self._started = time.perf_counter()
+        self._available_after = 0
+        self._consumed = False
+
+    def keys(self) -> List[str]:
+        return list(self._keys)
+
+    def _next(self) -> Optional[MemoryRecord]:
+        row = next(self._rows, None)
+        if row is None:
+            self._consumed = True
+            return None
+        return MemoryRecord(self._keys, row)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[MemoryRecord]:
+        count = 0
+        while True:
+            record = self._next()
+            if record is None:
+                return
+            yield record
+            count += 1
+            if count % YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+
+    async def single(self) -> Optional[MemoryRecord]:
+        record = self._next()
+        self._drain()
+        return record
+
+    async def data(self) -> List[Dict[str, Any]]:
+        records = []
+        async for record in self:
+            records.append(record.data())
+        return records
+
+    async def values(self) -> List[List[Any]]:
+        return [record.values() async for record in self]
+
+    def _drain(self):
+        for _ in self._rows:
+            pass
+        self._consumed = True
+
+    async def consume(self) -> MemoryResultSummary:
+        self._drain()
+        consumed_after = int((time.perf_counter() - self._started) * 1000)
+        return MemoryResultSummary(self._query, self._parameters, self._available_after, consumed_after)
+
+
+def _run(graph: MemoryGraph, query: str, parameters: Optional[Dict[str, Any]], journal: list) -> MemoryResult:
+    """Compile and start a query; write queries run to completion eagerly."""
+    parameters = dict(parameters or {})
+    compiled = compile_query(query)
+    rows = compiled.execute(graph, parameters, journal)
+    if compiled.writes:
+        rows = iter(list(rows))
+    return MemoryResult(query, parameters, compiled.columns, rows)
+
+
+def _undo(journal: list):
+    while journal:
+        journal.pop()()
+
+
+class MemoryTransaction:
+    """Transaction whose writes are undone on rollback.
+
+    Like the neo4j driver, a failed query undoes the transaction's writes
+    and fails the rest of it, and committing or rolling back a closed
+    transaction raises; :meth:`close` is a no-op once it is closed.
+    """
+
+    def __init__(self, graph: MemoryGraph):
+        self._graph = graph
+        self._journal: list = []
+        self._results: List[MemoryResult] = []
+        self._closed = False
+        self._failed = False
+
+    def closed(self) -> bool:
+        return self._closed
+
+    def _check_open(self):
+        if self._closed:
+            raise CypherError("Transaction closed")
+        if self._failed:
+            raise CypherError("Transaction failed")
+
+    async def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> MemoryResult:
+        self._check_open()
+        try:
+            result = _run(self._graph, query, {**(parameters or {}), **kwargs}, self._journal)
+        except Exception:
+            _undo(self._journal)
+            self._failed = True
+            raise
+        self._results.append(result)
+        return result
+
+    async def commit(self):
+        self._check_open()
+        for result in self._results:
+            result._drain()
+        self._journal.clear()
+        self._closed = True
+
+    async def rollback(self):
+        if self._closed:
+            raise CypherError("Transaction closed")
+        _undo(self._journal)
+        self._closed = True
+
+    async def close(self):
+        if not self._closed:
+            await self.rollback()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None and not self._closed:
+            await self.commit()
+        else:
+            await self.close()
+
+
+class MemorySession:
+    """Session API subset: ``run``, managed and explicit transactions."""
+
+    def __init__(self, graph: MemoryGraph):
+        self._graph = graph
+
+    async def run(self, query: str, parameters: Optional[Dict[str, Any]] = None, **kwargs) -> MemoryResult:
+        """Auto-commit query; a failing write leaves no partial changes."""
+        journal: list = []
+        try:
+            return _run(self._graph, query, {**(parameters or {}), **kwargs}, journal)
+        except Exception:
+            _undo(journal)
+            raise
+
+    async def _execute(self, work: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        tx = MemoryTransaction(self._graph)
+        try:
+            value = await work(tx, *args, **kwargs)
+        except BaseException:
+            await tx.close()
+            raise
+        if not tx.closed():
+            await tx.commit()
+        return value
+
+    async def execute_read(self, work: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        return await self._execute(work, *args, **kwargs)
+
+    async def execute_write(self, work: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        return await self._execute(work, *args, **kwargs)
+
+    async def begin_transaction(self, **kwargs) -> MemoryTransaction:
+        return MemoryTransaction(self._graph)
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+class MemoryDriver:
+    """Drop-in for ``neo4j.AsyncDriver`` backed by a ``MemoryGraph``."""
+
+    def __init__(self, graph: Optional[MemoryGraph] = None):
+        self.graph = graph if graph is not None else MemoryGraph()
+
+    def session(self, **kwargs) -> MemorySession:
+        """Open a session; ``database``, ``fetch_size`` etc. are accepted and ignored."""
+        return MemorySession(self.graph)
+
+    async def verify_connectivity(self, **kwargs):
+        pass
+
+    async def close(self):
+        pass
+
@@ -0,0 +1,309 @@
+"""
+In-process property graph store.
+"""
+
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Undo callbacks recorded by writes inside a transaction
+Journal = Optional[List[Callable[[], None]]]
+
+
+class Node:
+    """A node with labels and properties."""
+
+    __slots__ = ("element_id", "labels", "properties", "deleted")
+
+    def __init__(self, element_id: int, labels: Iterable[str], properties: Dict[str, Any]):
+        self.element_id = element_id
+        self.labels = set(labels)
+        self.properties = properties
+        self.deleted = False
+
+    def __repr__(self):
+        return f"Node({self.element_id}, {sorted(self.labels)}, {self.properties})"
+
+
+class Relationship:
+    """A directed, typed relationship with properties."""
+
+    __slots__ = ("element_id", "type", "start", "end", "properties", "deleted")
+
+    def __init__(self, element_id: int, rel_type: str, start: Node, end: Node, properties: Dict[str, Any]):
+        self.element_id = element_id
+        self.type = rel_type
+        self.start = start
+        self.end = end
+        self.properties = properties
+        self.deleted = False
+
+    def __repr__(self):
+        return f"Relationship({self.element_id}, {self.type}, {self.start.element_id}->{self.end.element_id})"
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class MemoryGraph:
+    """Property graph held in Python dicts.
+
+    Nodes are indexed by label, and by ``(label, property)`` hash indexes for
+    the properties in ``indexed_properties``. Relationships are indexed by
+    type and by start/end node. Writes take an optional journal; each write
+    appends a callback that undoes it, which is how transactions roll back.
+    There is no isolation between concurrent transactions.
+    """
+
+    def __init__(self, indexed_properties: Sequence[str] = ("id",)):
+        self.indexed_properties = set(indexed_properties)
+        self.clear()
+
+    def clear(self):
+        """Remove every node and relationship."""
+        self._next_id = 0
+        self.nodes: Dict[int, Node] = {}
+        self.relationships: Dict[int, Relationship] = {}
+        self._by_label: Dict[str, Dict[int, Node]] = defaultdict(dict)
+        self._by_type: Dict[str, Dict[int, Relationship]] = defaultdict(dict)
+        self._outgoing: Dict[int, Dict[int, Relationship]] = defaultdict(dict)
+        self._incoming: Dict[int, Dict[int, Relationship]] = defaultdict(dict)
+        self._index: Dict[Tuple[str, str], Dict[Any, Dict[int, Node]]] = defaultdict(lambda: defaultdict(dict))
+
+    def add_index(self, prop: str):
+        """Start maintaining hash indexes on a property for every label."""
+        if prop in self.indexed_properties:
+            return
+        self.indexed_properties.add(prop)
+        for node in self.nodes.values():
+            self._index_node(node, (prop,))
+
+    # Reads
+
+    def node_count(self, label: Optional[str] = None) -> int:
+        """Number of nodes, optionally only those with a label."""
+        if label is None:
+            return len(self.nodes)
+        return len(self._by_label.get(label, ()))
+
+    def scan(self, label: Optional[str] = None) -> List[Node]:
+        """Snapshot of all nodes, or of the nodes with a label."""
+        if label is None:
+            return list(self.nodes.values())
+        return list(self._by_label.get(label, {}).values())
+
+    def lookup(self, label: str, prop: str, value: Any) -> Optional[List[Node]]:
+        """Index seek for nodes with ``label`` whose ``prop`` equals ``value``.
+
+        Returns None when there is no index to answer it.
+        """
+        if prop not in self.indexed_properties or not _hashable(value):
+            return None
+        entries = self._index.get((label, prop))
+        if entries is None:
+            return []
+        return list(entries.get(value, {}).values())
+
+    def relationships_of(
+        self,
+        node: Node,
+        direction: str,
+        types: Sequence[str] = (),
+    ) -> Iterator[Tuple[Relationship, Node]]:
+        """Relationships of a node with the node at their other end.
+
+        ``direction`` is ``"out"``, ``"in"`` or ``"both"``.
+        """
+        if direction in ("out", "both"):
+            for rel in list(self._outgoing.get(node.element_id, {}).values()):
+                if not types or rel.type in types:
+                    yield rel, rel.end
+        if direction in ("in", "both"):
+            for rel in list(self._incoming.get(node.element_id, {}).values()):
+                if (not types or rel.type in types) and not (direction == "both" and rel.start is rel.end):
+                    yield rel, rel.start
+
+    def scan_relationships(self, rel_type: Optional[str] = None) -> List[Relationship]:
+        """Snapshot of all relationships, or of those with a type."""
+        if rel_type is None:
+            return list(self.relationships.values())
+        return list(self._by_type.get(rel_type, {}).values())
+
+    # Writes
+
+    def create_node(self, labels: Iterable[str], properties: Dict[str, Any], journal: Journal = None) -> Node:
+        """Create a node; None-valued properties are not stored."""
+        self._next_id += 1
+        node = Node(self._next_id, labels, {k: v for k, v in properties.items() if v is not None})
+        self._attach_node(node)
+        if journal is not None:
+            journal.append(lambda: self._detach_node(node))
+        return node
+
+    def delete_node(self, node: Node, detach: bool = False, journal: Journal = None):
+        """Delete a node, and its relationships when ``detach`` is set."""
+        if node.deleted:
+            return
+        rels = list(self._outgoing.get(node.element_id, {}).values())
+        rels += [rel for rel in self._incoming.get(node.element_id, {}).values() if rel.start is not rel.end]
+        if rels and not detach:
+            raise ValueError(
+                f"Cannot delete node {node.element_id}, because it still has relationships. "
+                "To delete this node, you must first delete its relationships."
+            )
+        for rel in rels:
+            self.delete_relationship(rel, journal)
+        self._detach_node(node)
+        if journal is not None:
+            journal.append(lambda: self._attach_node(node))
+
+    def set_property(self, entity: Any, key: str, value: Any, journal: Journal = None):
+        """Set one property; None removes it."""
+        old = entity.properties.get(key)
+        had = key in entity.properties
+        self._unindex(entity, (key,))
+        if value is None:
+            entity.properties.pop(key, None)
+        else:
+            entity.properties[key] = value
+        self._reindex(entity, (key,))
+        if journal is not None:
+            journal.append(lambda: self._restore_property(entity, key, had, old))
+
+    def replace_properties(self, entity: Any, properties: Dict[str, Any], journal: Journal = None):
+        """Replace all properties of a node or relationship."""
+        old = dict(entity.properties)
+        self._unindex(entity)
+        entity.properties = {k: v for k, v in properties.items() if v is not None}
+        self._reindex(entity)
+        if journal is not None:
+            journal.append(lambda: self._restore_properties(entity, old))
+
+    def add_label(self, node: Node, label: str, journal: Journal = None):
+        """Add a label to a node."""
+        if label in node.labels:
+            return
+        node.labels.add(label)
+        self._by_label[label][node.element_id] = node
+        self._index_node(node, labels=(label,))
+        if journal is not None:
+            journal.append(lambda: self.remove_label(node, label))
+
+    def remove_label(self, node: Node, label: str, journal: Journal = None):
+        """Remove a label from a node."""
+        if label not in node.labels:
+            return
+        self._unindex_node(node, labels=(label,))
+        node.labels.discard(label)
+        self._by_label[label].pop(node.element_id, None)
+        if journal is not None:
+            journal.append(lambda: self.add_label(node, label))
+
+    def create_relationship(
+        self,
+        rel_type: str,
+        start: Node,
+        end: Node,
+        properties: Dict[str, Any],
+        journal: Journal = None,
+    ) -> Relationship:
+        """Create a relationship between two existing nodes."""
+        if start.deleted or end.deleted:
+            raise ValueError("Cannot create a relationship to a deleted node")
+        self._next_id += 1
+        rel = Relationship(
+            self._next_id, rel_type, start, end, {k: v for k, v in properties.items() if v is not None}
+        )
+        self._attach_relationship(rel)
+        if journal is not None:
+            journal.append(lambda: self._detach_relationship(rel))
+        return rel
+
+    def delete_relationship(self, rel: Relationship, journal: Journal = None):
+        """Delete a relationship."""
+        if rel.deleted:
+            return
+        self._detach_relationship(rel)
+        if journal is not None:
+            journal.append(lambda: self._attach_relationship(rel))
+
+    # Internals
+
+    def _attach_node(self, node: Node):
+        node.deleted = False
+        self.nodes[node.element_id] = node
+        for label in node.labels:
+            self._by_label[label][node.element_id] = node
+        self._index_node(node)
+
+    def _detach_node(self, node: Node):
+        node.deleted = True
+        self._unindex_node(node)
+        self.nodes.pop(node.element_id, None)
+        for label in node.labels:
+            self._by_label[label].pop(node.element_id, None)
+        self._outgoing.pop(node.element_id, None)
+        self._incoming.pop(node.element_id, None)
+
+    def _attach_relationship(self, rel: Relationship):
+        rel.deleted = False
+        self.relationships[rel.element_id] = rel
+        self._by_type[rel.type][rel.element_id] = rel
+        self._outgoing[rel.start.element_id][rel.element_id] = rel
+        self._incoming[rel.end.element_id][rel.element_id] = rel
+
+    def _detach_relationship(self, rel: Relationship):
+        rel.deleted = True
+        self.relationships.pop(rel.element_id, None)
+        self._by_type[rel.type].pop(rel.element_id, None)
+        self._outgoing.get(rel.start.element_id, {}).pop(rel.element_id, None)
+        self._incoming.get(rel.end.element_id, {}).pop(rel.element_id, None)
+
+    def _index_node(self, node: Node, props: Optional[Iterable[str]] = None, labels: Optional[Iterable[str]] = None):
+        for prop in self.indexed_properties if props is None else props:
+            if prop not in self.indexed_properties:
+                continue
+            value = node.properties.get(prop)
+            if value is None or not _hashable(value):
+                continue
+            for label in node.labels if labels is None else labels:
+                self._index[(label, prop)][value][node.element_id] = node
+
+    def _unindex_node(self, node: Node, props: Optional[Iterable[str]] = None, labels: Optional[Iterable[str]] = None):
+        for prop in self.indexed_properties if props is None else props:
+            if prop not in self.indexed_properties:
+                continue
+            value = node.properties.get(prop)
+            if value is None or not _hashable(value):
+                continue
+            for label in node.labels if labels is None else labels:
+                entries = self._index.get((label, prop))
+                if entries is not None and value in entries:
+                    entries[value].pop(node.element_id, None)
+                    if not entries[value]:
+                        del entries[value]
+
+    def _unindex(self, entity: Any, props: Optional[Iterable[str]] = None):
+        if isinstance(entity, Node) and not entity.deleted:
+            self._unindex_node(entity, props)
+
+    def _reindex(self, entity: Any, props: Optional[Iterable[str]] = None):
+        if isinstance(entity, Node) and not entity.deleted:
+            self._index_node(entity, props)
+
+    def _restore_property(self, entity: Any, key: str, had: bool, old: Any):
+        self._unindex(entity, (key,))
+        if had:
+            entity.properties[key] = old
+        else:
+            entity.properties.pop(key, None)
+        self._reindex(entity, (key,))
+
+    def _restore_properties(self, entity: Any, old: Dict[str, Any]):
+        self._unindex(entity)
+        entity.properties = old
+        self._reindex(entity)
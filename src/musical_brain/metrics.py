@@ -0,0 +1,332 @@
+"""
+In-process Prometheus metrics for Musical Brain.
+
+Metrics are kept in plain Python objects and rendered in the Prometheus
+text exposition format (version 0.0.4) on demand, so no metrics server or
+client library is needed. Updates happen on the event loop.
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from musical_brain.cache import node_cache
+from musical_brain.database import db
+from musical_brain.querystats import QueryTiming
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds, from sub-millisecond cache hits to slow scans
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route label for requests that matched no route, to bound label cardinality
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Normalised queries exported with latency quantiles, to bound label cardinality
+QUERY_STATS_TOP = 20
+
+# Service function and label that database queries are attributed to
+current_operation: ContextVar[Tuple[str, str]] = ContextVar("current_operation", default=("other", ""))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down, per label combination."""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        self.values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self.series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        bounds = [*self.buckets, float("inf")]
+        for labels, (counts, total) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics plus collectors that produce gauges at scrape time."""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Callable[[], List[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> Any:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Every metric in the text exposition format."""
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            try:
+                for metric in collector():
+                    lines.extend(metric.render())
+            except Exception as e:
+                logger.error(f"Metrics collector {collector.__name__} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "musical_brain_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+http_duration = registry.histogram(
+    "musical_brain_http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+http_in_flight = registry.gauge("musical_brain_http_requests_in_flight", "HTTP requests being served.")
+query_duration = registry.histogram(
+    "musical_brain_db_query_duration_seconds", "Database query latency by service function and label.",
+    ("function", "label"),
+)
+query_errors = registry.counter(
+    "musical_brain_db_query_errors_total", "Failed database queries by service function and label.",
+    ("function", "label"),
+)
+loop_lag = registry.histogram(
+    "musical_brain_event_loop_lag_seconds", "How late the event loop ran a timer.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+def _observe_query(query: str, timing: QueryTiming, error: Optional[BaseException]):
+    function, label = current_operation.get()
+    query_duration.observe(timing.total_ms / 1000, function, label)
+    if error is not None:
+        query_errors.inc(function, label)
+
+
+db.query_stats.observers.append(_observe_query)
+
+
+def _collect_pool() -> List[_Metric]:
+    metrics = []
+    for key, value in db.pool_stats().items():
+        gauge = Gauge(f"musical_brain_db_pool_{key}", f"Connection pool {key.replace('_', ' ')}.")
+        gauge.set(value)
+        metrics.append(gauge)
+    return metrics
+
+
+def _collect_cache() -> List[_Metric]:
+    stats = node_cache.stats()
+    metrics = []
+    for key in ("hits", "misses", "evictions", "expirations"):
+        counter = Counter(f"musical_brain_cache_{key}_total", f"Node cache {key}.")
+        counter.inc(amount=stats[key])
+        metrics.append(counter)
+    for key in ("size", "max_size", "hit_ratio"):
+        gauge = Gauge(f"musical_brain_cache_{key}", f"Node cache {key.replace('_', ' ')}.")
+        gauge.set(stats[key])
+        metrics.append(gauge)
+    return metrics
+
+
+def _collect_query_stats() -> List[_Metric]:
+    latency = Gauge(
+        "musical_brain_db_query_latency_ms",
+        "Recent latency quantiles per normalised query, for the queries with the most total time.",
+        ("query", "quantile"),
+    )
+    calls = Counter(
+        "musical_brain_db_query_calls_total", "Executions per normalised query, for the same queries.", ("query",)
+    )
+    for row in db.query_stats.snapshot()[:QUERY_STATS_TOP]:
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            latency.set(row[key], row["query"], quantile)
+        calls.inc(row["query"], amount=row["count"])
+    slow = Gauge("musical_brain_db_slow_queries", "Queries in the in-memory slow-query log.")
+    slow.set(len(db.query_stats.slow_queries()))
+    return [latency, calls, slow]
+
+
+registry.collectors.extend([_collect_pool, _collect_cache, _collect_query_stats])
+
+
+def instrumented(func: Callable) -> Callable:
+    """Attribute the database queries of a service function to its name and label.
+
+    The label is taken from a ``label`` parameter when the function has one.
+    The innermost instrumented call wins, so decorate the functions that run
+    queries, not wrappers that only delegate to one.
+    """
+    parameters = list(inspect.signature(func).parameters)
+    label_index = parameters.index("label") if "label" in parameters else None
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if label_index is None:
+            label = ""
+        elif label_index < len(args):
+            label = args[label_index]
+        else:
+            label = kwargs.get("label", "")
+        token = current_operation.set((name, label))
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            current_operation.reset(token)
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status and in-flight requests.
+
+    Latency runs until the last body chunk is sent, so streaming responses
+    count in full. Routes are labelled by their path template.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            http_duration.observe(time.perf_counter() - started, scope["method"], path)
+            http_requests.inc(scope["method"], path, str(status))
+
+
+async def monitor_event_loop(interval: float = 0.5):
+    """Measure how late the loop wakes from a sleep, until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        loop_lag.observe(max(0.0, loop.time() - scheduled))
+
+
+def render() -> str:
+    """The current metrics in the text exposition format."""
+    return registry.render()
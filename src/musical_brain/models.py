@@ -2,11 +2,25 @@
 Pydantic models for Musical Brain entities.
 """
 
+import logging
+import types
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, field_validator, model_validator
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _not_null(value: Any) -> Any:
+    """Reject an explicit null for a field the create model requires."""
+    if value is None:
+        raise ValueError("Field is required and cannot be null")
+    return value
 
 
 class AlbumType(str, Enum):
@@ -33,6 +47,18 @@ class Album(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class AlbumUpdate(BaseModel):
+    """Partial album update; only fields that are set get written."""
+    title: Optional[str] = Field(None, min_length=1, max_length=200)
+    album_type: Optional[AlbumType] = None
+    release_year: Optional[int] = Field(None, ge=1900, le=2030)
+    review_score: Optional[float] = Field(None, ge=0.0, le=5.0)
+    review_notes: Optional[str] = None
+    review_date: Optional[datetime] = None
+
+    _required = field_validator("title", "album_type")(_not_null)
+
+
 class Artist(BaseModel):
     """Artist model."""
     id: Optional[str] = None
@@ -45,10 +71,151 @@ class Artist(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ArtistUpdate(BaseModel):
+    """Partial artist update; only fields that are set get written."""
+    name: Optional[str] = Field(None, min_length=1, max_length=200)
+    country: Optional[str] = Field(None, max_length=100)
+    formed_year: Optional[int] = Field(None, ge=1800, le=2030)
+    notes: Optional[str] = None
+
+    _required = field_validator("name")(_not_null)
+
+
 class Genre(BaseModel):
     """Genre model."""
     id: Optional[str] = None
     name: str = Field(..., min_length=1, max_length=100)
     description: Optional[str] = None
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class GenreUpdate(BaseModel):
+    """Partial genre update; only fields that are set get written."""
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    description: Optional[str] = None
+
+    _required = field_validator("name")(_not_null)
+
+
+class NodeLabel(str, Enum):
+    """Node labels the API writes."""
+    ALBUM = "Album"
+    ARTIST = "Artist"
+    GENRE = "Genre"
+
+
+# Models validating create and update data, per label
+CREATE_MODELS = {NodeLabel.ALBUM: Album, NodeLabel.ARTIST: Artist, NodeLabel.GENRE: Genre}
+UPDATE_MODELS = {NodeLabel.ALBUM: AlbumUpdate, NodeLabel.ARTIST: ArtistUpdate, NodeLabel.GENRE: GenreUpdate}
+
+
+class BatchAction(str, Enum):
+    """What a batch operation does."""
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class BatchOperation(BaseModel):
+    """One write in a batch. ``data`` is validated per label in bulk later."""
+    op: BatchAction
+    label: NodeLabel
+    id: Optional[str] = None
+    data: Dict[str, Any] = Field(default_factory=dict)
+
+    @model_validator(mode="after")
+    def check_target(self) -> "BatchOperation":
+        if self.op is BatchAction.CREATE and self.id is not None:
+            raise ValueError("create operations get a server-assigned id")
+        if self.op is not BatchAction.CREATE and not self.id:
+            raise ValueError(f"{self.op.value} operations need an id")
+        if self.op is BatchAction.DELETE and self.data:
+            raise ValueError("delete operations take no data")
+        return self
+
+
+class BatchRequest(BaseModel):
+    """Writes applied together in one transaction."""
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=1000)
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[ModelT]) -> TypeAdapter:
+    """Cached ``TypeAdapter(list[model])`` for validating many rows in one call."""
+    return TypeAdapter(List[model])
+
+
+def validate_many(model: Type[ModelT], rows: Iterable[Dict[str, Any]]) -> List[ModelT]:
+    """Fully validate rows in a single pydantic-core call.
+
+    Errors are reported with the index of the offending row in their location.
+    """
+    return list_adapter(model).validate_python(rows if isinstance(rows, list) else list(rows))
+
+
+def parse_datetime(value: Any) -> Any:
+    """Parse datetimes we stored ourselves: ISO strings or neo4j temporal values."""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    to_native = getattr(value, "to_native", None)  # neo4j.time.DateTime
+    if to_native is not None and not isinstance(value, datetime):
+        return to_native()
+    return value
+
+
+def _field_type(annotation: Any) -> Any:
+    """The type inside ``Optional[...]``, or the annotation itself."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        non_null = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(non_null) == 1:
+            return non_null[0]
+    return annotation
+
+
+@lru_cache(maxsize=None)
+def _stored_converters(model: Type[BaseModel]) -> Tuple[Tuple[str, Callable[[Any], Any]], ...]:
+    """Conversions from stored values for datetime and enum fields."""
+    converters = []
+    for name, field in model.model_fields.items():
+        field_type = _field_type(field.annotation)
+        if field_type is datetime:
+            converters.append((name, parse_datetime))
+        elif isinstance(field_type, type) and issubclass(field_type, Enum):
+            converters.append((name, field_type))
+    return tuple(converters)
+
+
+def _construct(model: Type[ModelT], row: Dict[str, Any]) -> ModelT:
+    """``model_construct`` a stored row, converting datetimes and enums."""
+    values = {name: value for name, value in row.items() if name in model.model_fields}
+    for name, convert in _stored_converters(model):
+        if values.get(name) is not None:
+            try:
+                values[name] = convert(values[name])
+            except ValueError:
+                pass
+    return model.model_construct(**values)
+
+
+def from_db_rows(model: Type[ModelT], rows: Iterable[Dict[str, Any]]) -> List[ModelT]:
+    """Build models from rows we wrote ourselves, never rejecting them.
+
+    All rows go through pydantic-core in one call, which is the fastest
+    route to real model instances (faster than ``model_construct`` and its
+    per-field Python loop). Rows that fail validation, say stored before a
+    constraint was tightened, are kept via ``model_construct`` instead of
+    raising. Unknown properties are dropped either way.
+    """
+    rows = rows if isinstance(rows, list) else list(rows)
+    try:
+        return list_adapter(model).validate_python(rows)
+    except ValidationError:
+        pass
+    models = []
+    for row in rows:
+        try:
+            models.append(model.model_validate(row))
+        except ValidationError:
+            logger.debug(f"Stored {model.__name__} row {row.get('id')} failed validation, constructing it as is")
+            models.append(_construct(model, row))
+    return models
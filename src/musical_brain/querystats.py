@@ -0,0 +1,215 @@
+"""
+Per-query latency statistics and slow-query log for Musical Brain.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, UTC
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger(f"{__name__}.slow")
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+
+
+@lru_cache(maxsize=2048)
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and replace literals with ``?`` so equivalent queries group together."""
+    text = _STRING_LITERAL.sub("?", query)
+    text = _NUMBER_LITERAL.sub("?", text)
+    return " ".join(text.split())
+
+
+def parameter_shape(parameters: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Describe parameters by type and size without their values."""
+    shape = {}
+    for key, value in (parameters or {}).items():
+        if isinstance(value, (list, tuple)):
+            shape[key] = f"list[{len(value)}]"
+        elif isinstance(value, dict):
+            shape[key] = f"map[{len(value)}]"
+        else:
+            shape[key] = type(value).__name__
+    return shape
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100)))]
+
+
+class QueryTiming:
+    """Where the time of one query went, in milliseconds.
+
+    ``wait_ms`` runs until the transaction function starts (connection
+    acquisition and BEGIN), ``server_ms`` is the server's own
+    ``result_available_after + result_consumed_after`` and ``decode_ms`` is
+    the conversion of records to dicts. ``total_ms`` covers everything,
+    including network transfer.
+    """
+
+    __slots__ = ("started", "wait_ms", "server_ms", "decode_ms", "total_ms", "records", "attempts")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.wait_ms = 0.0
+        self.server_ms = 0.0
+        self.decode_ms = 0.0
+        self.total_ms = 0.0
+        self.records = 0
+        self.attempts = 0
+
+    def work_started(self):
+        """Mark the start of a (possibly retried) transaction function."""
+        self.attempts += 1
+        self.wait_ms = (time.perf_counter() - self.started) * 1000
+
+    def set_summary(self, summary: Any):
+        """Take server-side timings from a result summary, when the server reports them."""
+        self.server_ms = 0.0
+        for name in ("result_available_after", "result_consumed_after"):
+            value = getattr(summary, name, None)
+            if value is not None:
+                self.server_ms += value
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+
+class _QueryAggregate:
+    __slots__ = ("count", "errors", "records", "total_ms", "wait_ms", "server_ms", "decode_ms", "max_ms", "samples")
+
+    def __init__(self, sample_size: int):
+        self.count = 0
+        self.errors = 0
+        self.records = 0
+        self.total_ms = 0.0
+        self.wait_ms = 0.0
+        self.server_ms = 0.0
+        self.decode_ms = 0.0
+        self.max_ms = 0.0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+
+
+class QueryStats:
+    """Latency aggregates by normalised query text, plus a slow-query log.
+
+    Percentiles come from the most recent ``sample_size`` executions of each
+    query. Queries slower than ``slow_query_ms`` are logged at WARNING on the
+    ``musical_brain.querystats.slow`` logger with their timing breakdown,
+    parameter shape and record count, and kept in a bounded in-memory log.
+    ``observers`` are called with every finished query, even when
+    collection is disabled.
+    """
+
+    def __init__(
+        self,
+        slow_query_ms: Optional[float] = 500.0,
+        enabled: bool = True,
+        sample_size: int = 1024,
+        slow_log_size: int = 100,
+    ):
+        self.slow_query_ms = slow_query_ms
+        self.enabled = enabled
+        self.sample_size = sample_size
+        self._queries: Dict[str, _QueryAggregate] = {}
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        self.observers: List[Callable[[str, QueryTiming, Optional[BaseException]], None]] = []
+
+    def configure(self, slow_query_ms: Optional[float] = None, enabled: Optional[bool] = None):
+        """Change the slow-query threshold or toggle collection."""
+        if slow_query_ms is not None:
+            self.slow_query_ms = slow_query_ms
+        if enabled is not None:
+            self.enabled = enabled
+
+    def record(
+        self,
+        query: str,
+        parameters: Optional[Dict[str, Any]],
+        timing: QueryTiming,
+        error: Optional[BaseException] = None,
+    ):
+        """Add one finished query to the aggregates and the slow-query log."""
+        for observer in self.observers:
+            observer(query, timing, error)
+        if not self.enabled:
+            return
+        key = normalize_query(query)
+        with self._lock:
+            aggregate = self._queries.get(key)
+            if aggregate is None:
+                aggregate = self._queries[key] = _QueryAggregate(self.sample_size)
+            aggregate.count += 1
+            aggregate.errors += error is not None
+            aggregate.records += timing.records
+            aggregate.total_ms += timing.total_ms
+            aggregate.wait_ms += timing.wait_ms
+            aggregate.server_ms += timing.server_ms
+            aggregate.decode_ms += timing.decode_ms
+            aggregate.max_ms = max(aggregate.max_ms, timing.total_ms)
+            aggregate.samples.append(timing.total_ms)
+
+        if self.slow_query_ms is not None and timing.total_ms >= self.slow_query_ms:
+            entry = {
+                "at": datetime.now(UTC).isoformat(),
+                "query": key,
+                "parameters": parameter_shape(parameters),
+                "records": timing.records,
+                "attempts": timing.attempts,
+                "total_ms": round(timing.total_ms, 3),
+                "wait_ms": round(timing.wait_ms, 3),
+                "server_ms": round(timing.server_ms, 3),
+                "decode_ms": round(timing.decode_ms, 3),
+                "error": repr(error) if error is not None else None,
+            }
+            with self._lock:
+                self._slow.append(entry)
+            slow_logger.warning(
+                f"Slow query ({entry['total_ms']:.1f} ms: wait {entry['wait_ms']:.1f}, "
+                f"server {entry['server_ms']:.1f}, decode {entry['decode_ms']:.1f}; "
+                f"{entry['records']} records, params {entry['parameters']}): {key[:200]}"
+            )
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Aggregates per normalised query, the most total time first."""
+        with self._lock:
+            items = [(key, aggregate, sorted(aggregate.samples)) for key, aggregate in self._queries.items()]
+        rows = []
+        for key, a, ordered in items:
+            rows.append({
+                "query": key,
+                "count": a.count,
+                "errors": a.errors,
+                "records": a.records,
+                "total_ms": round(a.total_ms, 3),
+                "mean_ms": round(a.total_ms / a.count, 3),
+                "max_ms": round(a.max_ms, 3),
+                "p50_ms": round(_percentile(ordered, 50), 3),
+                "p95_ms": round(_percentile(ordered, 95), 3),
+                "p99_ms": round(_percentile(ordered, 99), 3),
+                "mean_wait_ms": round(a.wait_ms / a.count, 3),
+                "mean_server_ms": round(a.server_ms / a.count, 3),
+                "mean_decode_ms": round(a.decode_ms / a.count, 3),
+            })
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """The most recent slow queries, oldest first."""
+        with self._lock:
+            return list(self._slow)
+
+    def reset(self):
+        """Forget all aggregates and slow queries."""
+        with self._lock:
+            self._queries.clear()
+            self._slow.clear()
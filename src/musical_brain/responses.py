@@ -0,0 +1,90 @@
+"""
+Fast JSON encoding for Musical Brain API responses.
+
+Uses orjson when it is installed (``pip install musical-brain[speedups]``)
+and falls back to a compact stdlib encoder otherwise. Both handle node
+dicts, datetimes, enums and Pydantic models directly, so responses skip
+FastAPI's ``jsonable_encoder`` pass.
+"""
+
+import json
+import math
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson isn't installed
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Convert values the encoders don't know natively."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    iso_format = getattr(value, "iso_format", None)  # neo4j.time temporal types
+    if iso_format is not None:
+        return iso_format()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_stdlib_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default, allow_nan=False)
+
+
+def _finite(value: Any) -> Any:
+    """Copy of ``value`` with NaN and infinities replaced by None, as orjson writes them."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def dumps_stdlib(content: Any) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON with the standard library.
+
+    Non-finite floats are written as null, like orjson and pydantic do. The
+    encoder rejects them, and only then is the content copied without them.
+    """
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content)
+    try:
+        return _stdlib_encoder.encode(content).encode("utf-8")
+    except ValueError as e:
+        if "Out of range float values" not in str(e):
+            raise
+        return _stdlib_encoder.encode(_finite(content)).encode("utf-8")
+
+
+def dumps_orjson(content: Any) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON with orjson."""
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content)
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+dumps = dumps_orjson if orjson is not None else dumps_stdlib
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with :func:`dumps`.
+
+    Return it from an endpoint (rather than a plain dict) to bypass
+    ``jsonable_encoder``; Pydantic models are serialised by pydantic-core
+    without being validated again.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -2,22 +2,115 @@
 Generic CRUD operations for Musical Brain entities.
 """
 
+import base64
+import json
 import logging
 import uuid
+from contextlib import nullcontext
 from datetime import datetime, UTC
-from typing import Any, Dict, List, Optional
+from functools import lru_cache, partial
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, TypeVar, Union
 
+from musical_brain.cache import node_cache
 from musical_brain.database import db
+from musical_brain.metrics import instrumented
+from musical_brain.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-async def create_node(label: str, data: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a new node with the given label and data."""
-    node_id = str(uuid.uuid4())
-    now = datetime.now(UTC)
-    logger.info(f"Creating {label} node with ID: {node_id}")
-    
+# Natural keys that identify nodes across re-imports
+NATURAL_KEYS = {
+    "Album": ("title", "release_year"),
+    "Artist": ("name", "country"),
+    "Genre": ("name",),
+}
+
+# Natural keys that are unique across the whole graph, so upserts merge on them directly
+UNIQUE_KEYS = {
+    "Genre": ("name",),
+}
+
+# Property other upserts merge on. Only upserts set it, so its uniqueness
+# constraint doesn't stop nodes created through the API from sharing a natural key.
+# It holds the key fields as a JSON object, so updates to them can recompute it.
+IMPORT_KEY = "import_key"
+
+# Property matched by text search, per label
+SEARCH_FIELDS = {
+    "Album": "title",
+    "Artist": "name",
+    "Genre": "name",
+}
+
+# Rows per UNWIND statement for bulk writes
+DEFAULT_BATCH_SIZE = 1000
+
+# Edges per UNWIND statement; edge rows are small, so batches can be larger
+DEFAULT_EDGE_BATCH_SIZE = 10_000
+
+# Relationship types of the graph schema (docs/plan.md)
+RELATIONSHIP_TYPES = {
+    "CREATED",
+    "INFLUENCED_BY",
+    "COLLABORATED_WITH",
+    "MEMBER_OF",
+    "BELONGS_TO_GENRE",
+    "RELEASED_BY",
+    "CONTRIBUTED_BY",
+    "SIMILAR_TO",
+    "SUBGENRE_OF",
+    "ANCESTOR_OF",  # genre closure, maintained by musical_brain.genres
+}
+
+# Order in which apply_batch runs each kind of write
+BATCH_ACTIONS = ("create", "update", "delete")
+
+
+class BatchWrite(NamedTuple):
+    """One write for ``apply_batch``; ``node_id`` is None for creates."""
+    action: str
+    label: str
+    node_id: Optional[str]
+    data: Dict[str, Any]
+
+
+# Coalesces concurrent identical read queries into one round trip
+read_flight = SingleFlight()
+
+
+async def _coalesced_read(query: str, parameters: Optional[Dict[str, Any]] = None, generation: Any = None) -> list:
+    """Run a read query, sharing the round trip with identical concurrent reads.
+
+    Reads inside a transaction may see its uncommitted writes, so they are
+    never shared. Reads with different ``generation`` aren't shared either,
+    so a read that started before a cache invalidation serves no caller
+    who arrives after it.
+    """
+    parameters = parameters or {}
+    if db.in_transaction:
+        return await db.run_read(query, parameters)
+    key = (query, tuple(sorted(parameters.items())), generation)
+    return await read_flight.do(key, lambda: db.run_read(query, parameters))
+
+
+def _batches(rows: Iterable[T], batch_size: int) -> Iterator[List[T]]:
+    """Split rows into lists of at most ``batch_size`` items."""
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    batch: List[T] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _prepare_node_data(label: str, data: Dict[str, Any], node_id: str, now: datetime) -> Dict[str, Any]:
+    """Stamp ID and timestamps onto node data and convert datetimes for Neo4j."""
     # Prepare node data with ID and timestamps
     node_data = {
         "id": node_id,
@@ -34,79 +127,381 @@ async def create_node(label: str, data: Dict[str, Any]) -> Dict[str, Any]:
         if isinstance(value, datetime):
             node_data[key] = value.isoformat()
     
+    return node_data
+
+
+def _invalidate(label: str, node_id: str):
+    """Drop a written node from the cache.
+
+    Inside a transaction it is dropped again once the transaction ends:
+    until then other requests may cache its uncommitted value, which a
+    rollback makes wrong, or its old value, which the commit makes stale.
+    """
+    node_cache.invalidate(label, node_id)
+    if db.in_transaction:
+        db.after_transaction(partial(node_cache.invalidate, label, node_id))
+
+
+def _cache_node(label: str, node: Dict[str, Any]):
+    """Write a node through to the cache.
+
+    Writes inside an open transaction may still roll back, so they only
+    invalidate the entry.
+    """
+    if db.in_transaction:
+        _invalidate(label, node["id"])
+    else:
+        node_cache.set(label, node["id"], node)
+
+
+@instrumented
+async def create_node(label: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Create a new node with the given label and data."""
+    node_id = str(uuid.uuid4())
+    now = datetime.now(UTC)
+    logger.info(f"Creating {label} node with ID: {node_id}")
+    
+    node_data = _prepare_node_data(label, data, node_id, now)
+    
     query = f"""
     CREATE (n:{label} $props)
     RETURN n
     """
     
-    result = await db.run_query(query, {"props": node_data})
+    result = await db.run_write(query, {"props": node_data})
     if result:
         logger.info(f"Successfully created {label} node: {node_id}")
-        return dict(result[0]["n"])
+        node = dict(result[0]["n"])
+        _cache_node(label, node)
+        return node
     logger.error(f"Failed to create {label} node with ID: {node_id}")
     raise RuntimeError(f"Failed to create {label} node")
 
 
+@instrumented
+async def create_nodes(
+    label: str,
+    rows: Iterable[Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[str]:
+    """Create many nodes with the given label, one round trip per batch.
+
+    Each row is stamped exactly like ``create_node`` does. Returns the created
+    IDs in input order.
+    """
+    query = f"""
+    UNWIND $rows AS props
+    CREATE (n:{label})
+    SET n = props
+    RETURN count(n) AS created_count
+    """
+    
+    created_ids: List[str] = []
+    for batch in _batches(rows, batch_size):
+        props = [_prepare_node_data(label, data, str(uuid.uuid4()), datetime.now(UTC)) for data in batch]
+        result = await db.run_write(query, {"rows": props})
+        created = result[0]["created_count"] if result else 0
+        if created != len(props):
+            logger.error(f"Created {created} of {len(props)} {label} nodes in batch")
+            raise RuntimeError(f"Failed to create {label} nodes")
+        created_ids.extend(row["id"] for row in props)
+        logger.debug(f"Created batch of {len(props)} {label} nodes")
+    
+    logger.info(f"Successfully created {len(created_ids)} {label} nodes")
+    return created_ids
+
+
+def _import_key(node: Dict[str, Any], key_fields: Iterable[str]) -> str:
+    """IMPORT_KEY value of node data; missing or null key fields are encoded as null."""
+    return json.dumps({field: node.get(field) for field in key_fields}, sort_keys=True)
+
+
+def _upsert_row(label: str, key_fields: Sequence[str], data: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Split node data into the MERGE key, ON CREATE and ON MATCH properties."""
+    merges_on_import_key = _merges_on_import_key(label, key_fields)
+    # MERGE can't match a null property, but the import key can encode one
+    missing = [field for field in key_fields if data.get(field) is None]
+    if missing and not merges_on_import_key:
+        raise ValueError(f"Missing natural key fields for {label}: {', '.join(missing)}")
+    
+    update = {key: value for key, value in data.items() if key not in ("id", "created_at")}
+    if label in ["Album"]:
+        update["updated_at"] = now
+    for key, value in update.items():
+        if isinstance(value, datetime):
+            update[key] = value.isoformat()
+    
+    create = _prepare_node_data(label, data, str(uuid.uuid4()), now)
+    if merges_on_import_key:
+        key = {IMPORT_KEY: _import_key(create, key_fields)}
+        create.update(key)
+    else:
+        key = {field: create[field] for field in key_fields}
+    return {"key": key, "create": create, "update": update}
+
+
+def _merges_on_import_key(label: str, key_fields: Sequence[str]) -> bool:
+    """Whether upserts on these key fields merge on IMPORT_KEY rather than the fields."""
+    return tuple(key_fields) != UNIQUE_KEYS.get(label)
+
+
+def _merge_clause(label: str, key_fields: Sequence[str], row: str) -> str:
+    """Build a MERGE on the natural key that creates or updates the node."""
+    for field in key_fields:
+        if not field.isidentifier():
+            raise ValueError(f"Invalid key field: {field!r}")
+    if not key_fields:
+        raise ValueError("At least one key field is required")
+    if _merges_on_import_key(label, key_fields):
+        key_fields = (IMPORT_KEY,)
+    key_map = ", ".join(f"{field}: {row}.key.{field}" for field in key_fields)
+    return f"""
+    MERGE (n:{label} {{{key_map}}})
+    ON CREATE SET n += {row}.create
+    ON MATCH SET n += {row}.update
+    """
+
+
+@instrumented
+async def upsert_node(label: str, key_fields: Sequence[str], data: Dict[str, Any]) -> Dict[str, Any]:
+    """Create a node or update the one with the same natural key.
+
+    ``key_fields`` name the properties that identify the node (see
+    ``NATURAL_KEYS``). Unless the key is unique graph-wide
+    (``UNIQUE_KEYS``), the node is matched on its ``IMPORT_KEY``, so upserts
+    never merge into nodes created by ``create_node``, and key fields may be
+    null; unique keys must be present in ``data``. Updates that change a
+    ``NATURAL_KEYS`` field recompute the ``IMPORT_KEY``; changing other key
+    fields leaves it as it was. New nodes are stamped like ``create_node``; existing
+    ones keep their ID and created_at. Safe to retry.
+    """
+    logger.info(f"Upserting {label} node on {', '.join(key_fields)}")
+    query = _merge_clause(label, key_fields, "$row") + "RETURN n\n"
+    row = _upsert_row(label, key_fields, data, datetime.now(UTC))
+    
+    result = await db.run_write(query, {"row": row})
+    if result:
+        node = dict(result[0]["n"])
+        logger.info(f"Successfully upserted {label} node: {node['id']}")
+        _cache_node(label, node)
+        return node
+    logger.error(f"Failed to upsert {label} node")
+    raise RuntimeError(f"Failed to upsert {label} node")
+
+
+@instrumented
+async def upsert_nodes(
+    label: str,
+    key_fields: Sequence[str],
+    rows: Iterable[Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[str]:
+    """Upsert many nodes on their natural key, one round trip per batch.
+
+    Returns the IDs of the created or matched nodes in input order.
+    """
+    query = "UNWIND $rows AS row" + _merge_clause(label, key_fields, "row") + "RETURN n.id AS id\n"
+    
+    node_ids: List[str] = []
+    for batch in _batches(rows, batch_size):
+        now = datetime.now(UTC)
+        result = await db.run_write(query, {"rows": [_upsert_row(label, key_fields, data, now) for data in batch]})
+        batch_ids = [record["id"] for record in result]
+        for node_id in batch_ids:
+            _invalidate(label, node_id)
+        node_ids.extend(batch_ids)
+        logger.debug(f"Upserted batch of {len(batch)} {label} nodes")
+    
+    logger.info(f"Successfully upserted {len(node_ids)} {label} nodes")
+    return node_ids
+
+
+@instrumented
 async def get_node(label: str, node_id: str) -> Optional[Dict[str, Any]]:
     """Get a node by label and ID."""
     logger.debug(f"Fetching {label} node with ID: {node_id}")
+    generation = node_cache.generation(label, node_id)
+    cached = node_cache.get(label, node_id)
+    if cached is not None:
+        logger.debug(f"Cache hit for {label} node: {node_id}")
+        return cached
+    
     query = f"""
     MATCH (n:{label} {{id: $id}})
     RETURN n
     """
     
-    result = await db.run_query(query, {"id": node_id})
+    result = await _coalesced_read(query, {"id": node_id}, generation)
     if result:
         logger.debug(f"Found {label} node: {node_id}")
-        return dict(result[0]["n"])
+        node = dict(result[0]["n"])
+        if not db.in_transaction:
+            node_cache.set(label, node_id, node, generation)
+        return node
     logger.debug(f"{label} node not found: {node_id}")
     return None
 
 
-async def update_node(label: str, node_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Update a node with partial data."""
-    logger.info(f"Updating {label} node {node_id} with {len(updates)} fields")
-    if not updates:
-        logger.debug(f"No updates provided for {label} node: {node_id}")
-        return await get_node(label, node_id)
-    
+def _prepare_updates(label: str, updates: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Copy updates, stamping updated_at and converting datetimes for Neo4j."""
+    props = dict(updates)
     # Add updated_at timestamp for applicable nodes
-    if label in ["Album"]:
-        updates["updated_at"] = datetime.now(UTC).isoformat()
+    if props and label in ["Album"]:
+        props["updated_at"] = now
     
     # Convert datetime objects to ISO strings for Neo4j
-    for key, value in updates.items():
+    for key, value in props.items():
         if isinstance(value, datetime):
-            updates[key] = value.isoformat()
+            props[key] = value.isoformat()
+    return props
+
+
+@lru_cache(maxsize=None)
+def _update_query(label: str, with_before: bool) -> str:
+    """Update query text for a label.
+
+    The text doesn't depend on which fields change, so Neo4j plans it once
+    per label and reuses the cached plan.
+    """
+    if with_before:
+        return f"""
+    MATCH (n:{label} {{id: $id}})
+    WITH n, properties(n) AS before
+    SET n += $updates
+    RETURN n, before
+    """
+    return f"""
+    MATCH (n:{label} {{id: $id}})
+    SET n += $updates
+    RETURN n
+    """
+
+
+def _key_update_scope(label: str, updates: Iterable[Dict[str, Any]]):
+    """A transaction if any update changes a ``NATURAL_KEYS`` field, so the IMPORT_KEY changes with it."""
+    key_fields = set(NATURAL_KEYS.get(label, ()))
+    if any(key_fields.intersection(fields) for fields in updates):
+        return db.transaction()
+    return nullcontext()
+
+
+async def _refresh_import_keys(label: str, nodes: Iterable[Dict[str, Any]]):
+    """Recompute the IMPORT_KEY of upserted nodes whose key fields changed, updating ``nodes`` too."""
+    rows = []
+    for node in nodes:
+        key = node.get(IMPORT_KEY)
+        fields = json.loads(key) if isinstance(key, str) else None
+        if not isinstance(fields, dict):
+            continue
+        node[IMPORT_KEY] = _import_key(node, fields)
+        if node[IMPORT_KEY] != key:
+            rows.append({"id": node["id"], "key": node[IMPORT_KEY]})
+    if not rows:
+        return
+    await db.run_write(
+        f"""
+        UNWIND $rows AS row
+        MATCH (n:{label} {{id: row.id}})
+        SET n.{IMPORT_KEY} = row.key
+        """,
+        {"rows": rows},
+    )
+
+
+@instrumented
+async def apply_updates(
+    label: str,
+    node_id: str,
+    updates: Dict[str, Any],
+    changed_only: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """Apply a partial update to a node in a single round trip.
+
+    Returns the updated node, or only the properties whose values changed
+    when ``changed_only`` is set. Returns None if the node doesn't exist.
+    The caller's ``updates`` dict is left untouched. Changing a natural key
+    field of an upserted node also recomputes its IMPORT_KEY, in the same
+    transaction.
+    """
+    logger.info(f"Updating {label} node {node_id} with {len(updates)} fields")
+    props = _prepare_updates(label, updates, datetime.now(UTC))
     
-    # Build SET clause dynamically
-    set_parts = [f"n.{key} = $updates.{key}" for key in updates.keys()]
-    set_clause = ", ".join(set_parts)
+    async with _key_update_scope(label, [updates]):
+        result = await db.run_write(_update_query(label, changed_only), {"id": node_id, "updates": props})
+        if not result:
+            logger.warning(f"Failed to update {label} node (not found?): {node_id}")
+            return None
+        node = dict(result[0]["n"])
+        await _refresh_import_keys(label, [node])
     
+    logger.info(f"Successfully updated {label} node: {node_id}")
+    _cache_node(label, node)
+    if changed_only:
+        before = result[0]["before"]
+        return {key: value for key, value in node.items() if before.get(key) != value}
+    return node
+
+
+@instrumented
+async def apply_updates_many(
+    label: str,
+    updates: Iterable[Tuple[str, Dict[str, Any]]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[str]:
+    """Apply partial updates to many nodes, one round trip per batch.
+
+    ``updates`` yields ``(node_id, fields)`` pairs, e.g. ``mapping.items()``.
+    Returns the IDs of the nodes that were found and updated, in input order.
+    Batches that change natural key fields also recompute IMPORT_KEY, like
+    ``apply_updates``.
+    """
     query = f"""
-    MATCH (n:{label} {{id: $id}})
-    SET {set_clause}
-    RETURN n
+    UNWIND $rows AS row
+    MATCH (n:{label} {{id: row.id}})
+    SET n += row.updates
+    RETURN n.id AS id
     """
     
-    result = await db.run_query(query, {"id": node_id, "updates": updates})
-    if result:
-        logger.info(f"Successfully updated {label} node: {node_id}")
-        return dict(result[0]["n"])
-    logger.warning(f"Failed to update {label} node (not found?): {node_id}")
-    return None
+    key_fields = set(NATURAL_KEYS.get(label, ()))
+    updated_ids: List[str] = []
+    for batch in _batches(updates, batch_size):
+        now = datetime.now(UTC)
+        rows = [{"id": node_id, "updates": _prepare_updates(label, fields, now)} for node_id, fields in batch]
+        async with _key_update_scope(label, [fields for _, fields in batch]):
+            result = await db.run_write(query, {"rows": rows})
+            rekeyed = [node_id for node_id, fields in batch if key_fields.intersection(fields)]
+            if rekeyed:
+                imported = await db.run_read(
+                    f"MATCH (n:{label}) WHERE n.id IN $ids AND n.{IMPORT_KEY} IS NOT NULL RETURN n",
+                    {"ids": rekeyed},
+                )
+                await _refresh_import_keys(label, [dict(record["n"]) for record in imported])
+        for row in rows:
+            _invalidate(label, row["id"])
+        updated_ids.extend(record["id"] for record in result)
+        logger.debug(f"Updated {len(result)} of {len(rows)} {label} nodes in batch")
+    
+    logger.info(f"Successfully updated {len(updated_ids)} {label} nodes")
+    return updated_ids
+
+
+async def update_node(label: str, node_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Update a node with partial data."""
+    return await apply_updates(label, node_id, updates)
 
 
+@instrumented
 async def delete_node(label: str, node_id: str) -> bool:
-    """Delete a node by label and ID."""
+    """Delete a node by label and ID, together with its relationships."""
     logger.info(f"Deleting {label} node: {node_id}")
     query = f"""
     MATCH (n:{label} {{id: $id}})
-    DELETE n
+    DETACH DELETE n
     RETURN count(n) as deleted_count
     """
     
-    result = await db.run_query(query, {"id": node_id})
+    result = await db.run_write(query, {"id": node_id})
+    _invalidate(label, node_id)
     success = result and result[0]["deleted_count"] > 0
     if success:
         logger.info(f"Successfully deleted {label} node: {node_id}")
@@ -115,6 +510,77 @@ async def delete_node(label: str, node_id: str) -> bool:
     return success
 
 
+@instrumented
+async def delete_nodes(
+    label: str,
+    node_ids: Iterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[str]:
+    """Delete many nodes by ID with their relationships, one round trip per batch.
+
+    Returns the IDs of the nodes that were found and deleted.
+    """
+    query = f"""
+    UNWIND $ids AS id
+    MATCH (n:{label} {{id: id}})
+    WITH n, n.id AS id
+    DETACH DELETE n
+    RETURN id
+    """
+    
+    deleted_ids: List[str] = []
+    for batch in _batches(node_ids, batch_size):
+        result = await db.run_write(query, {"ids": batch})
+        for node_id in batch:
+            _invalidate(label, node_id)
+        deleted_ids.extend(record["id"] for record in result)
+        logger.debug(f"Deleted {len(result)} of {len(batch)} {label} nodes in batch")
+    
+    logger.info(f"Successfully deleted {len(deleted_ids)} {label} nodes")
+    return deleted_ids
+
+
+async def apply_batch(operations: Sequence[BatchWrite]) -> List[Dict[str, Any]]:
+    """Apply many writes in a single transaction.
+
+    Operations are grouped into one UNWIND statement per action and label;
+    all creates run first, then updates, then deletes. Returns a result per
+    operation in input order: the node ID and a status of ``created``,
+    ``updated``, ``deleted`` or ``not_found``. Any failure rolls back the
+    whole batch.
+    """
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for index, (action, label, _, _) in enumerate(operations):
+        if action not in BATCH_ACTIONS:
+            raise ValueError(f"Unknown batch action: {action}")
+        groups.setdefault((action, label), []).append(index)
+    
+    results: List[Dict[str, Any]] = [{} for _ in operations]
+    async with db.transaction():
+        for action in BATCH_ACTIONS:
+            for (group_action, label), indexes in groups.items():
+                if group_action != action:
+                    continue
+                if action == "create":
+                    ids = await create_nodes(label, [operations[i].data for i in indexes])
+                    for index, node_id in zip(indexes, ids):
+                        results[index] = {"id": node_id, "status": "created"}
+                    continue
+                targets = [operations[i].node_id for i in indexes]
+                if action == "update":
+                    updates = [(operations[i].node_id, operations[i].data) for i in indexes]
+                    found = set(await apply_updates_many(label, updates))
+                else:
+                    found = set(await delete_nodes(label, targets))
+                status = "updated" if action == "update" else "deleted"
+                for index, node_id in zip(indexes, targets):
+                    results[index] = {"id": node_id, "status": status if node_id in found else "not_found"}
+    
+    logger.info(f"Applied batch of {len(operations)} operations")
+    return results
+
+
+@instrumented
 async def list_nodes(label: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
     """List nodes of a given label with pagination."""
     logger.debug(f"Listing {label} nodes (limit={limit}, offset={offset})")
@@ -126,12 +592,101 @@ async def list_nodes(label: str, limit: int = 100, offset: int = 0) -> List[Dict
     LIMIT $limit
     """
     
-    result = await db.run_query(query, {"limit": limit, "offset": offset})
+    result = await _coalesced_read(query, {"limit": limit, "offset": offset})
     nodes = [dict(record["n"]) for record in result]
     logger.debug(f"Found {len(nodes)} {label} nodes")
     return nodes
 
 
+def encode_cursor(created_at: Any, node_id: str) -> str:
+    """Encode a (created_at, id) position as an opaque pagination cursor.
+
+    Lists sorted by another property pass its value instead of created_at.
+    """
+    raw = json.dumps([created_at, node_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, kind: Union[type, Tuple[type, ...]] = str) -> Tuple[Any, str]:
+    """Decode a pagination cursor into its (created_at, id) position.
+
+    ``kind`` is the type the sort value must have, ``str`` for created_at.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, node_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if not isinstance(created_at, kind) or isinstance(created_at, bool) or not isinstance(node_id, str):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return created_at, node_id
+
+
+@instrumented
+async def list_nodes_page(label: str, limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """List nodes of a given label with keyset (cursor) pagination.
+
+    Pages are ordered newest first with the ID as tiebreaker. Resuming from a
+    cursor seeks straight to the position on the created_at index, so deep
+    pages cost the same as the first one. Returns the page ``items`` and the
+    ``next_cursor`` (None on the last page).
+    """
+    logger.debug(f"Listing {label} nodes (limit={limit}, cursor={cursor})")
+    params: Dict[str, Any] = {"limit": limit + 1}
+    if cursor:
+        params["created_at"], params["id"] = decode_cursor(cursor)
+        # The first predicate is a range seek on the created_at index
+        where = "n.created_at <= $created_at AND (n.created_at < $created_at OR n.id < $id)"
+    else:
+        where = "n.created_at IS NOT NULL"
+    
+    query = f"""
+    MATCH (n:{label})
+    WHERE {where}
+    RETURN n
+    ORDER BY n.created_at DESC, n.id DESC
+    LIMIT $limit
+    """
+    
+    result = await _coalesced_read(query, params)
+    nodes = [dict(record["n"]) for record in result]
+    next_cursor = None
+    if len(nodes) > limit:
+        nodes = nodes[:limit]
+        next_cursor = encode_cursor(nodes[-1]["created_at"], nodes[-1]["id"])
+    logger.debug(f"Found {len(nodes)} {label} nodes")
+    return {"items": nodes, "next_cursor": next_cursor}
+
+
+async def iter_nodes(label: str) -> AsyncIterator[Dict[str, Any]]:
+    """Yield every node of a given label without buffering the whole result."""
+    logger.debug(f"Streaming {label} nodes")
+    query = f"""
+    MATCH (n:{label})
+    RETURN n
+    """
+    
+    async for record in db.stream_query(query):
+        yield dict(record["n"])
+
+
+@instrumented
+async def search_nodes(label: str, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Find nodes whose search field contains ``text``, ignoring case."""
+    field = SEARCH_FIELDS[label]
+    query = f"""
+    MATCH (n:{label})
+    WHERE toLower(n.{field}) CONTAINS $text
+    RETURN n
+    ORDER BY n.{field}
+    LIMIT $limit
+    """
+    
+    result = await _coalesced_read(query, {"text": text.lower(), "limit": limit})
+    return [dict(record["n"]) for record in result]
+
+
+@instrumented
 async def count_nodes(label: str) -> int:
     """Count total number of nodes with given label."""
     query = f"""
@@ -139,10 +694,158 @@ async def count_nodes(label: str) -> int:
     RETURN count(n) as total
     """
     
-    result = await db.run_query(query)
+    result = await _coalesced_read(query)
     return result[0]["total"] if result else 0
 
 
+def _check_relationship_type(rel_type: str):
+    """Relationship types are interpolated into queries, so only known ones pass."""
+    if rel_type not in RELATIONSHIP_TYPES:
+        raise ValueError(f"Unknown relationship type: {rel_type}")
+
+
+def _edge_row(edge: Sequence[Any]) -> Dict[str, Any]:
+    """``(start_id, end_id)`` or ``(start_id, end_id, properties)`` as an UNWIND row."""
+    start_id, end_id, *rest = edge
+    return {"start": start_id, "end": end_id, "props": rest[0] if rest and rest[0] else {}}
+
+
+@instrumented
+async def create_relationships(
+    start_label: str,
+    rel_type: str,
+    end_label: str,
+    edges: Iterable[Sequence[Any]],
+    batch_size: int = DEFAULT_EDGE_BATCH_SIZE,
+    merge: bool = False,
+) -> int:
+    """Link many node pairs by ID, one round trip per batch.
+
+    ``edges`` yields ``(start_id, end_id)`` or ``(start_id, end_id, properties)``.
+    Both ends are looked up through their label's ID constraint. With
+    ``merge`` an existing relationship is reused (and its properties
+    updated) instead of adding a parallel one. New relationships get a
+    ``created_at`` stamp. Pairs whose ends don't exist are skipped; returns
+    the number of relationships written.
+    """
+    _check_relationship_type(rel_type)
+    verb = "MERGE" if merge else "CREATE"
+    query = f"""
+    UNWIND $rows AS row
+    MATCH (a:{start_label} {{id: row.start}})
+    MATCH (b:{end_label} {{id: row.end}})
+    {verb} (a)-[r:{rel_type}]->(b)
+    SET r += row.props, r.created_at = coalesce(r.created_at, $now)
+    RETURN count(r) AS written_count
+    """
+    
+    now = datetime.now(UTC).isoformat()
+    written = 0
+    for batch in _batches(edges, batch_size):
+        rows = [_edge_row(edge) for edge in batch]
+        result = await db.run_write(query, {"rows": rows, "now": now})
+        count = result[0]["written_count"] if result else 0
+        if count != len(rows):
+            logger.warning(f"Wrote {count} of {len(rows)} {rel_type} relationships; missing nodes were skipped")
+        written += count
+    
+    logger.info(f"Successfully wrote {written} {start_label}-[:{rel_type}]->{end_label} relationships")
+    return written
+
+
+async def create_relationship(
+    start_label: str,
+    start_id: str,
+    rel_type: str,
+    end_label: str,
+    end_id: str,
+    properties: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """Link two nodes, reusing an existing relationship of the same type.
+
+    Returns False if either node doesn't exist.
+    """
+    edges = [(start_id, end_id, properties)]
+    return await create_relationships(start_label, rel_type, end_label, edges, merge=True) > 0
+
+
+@instrumented
+async def delete_relationships(
+    start_label: str,
+    rel_type: str,
+    end_label: str,
+    edges: Iterable[Sequence[Any]],
+    batch_size: int = DEFAULT_EDGE_BATCH_SIZE,
+) -> int:
+    """Delete every ``rel_type`` relationship between many node pairs.
+
+    ``edges`` yields ``(start_id, end_id)`` pairs. Returns the number of
+    relationships deleted.
+    """
+    _check_relationship_type(rel_type)
+    query = f"""
+    UNWIND $rows AS row
+    MATCH (a:{start_label} {{id: row.start}})-[r:{rel_type}]->(b:{end_label} {{id: row.end}})
+    DELETE r
+    RETURN count(r) AS deleted_count
+    """
+    
+    deleted = 0
+    for batch in _batches(edges, batch_size):
+        rows = [{"start": edge[0], "end": edge[1]} for edge in batch]
+        result = await db.run_write(query, {"rows": rows})
+        deleted += result[0]["deleted_count"] if result else 0
+    
+    logger.info(f"Deleted {deleted} {start_label}-[:{rel_type}]->{end_label} relationships")
+    return deleted
+
+
+async def delete_relationship(start_label: str, start_id: str, rel_type: str, end_label: str, end_id: str) -> bool:
+    """Unlink two nodes; returns False if they weren't linked."""
+    return await delete_relationships(start_label, rel_type, end_label, [(start_id, end_id)]) > 0
+
+
+@instrumented
+async def list_neighbours(
+    label: str,
+    node_id: str,
+    rel_type: Optional[str] = None,
+    direction: str = "out",
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """List the nodes linked to a node, optionally by one relationship type.
+
+    ``direction`` is ``out``, ``in`` or ``both``. Each item has the
+    relationship ``type``, its ``direction`` from this node, its
+    ``properties`` and the neighbour ``node`` with its ``labels``.
+    """
+    if rel_type is not None:
+        _check_relationship_type(rel_type)
+    if direction not in ("out", "in", "both"):
+        raise ValueError(f"Unknown direction: {direction}")
+    rel = f"[r:{rel_type}]" if rel_type else "[r]"
+    pattern = {"out": f"-{rel}->", "in": f"<-{rel}-", "both": f"-{rel}-"}[direction]
+    query = f"""
+    MATCH (n:{label} {{id: $id}}){pattern}(m)
+    RETURN type(r) AS type, startNode(r) = n AS outgoing, properties(r) AS properties, labels(m) AS labels, m
+    ORDER BY type, m.id
+    LIMIT $limit
+    """
+    
+    result = await _coalesced_read(query, {"id": node_id, "limit": limit})
+    return [
+        {
+            "type": record["type"],
+            "direction": "out" if record["outgoing"] else "in",
+            "properties": dict(record["properties"]),
+            "labels": list(record["labels"]),
+            "node": dict(record["m"]),
+        }
+        for record in result
+    ]
+
+
+@instrumented
 async def initialize_schema():
     """Create constraints and indexes for the graph schema."""
     constraints_and_indexes = [
@@ -151,13 +854,30 @@ async def initialize_schema():
         "CREATE CONSTRAINT artist_id_unique IF NOT EXISTS FOR (a:Artist) REQUIRE a.id IS UNIQUE",
         "CREATE CONSTRAINT genre_id_unique IF NOT EXISTS FOR (g:Genre) REQUIRE g.id IS UNIQUE",
         
-        # Indexes for common search fields
+        # Unique constraints for the keys upserts merge on (see UNIQUE_KEYS and IMPORT_KEY).
+        # Albums and artists created through the API may share a title and year or a
+        # name and country, so the earlier graph-wide constraints on those are dropped.
+        "DROP CONSTRAINT album_natural_key IF EXISTS",
+        "DROP CONSTRAINT artist_natural_key IF EXISTS",
+        "CREATE CONSTRAINT album_import_key_unique IF NOT EXISTS FOR (a:Album) REQUIRE a.import_key IS UNIQUE",
+        "CREATE CONSTRAINT artist_import_key_unique IF NOT EXISTS FOR (a:Artist) REQUIRE a.import_key IS UNIQUE",
+        # The constraint's own index replaces genre_name_index, which would block it
+        "DROP INDEX genre_name_index IF EXISTS",
+        "CREATE CONSTRAINT genre_name_unique IF NOT EXISTS FOR (g:Genre) REQUIRE g.name IS UNIQUE",
+        
+        # Indexes for common search fields (genre names are indexed by their constraint)
         "CREATE INDEX album_title_index IF NOT EXISTS FOR (a:Album) ON (a.title)",
         "CREATE INDEX artist_name_index IF NOT EXISTS FOR (a:Artist) ON (a.name)",
-        "CREATE INDEX genre_name_index IF NOT EXISTS FOR (g:Genre) ON (g.name)",
         
         # Index for date-based queries
         "CREATE INDEX album_created_at_index IF NOT EXISTS FOR (a:Album) ON (a.created_at)",
+        "CREATE INDEX artist_created_at_index IF NOT EXISTS FOR (a:Artist) ON (a.created_at)",
+        
+        # Indexes for sorting artists by influence (see musical_brain.influence)
+        "CREATE INDEX artist_influence_pagerank_index IF NOT EXISTS FOR (a:Artist) ON (a.influence_pagerank)",
+        "CREATE INDEX artist_influence_in_degree_index IF NOT EXISTS FOR (a:Artist) ON (a.influence_in_degree)",
+        "CREATE INDEX artist_influence_out_degree_index IF NOT EXISTS FOR (a:Artist) ON (a.influence_out_degree)",
+        "CREATE INDEX artist_influence_betweenness_index IF NOT EXISTS FOR (a:Artist) ON (a.influence_betweenness)",
     ]
     
     for constraint_or_index in constraints_and_indexes:
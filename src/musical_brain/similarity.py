@@ -0,0 +1,626 @@
+"""
+Album similarity for Musical Brain.
+
+Builds a feature vector per album from its genres, its artists and their
+influences, release year, review score and the TF-IDF of its review notes,
+finds each album's nearest neighbours by cosine similarity with blocked
+matrix products, and writes them as ``SIMILAR_TO`` edges with a ``score``.
+Vectors are stored sparse, a few dozen columns per album, and only one block
+at a time is made dense for the products.
+
+:func:`update_similar_albums` adds new albums to a built index without
+recomputing all pairs. Run a full build with ``python -m musical_brain.similarity
+--index similarity.npz``, which saves the index, then nightly runs with
+``--update`` load it, add the albums created since and save it again.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import sys
+import time
+import zlib
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from musical_brain.config import DatabaseSettings, SimilaritySettings
+from musical_brain.database import db
+from musical_brain.metrics import instrumented
+from musical_brain.services import DEFAULT_BATCH_SIZE, create_relationships
+
+logger = logging.getLogger(__name__)
+
+# Share of the cosine similarity each kind of feature contributes
+FEATURE_WEIGHTS = {"genres": 0.35, "artists": 0.25, "notes": 0.25, "year": 0.1, "score": 0.05}
+
+# Genre and artist IDs are hashed into this many columns each
+HASH_DIMS = 256
+
+# Weight of an influence of the album's artist, relative to the artist itself
+INFLUENCE_WEIGHT = 0.5
+
+# Bucket starts for release years and review scores
+YEAR_BUCKETS = np.arange(1900, 2031, 5)
+SCORE_BUCKETS = np.arange(0.0, 5.01, 0.5)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+class AlbumFeatures(NamedTuple):
+    """What an album's vector is built from."""
+    id: str
+    genres: Sequence[str] = ()
+    artists: Sequence[str] = ()
+    influences: Sequence[str] = ()
+    release_year: Optional[int] = None
+    review_score: Optional[float] = None
+    review_notes: Optional[str] = None
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def _hashed(value: str) -> int:
+    """Stable column for an ID; ``hash()`` is salted per process."""
+    return zlib.crc32(value.encode()) % HASH_DIMS
+
+
+def _soft_buckets(value: Optional[float], buckets: np.ndarray) -> Dict[int, float]:
+    """Weight by bucket: 1 for the nearest, 0.5 for its neighbours, so close values overlap."""
+    if value is None:
+        return {}
+    step = float(buckets[1] - buckets[0])
+    nearest = min(max(round((value - float(buckets[0])) / step), 0), len(buckets) - 1)
+    weights = {nearest: 1.0}
+    for neighbour in (nearest - 1, nearest + 1):
+        if 0 <= neighbour < len(buckets):
+            weights[neighbour] = 0.5
+    return weights
+
+
+def _positions(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Indices of the concatenated ranges ``starts[i]:starts[i] + lengths[i]``."""
+    total = int(lengths.sum())
+    ends = np.cumsum(lengths)
+    return np.repeat(starts - (ends - lengths), lengths) + np.arange(total, dtype=np.int64)
+
+
+class SparseRows:
+    """Feature rows stored sparse, like :class:`~musical_brain.snapshot.CSR`.
+
+    Row ``i`` sets ``columns[offsets[i]:offsets[i + 1]]`` to the matching
+    ``values``. Indexing with a slice or an array of rows returns them as a
+    dense ``(rows, dims)`` block.
+    """
+
+    def __init__(self, offsets: np.ndarray, columns: np.ndarray, values: np.ndarray, dims: int):
+        self.offsets = offsets
+        self.columns = columns
+        self.values = values
+        self.dims = dims
+
+    @classmethod
+    def empty(cls, dims: int) -> "SparseRows":
+        return cls(np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32), dims)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, rows) -> np.ndarray:
+        if isinstance(rows, slice):
+            rows = np.arange(*rows.indices(len(self)))
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        positions = _positions(starts, lengths)
+        out = np.zeros((len(rows), self.dims), dtype=np.float32)
+        out[np.repeat(np.arange(len(rows)), lengths), self.columns[positions]] = self.values[positions]
+        return out
+
+    def take(self, rows: np.ndarray) -> "SparseRows":
+        """Only the given rows, in that order, still sparse."""
+        starts = self.offsets[rows]
+        lengths = self.offsets[np.asarray(rows) + 1] - starts
+        positions = _positions(starts, lengths)
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return SparseRows(offsets, self.columns[positions], self.values[positions], self.dims)
+
+    def assign(self, rows: np.ndarray, new: "SparseRows") -> "SparseRows":
+        """These rows with ``rows[i]`` replaced by row ``i`` of ``new``; rows past the end are appended."""
+        n = max(len(self), int(rows.max()) + 1) if len(rows) else len(self)
+        starts = np.zeros(n, dtype=np.int64)
+        lengths = np.zeros(n, dtype=np.int64)
+        starts[:len(self)] = self.offsets[:-1]
+        lengths[:len(self)] = np.diff(self.offsets)
+        starts[rows] = new.offsets[:-1] + len(self.columns)
+        lengths[rows] = np.diff(new.offsets)
+        positions = _positions(starts, lengths)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return SparseRows(
+            offsets,
+            np.concatenate([self.columns, new.columns])[positions],
+            np.concatenate([self.values, new.values])[positions],
+            self.dims,
+        )
+
+
+def top_k_similar(
+    queries: Union[np.ndarray, SparseRows],
+    corpus: Union[np.ndarray, SparseRows],
+    k: int,
+    block_size: int = 1024,
+    exclude: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The ``k`` corpus rows with the highest dot product for each query row.
+
+    Products are taken ``block_size`` queries by ``block_size`` corpus rows
+    at a time, merging into a running top-k, so memory stays at a few
+    blocks whatever the corpus size. ``exclude[i]`` is a corpus row query
+    ``i`` must not match (usually itself). Either side may be
+    :class:`SparseRows`, made dense a block at a time. Returns
+    ``(indices, scores)`` of shape ``(len(queries), k)``, best first, padded
+    with -1 and -inf.
+    """
+    indices = np.full((len(queries), k), -1, dtype=np.int32)
+    scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    for qs in range(0, len(queries), block_size):
+        block = queries[qs:qs + block_size]
+        rows = np.arange(len(block))
+        best_i, best_s = indices[qs:qs + len(block)], scores[qs:qs + len(block)]
+        for cs in range(0, len(corpus), block_size):
+            products = block @ corpus[cs:cs + block_size].T
+            if exclude is not None:
+                local = exclude[qs:qs + len(block)] - cs
+                hit = (local >= 0) & (local < products.shape[1])
+                products[rows[hit], local[hit]] = -np.inf
+            columns = np.arange(cs, cs + products.shape[1], dtype=np.int32)
+            candidates_s = np.hstack([best_s, products])
+            candidates_i = np.hstack([best_i, np.broadcast_to(columns, products.shape)])
+            top = np.argpartition(-candidates_s, k - 1, axis=1)[:, :k]
+            best_s = np.take_along_axis(candidates_s, top, axis=1)
+            best_i = np.take_along_axis(candidates_i, top, axis=1)
+        order = np.argsort(-best_s, axis=1, kind="stable")
+        scores[qs:qs + len(block)] = np.take_along_axis(best_s, order, axis=1)
+        indices[qs:qs + len(block)] = np.take_along_axis(best_i, order, axis=1)
+    indices[np.isneginf(scores)] = -1
+    return indices, scores
+
+
+class SimilarityIndex:
+    """Album vectors and each album's ``top_k`` nearest neighbours.
+
+    Albums are numbered in the order they are added. The review-notes
+    vocabulary and IDF are fixed by :meth:`fit`; albums added later are
+    vectorised with them until the next fit.
+    """
+
+    def __init__(self, settings: Optional[SimilaritySettings] = None):
+        self.settings = settings or SimilaritySettings()
+        self.clear()
+
+    def clear(self):
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.vectors = SparseRows.empty(self.dims)
+        self.neighbours = np.zeros((0, self.settings.top_k), dtype=np.int32)
+        self.scores = np.zeros((0, self.settings.top_k), dtype=np.float32)
+        self.watermark: Optional[str] = None
+        self.fitted = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dims(self) -> int:
+        return 2 * HASH_DIMS + len(self.vocabulary) + len(YEAR_BUCKETS) + len(SCORE_BUCKETS)
+
+    def _fit_vocabulary(self, albums: Sequence[AlbumFeatures]):
+        """Keep the ``max_terms`` terms in most notes; IDF is smoothed like scikit-learn's."""
+        document_frequency = Counter(term for album in albums for term in set(tokenize(album.review_notes)))
+        terms = sorted(document_frequency, key=lambda term: (-document_frequency[term], term))
+        terms = terms[:self.settings.max_terms]
+        self.vocabulary = {term: column for column, term in enumerate(terms)}
+        frequencies = np.array([document_frequency[term] for term in terms], dtype=np.float64)
+        self.idf = (np.log((1 + len(albums)) / (1 + frequencies)) + 1).astype(np.float32)
+
+    def vectorise(self, albums: Sequence[AlbumFeatures]) -> SparseRows:
+        """Unit-length feature rows; each kind of feature is weighted by ``FEATURE_WEIGHTS``.
+
+        Each kind is scaled to unit length and by the square root of its
+        weight, then the row to unit length, so kinds an album lacks don't
+        count against it.
+        """
+        first_column = {"genres": 0, "artists": HASH_DIMS, "notes": 2 * HASH_DIMS}
+        first_column["year"] = first_column["notes"] + len(self.vocabulary)
+        first_column["score"] = first_column["year"] + len(YEAR_BUCKETS)
+        idf = self.idf.tolist()
+        lengths, columns, values = [], [], []
+        for album in albums:
+            artists = {_hashed(influence_id): INFLUENCE_WEIGHT for influence_id in album.influences}
+            artists.update((_hashed(artist_id), 1.0) for artist_id in album.artists)
+            counts = Counter(
+                self.vocabulary[term] for term in tokenize(album.review_notes) if term in self.vocabulary
+            )
+            kinds = {
+                "genres": {_hashed(genre_id): 1.0 for genre_id in album.genres},
+                "artists": artists,
+                "notes": {column: math.log1p(count) * idf[column] for column, count in counts.items()},
+                "year": _soft_buckets(album.release_year, YEAR_BUCKETS),
+                "score": _soft_buckets(album.review_score, SCORE_BUCKETS),
+            }
+            total = sum(FEATURE_WEIGHTS[name] for name, weights in kinds.items() if weights)
+            length = 0
+            for name, weights in kinds.items():
+                if not weights:
+                    continue
+                norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+                scale = math.sqrt(FEATURE_WEIGHTS[name] / total) / norm
+                columns.extend(first_column[name] + column for column in weights)
+                values.extend(weight * scale for weight in weights.values())
+                length += len(weights)
+            lengths.append(length)
+        offsets = np.zeros(len(albums) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return SparseRows(
+            offsets, np.array(columns, dtype=np.int32), np.array(values, dtype=np.float32), self.dims
+        )
+
+    def fit(self, albums: Sequence[AlbumFeatures]):
+        """Vectorise ``albums`` and find every album's neighbours from scratch."""
+        self.clear()
+        self._fit_vocabulary(albums)
+        self.ids = [album.id for album in albums]
+        self.index = {album_id: row for row, album_id in enumerate(self.ids)}
+        self.vectors = self.vectorise(albums)
+        rows = np.arange(len(albums), dtype=np.int32)
+        self.neighbours, self.scores = top_k_similar(
+            self.vectors, self.vectors, self.settings.top_k, self.settings.block_size, exclude=rows
+        )
+        self.fitted = True
+        logger.info(f"Fitted similarity index of {len(albums)} albums with {len(self.vocabulary)} terms")
+
+    def add(self, albums: Sequence[AlbumFeatures]) -> List[str]:
+        """Add new albums, or re-vectorise known ones; returns the albums whose neighbours changed.
+
+        The added albums get their neighbours from the whole index. Other
+        albums only gain added albums that beat their current neighbours,
+        so lists that lost a re-vectorised album may stay short until the
+        next :meth:`fit`.
+        """
+        if not albums:
+            return []
+        k = self.settings.top_k
+        rows = []
+        for album in albums:
+            row = self.index.get(album.id)
+            if row is None:
+                row = self.index[album.id] = len(self.ids)
+                self.ids.append(album.id)
+            rows.append(row)
+        rows = np.array(rows, dtype=np.int32)
+        grow = len(self.ids) - len(self.vectors)
+        self.vectors = self.vectors.assign(rows, self.vectorise(albums))
+        if grow:
+            self.neighbours = np.vstack([self.neighbours, np.full((grow, k), -1, dtype=np.int32)])
+            self.scores = np.vstack([self.scores, np.full((grow, k), -np.inf, dtype=np.float32)])
+
+        changed = np.zeros(len(self.ids), dtype=bool)
+        changed[rows] = True
+        self.neighbours[rows], self.scores[rows] = top_k_similar(
+            self.vectors[rows], self.vectors, k, self.settings.block_size, exclude=rows
+        )
+
+        # Cosine is symmetric: the products above, transposed, are what the
+        # other albums score against the added ones
+        added = self.vectors[rows]
+        for cs in range(0, len(self.ids), self.settings.block_size):
+            ce = min(cs + self.settings.block_size, len(self.ids))
+            products = self.vectors[cs:ce] @ added.T
+            current_i, current_s = self.neighbours[cs:ce], self.scores[cs:ce]
+            stale = np.isin(current_i, rows)
+            affected = (products > current_s[:, -1:]).any(axis=1) | stale.any(axis=1)
+            affected &= ~changed[cs:ce]
+            if not affected.any():
+                continue
+            candidates_s = np.hstack([np.where(stale, -np.inf, current_s)[affected], products[affected]])
+            candidates_i = np.hstack([current_i[affected], np.broadcast_to(rows, (int(affected.sum()), len(rows)))])
+            top = np.argpartition(-candidates_s, k - 1, axis=1)[:, :k]
+            best_s = np.take_along_axis(candidates_s, top, axis=1)
+            best_i = np.take_along_axis(candidates_i, top, axis=1)
+            order = np.argsort(-best_s, axis=1, kind="stable")
+            best_s = np.take_along_axis(best_s, order, axis=1).astype(np.float32)
+            best_i = np.take_along_axis(best_i, order, axis=1)
+            best_i[np.isneginf(best_s)] = -1
+            block_rows = np.flatnonzero(affected) + cs
+            differs = (best_i != self.neighbours[block_rows]).any(axis=1)
+            self.neighbours[block_rows], self.scores[block_rows] = best_i, best_s
+            changed[block_rows[differs]] = True
+        return [self.ids[row] for row in np.flatnonzero(changed).tolist()]
+
+    def remove(self, album_ids: Iterable[str]) -> List[str]:
+        """Drop albums from the index; returns the remaining albums whose neighbours changed.
+
+        Albums that had a dropped album as a neighbour are searched again
+        over the whole index, so their lists stay full.
+        """
+        rows = sorted({self.index[album_id] for album_id in album_ids if album_id in self.index})
+        if not rows:
+            return []
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[rows] = False
+        # One extra slot so the -1 padding maps to itself
+        renumber = np.full(len(self.ids) + 1, -1, dtype=np.int32)
+        renumber[:-1][keep] = np.arange(int(keep.sum()), dtype=np.int32)
+        lost = np.append(~keep, False)[self.neighbours[keep]]
+
+        kept = np.flatnonzero(keep)
+        self.ids = [self.ids[row] for row in kept.tolist()]
+        self.index = {album_id: row for row, album_id in enumerate(self.ids)}
+        self.vectors = self.vectors.take(kept)
+        self.neighbours = renumber[self.neighbours[keep]]
+        self.scores = self.scores[keep]
+        affected = np.flatnonzero(lost.any(axis=1)).astype(np.int32)
+        if len(affected):
+            self.neighbours[affected], self.scores[affected] = top_k_similar(
+                self.vectors[affected], self.vectors, self.settings.top_k, self.settings.block_size, exclude=affected
+            )
+        return [self.ids[row] for row in affected.tolist()]
+
+    def save(self, path: str):
+        """Write the index to ``path`` for :meth:`load`, replacing any earlier save in one step."""
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            np.savez(
+                file,
+                ids=np.array(self.ids, dtype=str),
+                terms=np.array(list(self.vocabulary), dtype=str),
+                idf=self.idf,
+                offsets=self.vectors.offsets,
+                columns=self.vectors.columns,
+                values=self.vectors.values,
+                neighbours=self.neighbours,
+                scores=self.scores,
+                watermark=np.array([] if self.watermark is None else [self.watermark], dtype=str),
+            )
+        os.replace(temporary, path)
+        logger.info(f"Saved similarity index of {len(self)} albums to {path}")
+
+    @classmethod
+    def load(cls, path: str, settings: Optional[SimilaritySettings] = None) -> "SimilarityIndex":
+        """Read an index written by :meth:`save`.
+
+        It comes back unfitted, so the next update builds it in full, if it
+        was saved with a different ``top_k``.
+        """
+        index = cls(settings)
+        with np.load(path) as saved:
+            if saved["neighbours"].shape[1] != index.settings.top_k:
+                logger.warning(f"Similarity index at {path} has a different top_k; it will be rebuilt")
+                return index
+            index.ids = saved["ids"].tolist()
+            index.index = {album_id: row for row, album_id in enumerate(index.ids)}
+            index.vocabulary = {term: column for column, term in enumerate(saved["terms"].tolist())}
+            index.idf = saved["idf"]
+            index.vectors = SparseRows(saved["offsets"], saved["columns"], saved["values"], index.dims)
+            index.neighbours = saved["neighbours"]
+            index.scores = saved["scores"]
+            index.watermark = next(iter(saved["watermark"].tolist()), None)
+        index.fitted = True
+        logger.info(f"Loaded similarity index of {len(index)} albums from {path}")
+        return index
+
+    def similar(self, album_id: str) -> List[Tuple[str, float]]:
+        """``(album_id, score)`` of an album's neighbours at or above ``min_score``, best first."""
+        row = self.index.get(album_id)
+        if row is None:
+            return []
+        return [
+            (self.ids[neighbour], score)
+            for neighbour, score in zip(self.neighbours[row].tolist(), self.scores[row].tolist())
+            if neighbour >= 0 and score >= self.settings.min_score
+        ]
+
+    def edges(self, album_ids: Iterable[str]) -> List[Tuple[str, str, Dict[str, float]]]:
+        """``SIMILAR_TO`` edges of the given albums, for ``create_relationships``."""
+        return [
+            (album_id, neighbour_id, {"score": round(score, 4)})
+            for album_id in album_ids
+            for neighbour_id, score in self.similar(album_id)
+        ]
+
+
+# Global similarity index instance
+similarity_index = SimilarityIndex()
+
+
+async def fetch_album_features(
+    where: str = "", parameters: Optional[dict] = None
+) -> Tuple[List[AlbumFeatures], Optional[str]]:
+    """Stream the features of the albums matching ``where`` (on ``a``) from the database.
+
+    Also returns the latest ``created_at`` among them, the next watermark.
+    """
+    parameters = parameters or {}
+    albums = {}
+    async for row in db.stream_query(
+        f"""
+        MATCH (a:Album) {where}
+        RETURN a.id AS id, a.release_year AS release_year, a.review_score AS review_score,
+               a.review_notes AS review_notes, a.created_at AS created_at
+        """,
+        parameters,
+    ):
+        albums[row["id"]] = row
+    genres, artists = defaultdict(list), defaultdict(list)
+    async for row in db.stream_query(
+        f"MATCH (a:Album)-[:BELONGS_TO_GENRE]->(g:Genre) {where} RETURN a.id AS album, g.id AS genre", parameters
+    ):
+        genres[row["album"]].append(row["genre"])
+    async for row in db.stream_query(
+        f"MATCH (r:Artist)-[:CREATED]->(a:Album) {where} RETURN a.id AS album, r.id AS artist", parameters
+    ):
+        artists[row["album"]].append(row["artist"])
+    influences = defaultdict(list)
+    creators = sorted({artist_id for ids in artists.values() for artist_id in ids})
+    async for row in db.stream_query(
+        "MATCH (r:Artist)-[:INFLUENCED_BY]->(i:Artist) WHERE r.id IN $ids RETURN r.id AS artist, i.id AS influence",
+        {"ids": creators},
+    ):
+        influences[row["artist"]].append(row["influence"])
+    features = [
+        AlbumFeatures(
+            id=album_id,
+            genres=genres[album_id],
+            artists=artists[album_id],
+            influences=[influence for artist_id in artists[album_id] for influence in influences[artist_id]],
+            release_year=row["release_year"],
+            review_score=row["review_score"],
+            review_notes=row["review_notes"],
+        )
+        for album_id, row in albums.items()
+    ]
+    stamps = [row["created_at"] for row in albums.values() if isinstance(row["created_at"], str)]
+    return features, max(stamps, default=None)
+
+
+@instrumented
+async def write_similar_albums(
+    index: SimilarityIndex, album_ids: Sequence[str], batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """Replace the outgoing ``SIMILAR_TO`` edges of ``album_ids`` with the index's.
+
+    Each batch of albums is swapped in its own transaction, so readers never
+    see an album without its neighbours. Returns the number of edges written.
+    """
+    written = 0
+    for i in range(0, len(album_ids), batch_size):
+        batch = list(album_ids[i:i + batch_size])
+        async with db.transaction():
+            await db.run_write(
+                """
+                UNWIND $ids AS id
+                MATCH (:Album {id: id})-[r:SIMILAR_TO]->(:Album)
+                DELETE r
+                """,
+                {"ids": batch},
+            )
+            written += await create_relationships("Album", "SIMILAR_TO", "Album", index.edges(batch))
+    logger.info(f"Wrote {written} SIMILAR_TO edges for {len(album_ids)} albums")
+    return written
+
+
+async def build_similar_albums(index: Optional[SimilarityIndex] = None) -> Dict[str, Any]:
+    """Fit the index on every album and rewrite all ``SIMILAR_TO`` edges."""
+    index = similarity_index if index is None else index
+    started = time.perf_counter()
+    albums, watermark = await fetch_album_features()
+    fetched = time.perf_counter()
+    index.fit(albums)
+    index.watermark = watermark
+    fitted = time.perf_counter()
+    written = await write_similar_albums(index, index.ids)
+    stats = {
+        "albums": len(index),
+        "edges": written,
+        "fetch_ms": round((fetched - started) * 1000, 1),
+        "fit_ms": round((fitted - fetched) * 1000, 1),
+        "write_ms": round((time.perf_counter() - fitted) * 1000, 1),
+    }
+    logger.info(f"Built album similarity: {stats}")
+    return stats
+
+
+async def update_similar_albums(
+    album_ids: Optional[Sequence[str]] = None, index: Optional[SimilarityIndex] = None
+) -> Dict[str, Any]:
+    """Add albums to the index and rewrite the edges of every album whose neighbours changed.
+
+    Without ``album_ids``, adds the albums created since the last build or
+    update. Albums no longer in the database are dropped from the index
+    first. An index that hasn't been built yet is built in full.
+    """
+    index = similarity_index if index is None else index
+    if not index.fitted:
+        return await build_similar_albums(index)
+    if album_ids is not None:
+        albums, watermark = await fetch_album_features("WHERE a.id IN $ids", {"ids": list(album_ids)})
+    elif index.watermark is not None:
+        albums, watermark = await fetch_album_features("WHERE a.created_at > $since", {"since": index.watermark})
+    else:
+        return await build_similar_albums(index)
+    existing = {row["id"] async for row in db.stream_query("MATCH (a:Album) RETURN a.id AS id")}
+    removed = [album_id for album_id in index.ids if album_id not in existing]
+    changed = set(index.remove(removed))
+    changed.update(index.add(albums))
+    changed = [album_id for album_id in index.ids if album_id in changed]
+    if watermark is not None and (index.watermark is None or watermark > index.watermark):
+        index.watermark = watermark
+    written = await write_similar_albums(index, changed)
+    logger.info(
+        f"Added {len(albums)} and removed {len(removed)} albums in the similarity index; "
+        f"{len(changed)} albums changed neighbours"
+    )
+    return {"albums": len(albums), "removed": len(removed), "changed": len(changed), "edges": written}
+
+
+async def run_similarity_job(
+    index_path: Optional[str] = None, update: bool = False, settings: Optional[SimilaritySettings] = None
+) -> Dict[str, Any]:
+    """Build similar albums in full, or with ``update`` update the index saved at ``index_path``.
+
+    The index is saved to ``index_path`` afterwards, for the next update.
+    An update without a saved index builds in full.
+    """
+    settings = settings or SimilaritySettings.from_env()
+    if update and index_path and os.path.exists(index_path):
+        index = SimilarityIndex.load(index_path, settings)
+        stats = await update_similar_albums(index=index)
+    else:
+        if update:
+            logger.warning(f"No saved similarity index at {index_path}; building in full")
+        index = SimilarityIndex(settings)
+        stats = await build_similar_albums(index)
+    if index_path:
+        index.save(index_path)
+    return stats
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compute similar albums and write them as SIMILAR_TO edges.")
+    parser.add_argument("--index", help="Where the index is saved (default from MUSICAL_BRAIN_SIMILARITY_INDEX_PATH)")
+    parser.add_argument("--update", action="store_true",
+                        help="Only add the albums created since the saved index was built or updated")
+    parser.add_argument("--uri", help="Database URI (default from MUSICAL_BRAIN_NEO4J_URI)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("musical_brain.services").setLevel(logging.WARNING)
+    settings = DatabaseSettings.from_env()
+    if args.uri:
+        settings = settings.model_copy(update={"uri": args.uri})
+    similarity_settings = SimilaritySettings.from_env()
+    await db.connect(settings=settings)
+    try:
+        stats = await run_similarity_job(args.index or similarity_settings.index_path, args.update, similarity_settings)
+    finally:
+        await db.disconnect()
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
@@ -0,0 +1,366 @@
+"""
+In-memory graph snapshot for traversal analytics.
+
+Streams the nodes and relationships out of the database once and packs
+each relationship type into compressed sparse row (CSR) arrays, so BFS,
+k-hop neighbourhoods and degrees are array lookups in-process instead of a
+round trip per hop. :func:`refresh_graph_snapshot` then pulls only what was
+created after the snapshot's ``created_at`` watermark.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from musical_brain.database import db
+from musical_brain.metrics import instrumented
+from musical_brain.models import NodeLabel
+from musical_brain.services import RELATIONSHIP_TYPES
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ("out", "in", "both")
+
+_EMPTY = np.empty(0, dtype=np.int32)
+
+
+class CSR(NamedTuple):
+    """Adjacency of one relationship type and direction.
+
+    The neighbours of node ``i`` are ``targets[offsets[i]:offsets[i + 1]]``.
+    """
+    offsets: np.ndarray
+    targets: np.ndarray
+
+    def neighbours(self, node: int) -> np.ndarray:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+
+def pack_csr(sources: np.ndarray, targets: np.ndarray, n: int) -> CSR:
+    """Pack ``sources[i] -> targets[i]`` edges over ``n`` nodes into a CSR."""
+    order = np.argsort(sources, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int32)
+    np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+    return CSR(offsets, targets[order].astype(np.int32, copy=False))
+
+
+def _gather(csr: CSR, frontier: np.ndarray) -> np.ndarray:
+    """Neighbours of every node in ``frontier``, concatenated."""
+    if len(frontier) == 1:
+        return csr.neighbours(int(frontier[0]))
+    starts = csr.offsets[frontier]
+    lengths = csr.offsets[frontier + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return _EMPTY
+    # Position j of node k's run is starts[k] + j
+    shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return csr.targets[np.arange(total) + shifts]
+
+
+class GraphSnapshot:
+    """Nodes and relationships of the graph as int32 CSR arrays.
+
+    Nodes are numbered in the order they are added; ``ids`` and ``index``
+    map between node IDs and numbers. Edges are kept per relationship type
+    as parallel ``sources``/``targets`` arrays and packed into a CSR per
+    direction on first use, cached until that type changes.
+    """
+
+    def __init__(self, labels: Optional[Sequence[str]] = None, rel_types: Optional[Iterable[str]] = None):
+        self.labels = tuple(labels or (label.value for label in NodeLabel))
+        self.rel_types = tuple(sorted(rel_types or RELATIONSHIP_TYPES))
+        self.clear()
+
+    def clear(self):
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._label_codes: List[int] = []
+        self._edges: Dict[str, Tuple[np.ndarray, np.ndarray]] = {t: (_EMPTY, _EMPTY) for t in self.rel_types}
+        self._csr: Dict[Tuple[str, str], CSR] = {}
+        self._seen = np.zeros(0, dtype=bool)
+        self.skipped: Dict[str, int] = {t: 0 for t in self.rel_types}  # edges with an end outside the snapshot
+        self.watermark: Optional[str] = None
+        self.loaded = False
+
+    def replace(self, other: "GraphSnapshot"):
+        """Take over the contents of ``other``, e.g. after building it off to the side."""
+        self.labels, self.rel_types = other.labels, other.rel_types
+        self.ids, self.index, self._label_codes = other.ids, other.index, other._label_codes
+        self._edges, self._csr, self._seen = other._edges, other._csr, other._seen
+        self.skipped, self.watermark, self.loaded = other.skipped, other.watermark, other.loaded
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _advance(self, stamp: Any):
+        if isinstance(stamp, str) and (self.watermark is None or stamp > self.watermark):
+            self.watermark = stamp
+
+    # Building
+
+    def add_nodes(self, label: str, nodes: Iterable[Tuple[str, Any]]) -> int:
+        """Add ``(node_id, created_at)`` pairs of one label; returns how many were new."""
+        code = self.labels.index(label)
+        added = 0
+        for node_id, created_at in nodes:
+            self._advance(created_at)
+            if node_id in self.index:
+                continue
+            self.index[node_id] = len(self.ids)
+            self.ids.append(node_id)
+            self._label_codes.append(code)
+            added += 1
+        if added:
+            self._csr.clear()  # offsets are sized by the node count
+        return added
+
+    def add_edges(self, rel_type: str, edges: Iterable[Tuple[str, str, Any]]) -> int:
+        """Add ``(start_id, end_id, created_at)`` relationships; returns how many were added.
+
+        Relationships with an end that isn't in the snapshot are counted in
+        ``skipped`` and otherwise ignored.
+        """
+        self._check_type(rel_type)
+        index = self.index
+        sources: List[int] = []
+        targets: List[int] = []
+        skipped = 0
+        for start_id, end_id, created_at in edges:
+            self._advance(created_at)
+            start, end = index.get(start_id), index.get(end_id)
+            if start is None or end is None:
+                skipped += 1
+                continue
+            sources.append(start)
+            targets.append(end)
+        self.skipped[rel_type] += skipped
+        if sources:
+            old_sources, old_targets = self._edges[rel_type]
+            self._edges[rel_type] = (
+                np.concatenate([old_sources, np.array(sources, dtype=np.int32)]),
+                np.concatenate([old_targets, np.array(targets, dtype=np.int32)]),
+            )
+            self._csr.pop((rel_type, "out"), None)
+            self._csr.pop((rel_type, "in"), None)
+        return len(sources)
+
+    # Lookups
+
+    def _check_type(self, rel_type: str):
+        if rel_type not in self._edges:
+            raise ValueError(f"Relationship type not in snapshot: {rel_type}")
+
+    def _node(self, node_id: str) -> int:
+        index = self.index.get(node_id)
+        if index is None:
+            raise KeyError(f"Node not in snapshot: {node_id}")
+        return index
+
+    def label_of(self, node_id: str) -> str:
+        return self.labels[self._label_codes[self._node(node_id)]]
+
+    def nodes_with_label(self, label: str) -> np.ndarray:
+        """Indexes of the nodes with ``label``, ascending."""
+        codes = np.array(self._label_codes, dtype=np.int8)
+        return np.flatnonzero(codes == self.labels.index(label)).astype(np.int32)
+
+    def edges(self, rel_type: str) -> Tuple[np.ndarray, np.ndarray]:
+        """The ``(sources, targets)`` index arrays of a relationship type."""
+        self._check_type(rel_type)
+        return self._edges[rel_type]
+
+    def edge_count(self, rel_type: Optional[str] = None) -> int:
+        if rel_type is not None:
+            return len(self.edges(rel_type)[0])
+        return sum(len(sources) for sources, _ in self._edges.values())
+
+    def csr(self, rel_type: str, direction: str = "out") -> CSR:
+        """Outgoing (``out``) or incoming (``in``) adjacency of a relationship type."""
+        key = (rel_type, direction)
+        csr = self._csr.get(key)
+        if csr is None:
+            if direction not in ("out", "in"):
+                raise ValueError(f"CSR direction must be out or in, not {direction}")
+            sources, targets = self.edges(rel_type)
+            if direction == "in":
+                sources, targets = targets, sources
+            csr = self._csr[key] = pack_csr(sources, targets, len(self.ids))
+        return csr
+
+    def _csrs(self, rel_types: Optional[Sequence[str]], direction: str) -> List[CSR]:
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction: {direction}")
+        if isinstance(rel_types, str):
+            rel_types = [rel_types]
+        directions = ("out", "in") if direction == "both" else (direction,)
+        return [self.csr(rel_type, d) for rel_type in rel_types or self.rel_types for d in directions]
+
+    def degrees(self, rel_types: Optional[Sequence[str]] = None, direction: str = "out") -> np.ndarray:
+        """Degree of every node, summed over ``rel_types`` (default all)."""
+        total = np.zeros(len(self.ids), dtype=np.int32)
+        for csr in self._csrs(rel_types, direction):
+            total += csr.degrees()
+        return total
+
+    def degree(self, node_id: str, rel_types: Optional[Sequence[str]] = None, direction: str = "out") -> int:
+        node = self._node(node_id)
+        return sum(int(csr.offsets[node + 1] - csr.offsets[node]) for csr in self._csrs(rel_types, direction))
+
+    def neighbours(
+        self, node_id: str, rel_types: Optional[Sequence[str]] = None, direction: str = "out"
+    ) -> List[str]:
+        """IDs of the distinct nodes one hop from ``node_id``."""
+        return self.k_hop(node_id, 1, rel_types, direction)
+
+    def levels(
+        self,
+        node: int,
+        rel_types: Optional[Sequence[str]] = None,
+        direction: str = "out",
+        max_depth: Optional[int] = None,
+    ) -> List[np.ndarray]:
+        """Breadth-first levels from node index ``node``; level 0 is ``[node]``.
+
+        Each level holds the distinct, ascending indexes first reached at
+        that depth. Costs grow with the part of the graph reached, not with
+        its size: the visited mask is reused and only touched entries reset.
+        """
+        csrs = self._csrs(rel_types, direction)
+        if len(self._seen) < len(self.ids):
+            self._seen = np.zeros(len(self.ids), dtype=bool)
+        seen = self._seen
+        frontier = np.array([node], dtype=np.int32)
+        levels = [frontier]
+        seen[node] = True
+        try:
+            while max_depth is None or len(levels) <= max_depth:
+                parts = [_gather(csr, frontier) for csr in csrs]
+                reached = parts[0] if len(parts) == 1 else np.concatenate(parts)
+                reached = reached[~seen[reached]]
+                if len(reached) > 1:
+                    reached = np.unique(reached)
+                if not len(reached):
+                    break
+                seen[reached] = True
+                levels.append(reached)
+                frontier = reached
+        finally:
+            for level in levels:
+                seen[level] = False
+        return levels
+
+    def bfs(
+        self,
+        node_id: str,
+        rel_types: Optional[Sequence[str]] = None,
+        direction: str = "out",
+        max_depth: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """Hop distance from ``node_id`` to every node it reaches, itself included."""
+        levels = self.levels(self._node(node_id), rel_types, direction, max_depth)
+        ids = self.ids
+        return {ids[i]: depth for depth, level in enumerate(levels) for i in level.tolist()}
+
+    def k_hop(
+        self,
+        node_id: str,
+        k: int,
+        rel_types: Optional[Sequence[str]] = None,
+        direction: str = "out",
+    ) -> List[str]:
+        """IDs of the nodes within ``k`` hops of ``node_id``, nearest first."""
+        levels = self.levels(self._node(node_id), rel_types, direction, max_depth=k)
+        ids = self.ids
+        return [ids[i] for level in levels[1:] for i in level.tolist()]
+
+    def label_counts(self) -> Dict[str, int]:
+        counts = np.bincount(np.array(self._label_codes, dtype=np.int64), minlength=len(self.labels))
+        return dict(zip(self.labels, counts.tolist()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "nodes": len(self.ids),
+            "edges": {rel_type: len(sources) for rel_type, (sources, _) in self._edges.items()},
+            "skipped": dict(self.skipped),
+            "watermark": self.watermark,
+        }
+
+
+# Global graph snapshot instance
+graph_snapshot = GraphSnapshot()
+
+
+async def _fetch_into(snapshot: GraphSnapshot, since: Optional[str]) -> Tuple[int, int]:
+    """Stream nodes and relationships (created after ``since``) into ``snapshot``."""
+    where = "WHERE x.created_at > $since" if since is not None else ""
+    params = {"since": since}
+    nodes = edges = 0
+    for label in snapshot.labels:
+        query = f"MATCH (x:{label}) {where} RETURN x.id AS id, x.created_at AS created_at"
+        rows = [(row["id"], row["created_at"]) async for row in db.stream_query(query, params)]
+        nodes += snapshot.add_nodes(label, rows)
+    for rel_type in snapshot.rel_types:
+        query = f"MATCH (a)-[x:{rel_type}]->(b) {where} RETURN a.id AS start, b.id AS end, x.created_at AS created_at"
+        rows = [(row["start"], row["end"], row["created_at"]) async for row in db.stream_query(query, params)]
+        edges += snapshot.add_edges(rel_type, rows)
+    return nodes, edges
+
+
+async def _counts_match(snapshot: GraphSnapshot) -> bool:
+    """Whether the database holds as many nodes and relationships as the snapshot saw.
+
+    Deletes and writes without a ``created_at`` stamp can't be found from
+    the watermark; they show up here as a count mismatch.
+    """
+    for label, count in snapshot.label_counts().items():
+        result = await db.run_read(f"MATCH (n:{label}) RETURN count(n) AS total")
+        if (result[0]["total"] if result else 0) != count:
+            return False
+    for rel_type in snapshot.rel_types:
+        result = await db.run_read(f"MATCH ()-[r:{rel_type}]->() RETURN count(r) AS total")
+        if (result[0]["total"] if result else 0) != snapshot.edge_count(rel_type) + snapshot.skipped[rel_type]:
+            return False
+    return True
+
+
+@instrumented
+async def load_graph_snapshot(snapshot: Optional[GraphSnapshot] = None) -> GraphSnapshot:
+    """Build a snapshot of the whole graph; the global one by default.
+
+    The new snapshot is filled off to the side, so readers see the old one
+    until it's complete.
+    """
+    snapshot = graph_snapshot if snapshot is None else snapshot
+    started = time.perf_counter()
+    fresh = GraphSnapshot(snapshot.labels, snapshot.rel_types)
+    nodes, edges = await _fetch_into(fresh, since=None)
+    fresh.loaded = True
+    snapshot.replace(fresh)
+    logger.info(f"Loaded graph snapshot of {nodes} nodes and {edges} relationships "
+                f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return snapshot
+
+
+@instrumented
+async def refresh_graph_snapshot(snapshot: Optional[GraphSnapshot] = None) -> Dict[str, Any]:
+    """Add what was created since the snapshot's watermark.
+
+    Falls back to a full reload when the snapshot isn't loaded yet or the
+    database counts show changes the watermark can't see, such as deletes.
+    Returns the nodes and relationships added and whether it reloaded.
+    """
+    snapshot = graph_snapshot if snapshot is None else snapshot
+    if snapshot.loaded and snapshot.watermark is not None:
+        nodes, edges = await _fetch_into(snapshot, since=snapshot.watermark)
+        if await _counts_match(snapshot):
+            logger.debug(f"Refreshed graph snapshot with {nodes} nodes and {edges} relationships")
+            return {"nodes": nodes, "edges": edges, "reloaded": False}
+        logger.info("Graph changed beyond the snapshot watermark; reloading")
+    await load_graph_snapshot(snapshot)
+    return {"nodes": len(snapshot), "edges": snapshot.edge_count(), "reloaded": True}
@@ -0,0 +1,402 @@
+"""
+Deterministic synthetic music catalogue for load and scale testing.
+
+Generates Genres, Artists and Albums that satisfy ``musical_brain.models``
+plus CREATED, INFLUENCED_BY, BELONGS_TO_GENRE and SUBGENRE_OF edges with
+power-law degree distributions. Everything is produced in batches from
+vectorised NumPy sampling, and each batch is seeded from the spec seed and
+its position, so output is reproducible and memory stays constant however
+large the catalogue is.
+
+Usage::
+
+    python -m musical_brain.synthetic --artists 1000000 --format ndjson --out data/
+    python -m musical_brain.synthetic --artists 10000 --load --uri memory://
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from musical_brain.config import DatabaseSettings
+from musical_brain.database import db
+from musical_brain.models import AlbumType
+from musical_brain.services import create_nodes, create_relationships, initialize_schema
+
+logger = logging.getLogger(__name__)
+
+# Multiplier for spreading popularity ranks over node indexes; prime, so the
+# mapping is a bijection for any node count it doesn't divide
+_SCATTER_PRIME = 2_654_435_761
+
+# Independent random streams, so changing one part of the spec doesn't
+# reshuffle the others
+_STREAMS = {"genres": 1, "artists": 2, "albums": 3, "influences": 4, "album_genres": 5}
+
+ID_PREFIXES = {"Genre": "genre", "Artist": "artist", "Album": "album"}
+
+COUNTRIES = [
+    "United States", "United Kingdom", "Germany", "Japan", "France", "Canada", "Sweden",
+    "Brazil", "Australia", "Italy", "Norway", "Netherlands", "Spain", "Iceland", "Nigeria",
+    "South Korea", "Mexico", "Finland", "Ireland", "Jamaica",
+]
+
+ALBUM_TYPES = [AlbumType.LP, AlbumType.EP, AlbumType.SINGLE, AlbumType.LIVE, AlbumType.COMPILATION]
+ALBUM_TYPE_WEIGHTS = [0.55, 0.2, 0.15, 0.06, 0.04]
+
+VOCABULARY = [
+    "guitar", "bass", "drums", "vocals", "synth", "melody", "rhythm", "groove", "riff", "hook",
+    "production", "mix", "atmosphere", "texture", "lyrics", "chorus", "bridge", "tempo", "energy",
+    "dark", "bright", "warm", "raw", "polished", "heavy", "dreamy", "catchy", "experimental",
+    "ambient", "noisy", "acoustic", "electronic", "orchestral", "minimal", "dense", "sparse",
+    "nostalgic", "haunting", "uplifting", "melancholic", "aggressive", "intimate", "epic",
+    "debut", "comeback", "masterpiece", "uneven", "cohesive", "sprawling", "tight", "layered",
+    "solo", "harmony", "falsetto", "distortion", "reverb", "sample", "loop", "beat", "strings",
+]
+
+
+class CatalogueSpec(BaseModel):
+    """Size and shape of a synthetic catalogue."""
+    seed: int = 0
+    artists: int = Field(10_000, ge=1)
+    genres: int = Field(500, ge=1)
+    root_genres: int = Field(20, ge=1)  # genres without a SUBGENRE_OF parent
+    albums_per_artist: float = Field(3.0, ge=1.0)  # mean
+    influences_per_artist: float = Field(5.0, ge=0.0)  # mean INFLUENCED_BY out-degree
+    genres_per_album: float = Field(1.6, ge=1.0, le=3.0)  # mean, 1 to 3
+    popularity_exponent: float = Field(1.0, ge=0.0)  # Zipf exponent for edge targets
+    note_words: int = Field(12, ge=0)  # mean words of review notes, 0 for no notes
+    batch_size: int = Field(10_000, ge=1)
+
+
+class EdgeBatch(NamedTuple):
+    """A batch of relationships of one type, as node indexes."""
+    rel_type: str
+    start_label: str
+    end_label: str
+    start: np.ndarray
+    end: np.ndarray
+
+    def pairs(self) -> List[Tuple[str, str]]:
+        """The batch as ``(start_id, end_id)`` tuples."""
+        start_prefix, end_prefix = ID_PREFIXES[self.start_label], ID_PREFIXES[self.end_label]
+        return [(f"{start_prefix}-{s}", f"{end_prefix}-{e}") for s, e in zip(self.start.tolist(), self.end.tolist())]
+
+
+def node_id(label: str, index: int) -> str:
+    """ID of the generated node with the given label and index."""
+    return f"{ID_PREFIXES[label]}-{index}"
+
+
+def _scatter(ranks: np.ndarray, n: int) -> np.ndarray:
+    """Map popularity ranks to node indexes so popular nodes aren't all adjacent."""
+    prime = _SCATTER_PRIME if n % _SCATTER_PRIME else _SCATTER_PRIME + 2
+    return (ranks.astype(np.int64) * prime) % n
+
+
+def _zipf_ranks(rng: np.random.Generator, size: int, n: int, exponent: float) -> np.ndarray:
+    """Ranks in ``[0, n)`` with P(rank k) roughly proportional to ``1 / (k + 1) ** exponent``.
+
+    Inverse-CDF sampling of the continuous power law on ``[1, n + 1)``; unlike
+    ``Generator.zipf`` it is bounded and allows exponents of 1 and below.
+    """
+    u = rng.random(size)
+    if abs(exponent - 1.0) < 1e-9:
+        x = np.power(n + 1.0, u)
+    else:
+        a = 1.0 - exponent
+        x = np.power(u * ((n + 1.0) ** a - 1.0) + 1.0, 1.0 / a)
+    return np.minimum(np.floor(x).astype(np.int64) - 1, n - 1)
+
+
+def _heavy_tailed_counts(rng: np.random.Generator, size: int, mean: float, minimum: int, cap: int) -> np.ndarray:
+    """Integer counts with a Pareto tail and roughly the given mean."""
+    alpha = 2.5
+    extra = max(mean - minimum, 0.0)
+    # Lomax(alpha) has mean 1 / (alpha - 1)
+    counts = minimum + np.floor(rng.pareto(alpha, size) * extra * (alpha - 1) + rng.random(size))
+    return np.minimum(counts, cap).astype(np.int64)
+
+
+def _unique_pairs(start: np.ndarray, end: np.ndarray, n_end: int):
+    """Drop duplicate (start, end) pairs, keeping them ordered by start."""
+    keys = np.unique(start.astype(np.int64) * n_end + end)
+    return keys // n_end, keys % n_end
+
+
+class CatalogueGenerator:
+    """Streams a catalogue described by a ``CatalogueSpec`` in batches."""
+
+    def __init__(self, spec: Optional[CatalogueSpec] = None):
+        self.spec = spec or CatalogueSpec()
+
+    def _rng(self, stream: str, chunk: int) -> np.random.Generator:
+        return np.random.default_rng([self.spec.seed, _STREAMS[stream], chunk])
+
+    def _chunks(self, total: int) -> Iterator[tuple]:
+        size = self.spec.batch_size
+        for chunk, lo in enumerate(range(0, total, size)):
+            yield chunk, lo, min(lo + size, total)
+
+    # Genres
+
+    def _genre_parents(self, chunk: int, lo: int, hi: int) -> np.ndarray:
+        """Parent index per genre, -1 for roots; parents always precede children."""
+        index = np.arange(lo, hi)
+        u = self._rng("genres", chunk).random(hi - lo)
+        # Squaring biases parents towards the oldest (broadest) genres
+        parents = np.floor(index * u * u).astype(np.int64)
+        parents[index < self.spec.root_genres] = -1
+        return parents
+
+    def genres(self) -> Iterator[List[Dict[str, Any]]]:
+        """Batches of Genre properties."""
+        for _, lo, hi in self._chunks(self.spec.genres):
+            yield [
+                {"id": node_id("Genre", i), "name": f"Genre {i}", "description": f"Synthetic genre {i}"}
+                for i in range(lo, hi)
+            ]
+
+    # Artists
+
+    def _artist_chunk(self, chunk: int, lo: int, hi: int) -> Dict[str, np.ndarray]:
+        rng = self._rng("artists", chunk)
+        n = hi - lo
+        return {
+            "formed_year": (1900 + np.floor(rng.beta(3.0, 1.5, n) * 126)).astype(np.int64),
+            "country": rng.integers(0, len(COUNTRIES), n),
+            "albums": _heavy_tailed_counts(rng, n, self.spec.albums_per_artist, minimum=1, cap=500),
+        }
+
+    def artists(self) -> Iterator[List[Dict[str, Any]]]:
+        """Batches of Artist properties."""
+        for chunk, lo, hi in self._chunks(self.spec.artists):
+            arrays = self._artist_chunk(chunk, lo, hi)
+            yield [
+                {
+                    "id": node_id("Artist", i),
+                    "name": f"Artist {i}",
+                    "country": COUNTRIES[country],
+                    "formed_year": year,
+                }
+                for i, country, year in zip(
+                    range(lo, hi), arrays["country"].tolist(), arrays["formed_year"].tolist()
+                )
+            ]
+
+    # Albums
+
+    def _album_chunks(self) -> Iterator[Dict[str, Any]]:
+        """Albums of each artist chunk, numbered consecutively across chunks."""
+        offset = 0
+        for chunk, lo, hi in self._chunks(self.spec.artists):
+            artists = self._artist_chunk(chunk, lo, hi)
+            counts = artists["albums"]
+            owners_local = np.repeat(np.arange(hi - lo), counts)
+            n = len(owners_local)
+            rng = self._rng("albums", chunk)
+            career = np.floor(rng.exponential(8.0, n)).astype(np.int64)
+            score = np.round(rng.beta(5.0, 2.0, n) * 50) / 10
+            yield {
+                "chunk": chunk,
+                "start": offset,
+                "owner": owners_local + lo,
+                "release_year": np.clip(artists["formed_year"][owners_local] + career, 1900, 2030),
+                "review_score": score,
+                "album_type": rng.choice(len(ALBUM_TYPES), n, p=ALBUM_TYPE_WEIGHTS),
+                "rng": rng,
+            }
+            offset += n
+
+    def _notes(self, rng: np.random.Generator, n: int) -> List[Optional[str]]:
+        if not self.spec.note_words:
+            return [None] * n
+        lengths = rng.poisson(self.spec.note_words, n) + 1
+        words = _zipf_ranks(rng, int(lengths.sum()), len(VOCABULARY), 1.0).tolist()
+        words = [VOCABULARY[word] for word in words]
+        bounds = np.concatenate(([0], np.cumsum(lengths))).tolist()
+        return [" ".join(words[bounds[i]:bounds[i + 1]]) for i in range(n)]
+
+    def albums(self) -> Iterator[List[Dict[str, Any]]]:
+        """Batches of Album properties."""
+        size = self.spec.batch_size
+        for chunk in self._album_chunks():
+            n = len(chunk["owner"])
+            notes = self._notes(chunk["rng"], n)
+            years = chunk["release_year"].tolist()
+            scores = chunk["review_score"].tolist()
+            types = chunk["album_type"].tolist()
+            for lo in range(0, n, size):
+                yield [
+                    {
+                        "id": node_id("Album", chunk["start"] + i),
+                        "title": f"Album {chunk['start'] + i}",
+                        "album_type": ALBUM_TYPES[types[i]].value,
+                        "release_year": years[i],
+                        "review_score": scores[i],
+                        "review_notes": notes[i],
+                    }
+                    for i in range(lo, min(lo + size, n))
+                ]
+
+    # Relationships
+
+    def edges(self) -> Iterator[EdgeBatch]:
+        """Batches of every relationship type, SUBGENRE_OF first."""
+        spec = self.spec
+        for chunk, lo, hi in self._chunks(spec.genres):
+            parents = self._genre_parents(chunk, lo, hi)
+            has_parent = parents >= 0
+            yield EdgeBatch("SUBGENRE_OF", "Genre", "Genre", np.arange(lo, hi)[has_parent], parents[has_parent])
+
+        for chunk, lo, hi in self._chunks(spec.artists):
+            rng = self._rng("influences", chunk)
+            degrees = _heavy_tailed_counts(rng, hi - lo, spec.influences_per_artist, minimum=0, cap=1000)
+            start = np.repeat(np.arange(lo, hi), degrees)
+            ranks = _zipf_ranks(rng, len(start), spec.artists, spec.popularity_exponent)
+            end = _scatter(ranks, spec.artists)
+            keep = start != end
+            if spec.artists > 1 and len(start):
+                start, end = _unique_pairs(start[keep], end[keep], spec.artists)
+                yield EdgeBatch("INFLUENCED_BY", "Artist", "Artist", start, end)
+
+        for chunk in self._album_chunks():
+            albums = np.arange(chunk["start"], chunk["start"] + len(chunk["owner"]))
+            yield EdgeBatch("CREATED", "Artist", "Album", chunk["owner"], albums)
+
+            rng = self._rng("album_genres", chunk["chunk"])
+            counts = 1 + rng.binomial(2, (spec.genres_per_album - 1) / 2, len(albums))
+            start = np.repeat(albums, counts)
+            ranks = _zipf_ranks(rng, len(start), spec.genres, spec.popularity_exponent)
+            start, end = _unique_pairs(start, _scatter(ranks, spec.genres), spec.genres)
+            yield EdgeBatch("BELONGS_TO_GENRE", "Album", "Genre", start, end)
+
+
+# Sinks
+
+NODE_LABELS = ("Genre", "Artist", "Album")
+
+
+def _node_batches(generator: CatalogueGenerator, label: str) -> Iterator[List[Dict[str, Any]]]:
+    return {"Genre": generator.genres, "Artist": generator.artists, "Album": generator.albums}[label]()
+
+
+def write_ndjson(generator: CatalogueGenerator, directory: Path) -> Dict[str, int]:
+    """Write ``<Label>.ndjson`` and ``<REL_TYPE>.ndjson`` files; returns line counts."""
+    directory.mkdir(parents=True, exist_ok=True)
+    counts: Dict[str, int] = {}
+    for label in NODE_LABELS:
+        with open(directory / f"{label}.ndjson", "w") as f:
+            counts[label] = 0
+            for batch in _node_batches(generator, label):
+                f.write("".join(json.dumps(row) + "\n" for row in batch))
+                counts[label] += len(batch)
+    handles = {}
+    try:
+        for batch in generator.edges():
+            if batch.rel_type not in handles:
+                handles[batch.rel_type] = open(directory / f"{batch.rel_type}.ndjson", "w")
+                counts[batch.rel_type] = 0
+            start_prefix, end_prefix = ID_PREFIXES[batch.start_label], ID_PREFIXES[batch.end_label]
+            handles[batch.rel_type].write("".join(
+                f'{{"start": "{start_prefix}-{s}", "end": "{end_prefix}-{e}"}}\n'
+                for s, e in zip(batch.start.tolist(), batch.end.tolist())
+            ))
+            counts[batch.rel_type] += len(batch.start)
+    finally:
+        for handle in handles.values():
+            handle.close()
+    return counts
+
+
+def write_csv(generator: CatalogueGenerator, directory: Path) -> Dict[str, int]:
+    """Write ``<Label>.csv`` and ``<REL_TYPE>.csv`` files; returns row counts."""
+    directory.mkdir(parents=True, exist_ok=True)
+    counts: Dict[str, int] = {}
+    for label in NODE_LABELS:
+        with open(directory / f"{label}.csv", "w", newline="") as f:
+            writer = None
+            counts[label] = 0
+            for batch in _node_batches(generator, label):
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(batch[0]))
+                    writer.writeheader()
+                writer.writerows(batch)
+                counts[label] += len(batch)
+    handles = {}
+    try:
+        for batch in generator.edges():
+            if batch.rel_type not in handles:
+                handles[batch.rel_type] = open(directory / f"{batch.rel_type}.csv", "w")
+                handles[batch.rel_type].write("start,end\n")
+                counts[batch.rel_type] = 0
+            fmt = f"{ID_PREFIXES[batch.start_label]}-%d,{ID_PREFIXES[batch.end_label]}-%d"
+            np.savetxt(handles[batch.rel_type], np.column_stack((batch.start, batch.end)), fmt=fmt)
+            counts[batch.rel_type] += len(batch.start)
+    finally:
+        for handle in handles.values():
+            handle.close()
+    return counts
+
+
+async def load(generator: CatalogueGenerator) -> Dict[str, int]:
+    """Write the catalogue through the bulk write path; returns counts written."""
+    counts: Dict[str, int] = {}
+    for label in NODE_LABELS:
+        counts[label] = 0
+        for batch in _node_batches(generator, label):
+            ids = await create_nodes(label, batch, batch_size=len(batch))
+            counts[label] += len(ids)
+        logger.info(f"Loaded {counts[label]} {label} nodes")
+    for batch in generator.edges():
+        written = await create_relationships(batch.start_label, batch.rel_type, batch.end_label, batch.pairs())
+        counts[batch.rel_type] = counts.get(batch.rel_type, 0) + written
+    logger.info(f"Loaded relationships: {counts}")
+    return counts
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a synthetic music catalogue.")
+    for name, field in CatalogueSpec.model_fields.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=field.annotation, default=field.default)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson", help="File format")
+    parser.add_argument("--out", type=Path, default=Path("data/synthetic"), help="Output directory")
+    parser.add_argument("--load", action="store_true", help="Write into the database instead of files")
+    parser.add_argument("--uri", help="Database URI for --load (default from MUSICAL_BRAIN_NEO4J_URI)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("musical_brain.services").setLevel(logging.WARNING)
+    spec = CatalogueSpec(**{name: getattr(args, name) for name in CatalogueSpec.model_fields})
+    generator = CatalogueGenerator(spec)
+    if args.load:
+        settings = DatabaseSettings.from_env()
+        if args.uri:
+            settings = settings.model_copy(update={"uri": args.uri})
+        await db.connect(settings=settings)
+        try:
+            await initialize_schema()
+            counts = await load(generator)
+        finally:
+            await db.disconnect()
+    elif args.format == "csv":
+        counts = write_csv(generator, args.out)
+    else:
+        counts = write_ndjson(generator, args.out)
+    print(json.dumps(counts, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
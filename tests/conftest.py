@@ -1,11 +1,21 @@
 """
 Pytest configuration and fixtures.
+
+The src directory is put on the import path by ``pythonpath`` in pyproject.toml.
 """
 
-import sys
-from pathlib import Path
+import pytest_asyncio
+
+from musical_brain.cache import node_cache
+from musical_brain.database import db
+
 
-# Add src directory to Python path for imports
-src_path = Path(__file__).parent.parent / "src"
-if str(src_path) not in sys.path:
-    sys.path.insert(0, str(src_path))
\ No newline at end of file
+@pytest_asyncio.fixture
+async def memory_db():
+    """Point the global database at a fresh in-memory graph for one test."""
+    driver, settings = db.driver, db.settings
+    node_cache.clear()
+    await db.connect("memory://")
+    yield db
+    node_cache.clear()
+    db.driver, db.settings = driver, settings
@@ -5,20 +5,25 @@ These tests require a running Neo4j instance and will modify the database.
 Run with: pytest tests/test_services.py -v
 """
 
+import os
+
 import pytest
 import pytest_asyncio
 from datetime import datetime
 
-from musical_brain.database import DatabaseManager, db
+from musical_brain.cache import node_cache
+from musical_brain.database import MEMORY_URI_SCHEME, DatabaseManager, db
 from musical_brain.services import (
-    create_node, get_node, update_node, delete_node, 
-    list_nodes, count_nodes, initialize_schema
+    create_node, create_nodes, get_node, iter_nodes, update_node, delete_node, 
+    list_nodes, list_nodes_page, count_nodes, initialize_schema,
+    upsert_node, upsert_nodes, apply_updates, apply_updates_many, NATURAL_KEYS
 )
 from musical_brain.models import Album, Artist, Genre, AlbumType
 
 
-# Test database configuration
-TEST_DB_URI = "bolt://localhost:7687"
+# Test database configuration; set MUSICAL_BRAIN_TEST_URI=memory:// to run
+# against the in-memory backend instead of a Neo4j server
+TEST_DB_URI = os.environ.get("MUSICAL_BRAIN_TEST_URI", "bolt://localhost:7687")
 TEST_DB_USER = "neo4j"
 TEST_DB_PASSWORD = "password"
 
@@ -26,6 +31,9 @@ TEST_DB_PASSWORD = "password"
 @pytest_asyncio.fixture(scope="session")
 async def db_connection():
     """Set up test database connection."""
+    # Raw cleanup queries bypass the services, so don't cache nodes
+    node_cache.configure(enabled=False)
+    
     # Use the global db instance
     await db.connect(TEST_DB_URI, TEST_DB_USER, TEST_DB_PASSWORD)
     
@@ -42,6 +50,12 @@ async def db_connection():
 @pytest_asyncio.fixture
 async def clean_db(db_connection):
     """Clean test data before each test."""
+    if TEST_DB_URI.startswith(MEMORY_URI_SCHEME):
+        # Each test gets a fresh in-memory graph
+        await db_connection.connect(TEST_DB_URI)
+        await initialize_schema()
+        yield
+        return
     # Remove any existing test nodes
     await db_connection.run_query("MATCH (n) WHERE n.id STARTS WITH 'test-' DELETE n")
     yield
@@ -213,6 +227,28 @@ class TestAlbumCRUD:
         assert len(second_page) == 2
         assert first_page[0]["title"] != second_page[0]["title"]
 
+    @pytest.mark.asyncio
+    async def test_list_albums_with_cursor(self, clean_db):
+        """Test keyset pagination walks every album exactly once."""
+        ids = [
+            (await create_node("Album", {"title": f"Cursor Test Album {i}", "album_type": "LP"}))["id"]
+            for i in range(5)
+        ]
+        
+        seen = []
+        cursor = None
+        while True:
+            page = await list_nodes_page("Album", limit=2, cursor=cursor)
+            seen.extend(node["id"] for node in page["items"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        
+        # Other albums may share the database; check only the ones created here
+        ours = [node_id for node_id in seen if node_id in ids]
+        assert ours == list(reversed(ids))
+        assert len(seen) == len(set(seen))
+
     @pytest.mark.asyncio
     async def test_count_albums(self, clean_db):
         """Test counting albums."""
@@ -230,6 +266,148 @@ class TestAlbumCRUD:
         assert count == 3
 
 
+class TestBulkCreate:
+    """Test batched node creation."""
+
+    @pytest.mark.asyncio
+    async def test_create_nodes_returns_ids_in_order(self, clean_db):
+        """Test bulk creation returns IDs in input order across batches."""
+        rows = [{"title": f"Bulk Album {i}", "album_type": "LP"} for i in range(5)]
+        
+        ids = await create_nodes("Album", rows, batch_size=2)
+        
+        assert len(ids) == 5
+        assert len(set(ids)) == 5
+        for i, node_id in enumerate(ids):
+            node = await get_node("Album", node_id)
+            assert node["title"] == f"Bulk Album {i}"
+            assert "created_at" in node
+            assert "updated_at" in node
+
+    @pytest.mark.asyncio
+    async def test_create_nodes_converts_datetimes(self, clean_db):
+        """Test bulk creation stores datetimes as ISO strings."""
+        review_date = datetime(2023, 5, 1, 12, 0)
+        ids = await create_nodes(
+            "Album", [{"title": "Dated Album", "album_type": "EP", "review_date": review_date}]
+        )
+        
+        node = await get_node("Album", ids[0])
+        assert node["review_date"] == review_date.isoformat()
+
+    @pytest.mark.asyncio
+    async def test_iter_nodes_streams_all(self, clean_db):
+        """Test streaming yields every node of the label."""
+        ids = await create_nodes("Album", [{"title": f"Stream Album {i}", "album_type": "LP"} for i in range(3)])
+        
+        streamed = [node["id"] async for node in iter_nodes("Album")]
+        
+        assert set(ids) <= set(streamed)
+
+    @pytest.mark.asyncio
+    async def test_create_nodes_empty(self, clean_db):
+        """Test bulk creation with no rows does nothing."""
+        ids = await create_nodes("Album", [])
+        assert ids == []
+
+
+class TestApplyUpdates:
+    """Test single-round-trip and batched updates."""
+
+    @pytest.mark.asyncio
+    async def test_update_does_not_mutate_input(self, clean_db):
+        """Test that the caller's updates dict is left untouched."""
+        created = await create_node("Album", {"title": "Immutable Input", "album_type": "LP"})
+        updates = {"review_score": 4.1}
+        
+        await update_node("Album", created["id"], updates)
+        
+        assert updates == {"review_score": 4.1}
+
+    @pytest.mark.asyncio
+    async def test_apply_updates_changed_only(self, clean_db):
+        """Test returning only the properties whose values changed."""
+        created = await create_node("Artist", {"name": "Changed Only", "country": "UK"})
+        
+        changed = await apply_updates(
+            "Artist", created["id"], {"country": "UK", "formed_year": 1970}, changed_only=True
+        )
+        
+        assert changed == {"formed_year": 1970}
+
+    @pytest.mark.asyncio
+    async def test_apply_updates_many(self, clean_db):
+        """Test batched updates skip missing nodes and keep input order."""
+        ids = await create_nodes("Album", [{"title": f"Batch Update {i}", "album_type": "LP"} for i in range(3)])
+        updates = [(ids[2], {"review_score": 3.0}), ("test-missing", {"review_score": 1.0}), (ids[0], {"review_score": 5.0})]
+        
+        updated = await apply_updates_many("Album", updates, batch_size=2)
+        
+        assert updated == [ids[2], ids[0]]
+        assert (await get_node("Album", ids[0]))["review_score"] == 5.0
+        assert "review_score" not in await get_node("Album", ids[1])
+
+
+class TestUpsert:
+    """Test idempotent upserts on natural keys."""
+
+    @pytest.mark.asyncio
+    async def test_upsert_node_is_idempotent(self, clean_db):
+        """Test that upserting twice updates the same node."""
+        key = NATURAL_KEYS["Artist"]
+        first = await upsert_node("Artist", key, {"name": "Upsert Artist", "country": "UK"})
+        second = await upsert_node(
+            "Artist", key, {"name": "Upsert Artist", "country": "UK", "formed_year": 1969}
+        )
+        
+        assert second["id"] == first["id"]
+        assert second["created_at"] == first["created_at"]
+        assert second["formed_year"] == 1969
+
+    @pytest.mark.asyncio
+    async def test_upsert_nodes_matches_existing(self, clean_db):
+        """Test that bulk upserts reuse existing nodes and keep input order."""
+        key = NATURAL_KEYS["Album"]
+        existing = await upsert_node(
+            "Album", key, {"title": "Upsert Album", "release_year": 1971, "album_type": "LP"}
+        )
+        rows = [
+            {"title": "Upsert Album New", "release_year": 1972, "album_type": "LP"},
+            {"title": "Upsert Album", "release_year": 1971, "album_type": "LP", "review_score": 4.5},
+        ]
+        
+        ids = await upsert_nodes("Album", key, rows)
+        
+        assert ids[1] == existing["id"]
+        assert ids[0] != existing["id"]
+        updated = await get_node("Album", existing["id"])
+        assert updated["review_score"] == 4.5
+
+
+class TestTransactions:
+    """Test sharing one transaction across service calls."""
+
+    @pytest.mark.asyncio
+    async def test_transaction_commits(self, clean_db):
+        """Test that service calls inside a transaction commit together."""
+        async with db.transaction():
+            created = await create_node("Album", {"title": "Tx Album", "album_type": "LP"})
+            await update_node("Album", created["id"], {"review_score": 4.0})
+        
+        result = await get_node("Album", created["id"])
+        assert result["review_score"] == 4.0
+
+    @pytest.mark.asyncio
+    async def test_transaction_rolls_back(self, clean_db):
+        """Test that an error inside a transaction discards its writes."""
+        with pytest.raises(ValueError):
+            async with db.transaction():
+                created = await create_node("Album", {"title": "Rollback Album", "album_type": "LP"})
+                raise ValueError("abort")
+        
+        assert await get_node("Album", created["id"]) is None
+
+
 class TestArtistCRUD:
     """Test CRUD operations for Artist nodes."""
 
@@ -289,8 +467,8 @@ class TestGenreCRUD:
         assert result["name"] == "Progressive Rock"
         assert result["description"] == "Complex rock music with lengthy compositions"
         assert "id" in result
-        # Genres don't get timestamps
-        assert "created_at" not in result
+        # Genres get created_at but, unlike albums, no updated_at
+        assert "created_at" in result
         assert "updated_at" not in result
 
 
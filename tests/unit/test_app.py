@@ -0,0 +1,220 @@
+"""
+Unit tests for API endpoints, using the in-memory backend.
+"""
+
+import json
+
+import httpx
+import pytest
+from neo4j.exceptions import ConstraintError
+
+from musical_brain import services
+from musical_brain.app import app, ndjson_nodes
+
+
+@pytest.fixture
+def client(memory_db):
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+class TestAlbumEndpoints:
+    """Test suite for album and artist CRUD endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_album_lifecycle(self, client):
+        """Test create, read, update and delete status codes."""
+        async with client:
+            response = await client.post("/albums", json={"title": "Kind of Blue", "album_type": "LP"})
+            assert response.status_code == 201
+            album = response.json()
+            assert album["title"] == "Kind of Blue"
+            assert "id" in album and "created_at" in album
+
+            response = await client.get(f"/albums/{album['id']}")
+            assert response.status_code == 200
+            assert response.json()["title"] == "Kind of Blue"
+
+            response = await client.put(f"/albums/{album['id']}", json={"review_score": 5.0})
+            assert response.status_code == 200
+            assert response.json()["review_score"] == 5.0
+            assert response.json()["title"] == "Kind of Blue"
+
+            response = await client.delete(f"/albums/{album['id']}")
+            assert response.status_code == 204
+            assert response.content == b""
+            assert (await client.get(f"/albums/{album['id']}")).status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_delete_album_with_genre(self, client, memory_db):
+        """Test an album linked to a genre can still be deleted."""
+        async with client:
+            album = (await client.post("/albums", json={"title": "A Love Supreme", "album_type": "LP"})).json()
+            genre = (await client.post("/batch", json={"operations": [
+                {"op": "create", "label": "Genre", "data": {"name": "Spiritual Jazz"}},
+            ]})).json()["results"][0]
+            await services.create_relationship("Album", album["id"], "BELONGS_TO_GENRE", "Genre", genre["id"])
+
+            assert (await client.delete(f"/albums/{album['id']}")).status_code == 204
+        assert await memory_db.run_read("MATCH ()-[r:BELONGS_TO_GENRE]->() RETURN r") == []
+
+    @pytest.mark.asyncio
+    async def test_missing_album(self, client):
+        """Test reads, updates and deletes of an unknown album return 404."""
+        async with client:
+            assert (await client.get("/albums/missing")).status_code == 404
+            assert (await client.put("/albums/missing", json={"review_score": 3.0})).status_code == 404
+            assert (await client.delete("/albums/missing")).status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_update_rejects_null_title(self, client):
+        """Test a required field cannot be cleared with an explicit null."""
+        async with client:
+            album = (await client.post("/albums", json={"title": "Giant Steps", "album_type": "LP"})).json()
+            response = await client.put(f"/albums/{album['id']}", json={"title": None})
+            assert response.status_code == 422
+            assert (await client.get(f"/albums/{album['id']}")).json()["title"] == "Giant Steps"
+
+    @pytest.mark.asyncio
+    async def test_constraint_conflict(self, client, monkeypatch):
+        """Test a uniqueness constraint violation is reported as 409."""
+        async def conflict(label, data):
+            raise ConstraintError("Node already exists with label Album")
+
+        monkeypatch.setattr(services, "create_node", conflict)
+        async with client:
+            response = await client.post("/albums", json={"title": "Duplicate", "album_type": "LP"})
+        assert response.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_artist_endpoints(self, client):
+        """Test artist create and read status codes."""
+        async with client:
+            response = await client.post("/artists", json={"name": "Miles Davis", "country": "US"})
+            assert response.status_code == 201
+            artist = response.json()
+
+            response = await client.get(f"/artists/{artist['id']}")
+            assert response.status_code == 200
+            assert response.json()["name"] == "Miles Davis"
+            assert (await client.get("/artists/missing")).status_code == 404
+            assert (await client.post("/artists", json={"name": ""})).status_code == 422
+
+
+class TestStreamEndpoints:
+    """Test suite for NDJSON streaming."""
+
+    @pytest.mark.asyncio
+    async def test_stream_albums(self, client):
+        """Test every album arrives as one JSON object per line."""
+        async with client:
+            for i in range(3):
+                await client.post("/albums", json={"title": f"Album {i}", "album_type": "EP"})
+            response = await client.get("/albums/stream")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.text.endswith("\n")
+        lines = response.text.splitlines()
+        assert sorted(json.loads(line)["title"] for line in lines) == ["Album 0", "Album 1", "Album 2"]
+
+    @pytest.mark.asyncio
+    async def test_stream_artists_empty(self, client):
+        """Test an empty label streams an empty body."""
+        async with client:
+            response = await client.get("/artists/stream")
+        assert response.status_code == 200
+        assert response.content == b""
+
+    @pytest.mark.asyncio
+    async def test_chunking(self, client):
+        """Test nodes are grouped into chunks of whole lines."""
+        async with client:
+            for i in range(5):
+                await client.post("/artists", json={"name": f"Artist {i}"})
+        chunks = [chunk async for chunk in ndjson_nodes("Artist", chunk_size=2)]
+        assert [chunk.count(b"\n") for chunk in chunks] == [2, 2, 1]
+        assert all(chunk.endswith(b"\n") for chunk in chunks)
+        names = [json.loads(line)["name"] for chunk in chunks for line in chunk.splitlines()]
+        assert sorted(names) == [f"Artist {i}" for i in range(5)]
+
+
+class TestListAlbums:
+    """Test suite for GET /albums pagination."""
+
+    @pytest.mark.asyncio
+    async def test_cursor_pages(self, client):
+        """Test following next_cursor visits every album once, newest first."""
+        async with client:
+            ids = [
+                (await client.post("/albums", json={"title": f"Album {i}", "album_type": "LP"})).json()["id"]
+                for i in range(5)
+            ]
+            seen = []
+            params = {"limit": 2}
+            while True:
+                response = await client.get("/albums", params=params)
+                assert response.status_code == 200
+                page = response.json()
+                assert len(page["items"]) <= 2
+                seen.extend(album["id"] for album in page["items"])
+                if page["next_cursor"] is None:
+                    break
+                params["cursor"] = page["next_cursor"]
+        assert seen == list(reversed(ids))
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self, client):
+        """Test a malformed cursor is rejected with 400."""
+        async with client:
+            response = await client.get("/albums", params={"cursor": "not-a-cursor"})
+            assert response.status_code == 400
+            assert "Invalid cursor" in response.json()["detail"]
+
+
+class TestBatchEndpoint:
+    """Test suite for POST /batch."""
+
+    @pytest.mark.asyncio
+    async def test_batch(self, client):
+        """Test mixed operations run together and report per-operation results."""
+        async with client:
+            album = (await client.post("/albums", json={"title": "Blue Train", "album_type": "LP"})).json()
+            response = await client.post("/batch", json={"operations": [
+                {"op": "create", "label": "Artist", "data": {"name": "John Coltrane", "country": "US"}},
+                {"op": "update", "label": "Album", "id": album["id"], "data": {"review_score": 4.5}},
+                {"op": "create", "label": "Genre", "data": {"name": "Hard Bop"}},
+                {"op": "delete", "label": "Album", "id": "missing"},
+            ]})
+            assert response.status_code == 200
+            results = response.json()["results"]
+            assert [(r["op"], r["label"], r["status"]) for r in results] == [
+                ("create", "Artist", "created"),
+                ("update", "Album", "updated"),
+                ("create", "Genre", "created"),
+                ("delete", "Album", "not_found"),
+            ]
+            artist = (await client.get(f"/artists/{results[0]['id']}")).json()
+            assert artist["name"] == "John Coltrane"
+            assert (await client.get(f"/albums/{album['id']}")).json()["review_score"] == 4.5
+
+    @pytest.mark.asyncio
+    async def test_batch_validation(self, client, memory_db):
+        """Test invalid data is reported per operation and nothing is written."""
+        async with client:
+            response = await client.post("/batch", json={"operations": [
+                {"op": "create", "label": "Album", "data": {"title": "Ok", "album_type": "LP"}},
+                {"op": "create", "label": "Album", "data": {"title": "", "album_type": "LP"}},
+                {"op": "update", "label": "Artist", "id": "a1", "data": {"formed_year": 1500}},
+            ]})
+            assert response.status_code == 422
+            locations = [error["loc"] for error in response.json()["detail"]]
+            assert locations == [
+                ["body", "operations", 1, "data", "title"],
+                ["body", "operations", 2, "data", "formed_year"],
+            ]
+
+            response = await client.post("/batch", json={"operations": [{"op": "update", "label": "Album"}]})
+            assert response.status_code == 422
+            response = await client.post("/batch", json={"operations": [{"op": "create", "label": "Track"}]})
+            assert response.status_code == 422
+        assert await memory_db.run_read("MATCH (n) RETURN n") == []
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import random
+import time
+
+import httpx
+import pytest
+
+from benchmarks.encode import ENCODERS, album_page, time_encoder
+from benchmarks.harness import compare, histogram, load_results, percentile, summarize, write_results
+from benchmarks.loadtest import LoadState, Recorder, issue, parse_args, parse_mix, run_load, serve_in_thread
+
+
+class TestBenchmarkHarness:
+    """Test suite for benchmark statistics and regression checks."""
+
+    def test_percentile(self):
+        """Test percentiles interpolate between ranks."""
+        samples = [float(i) for i in range(1, 101)]
+        assert percentile(samples, 50) == pytest.approx(50.5)
+        assert percentile(samples, 99) == pytest.approx(99.01)
+        assert percentile([3.0], 95) == 3.0
+        assert percentile([], 50) == 0.0
+
+    def test_summarize(self):
+        """Test latencies are reported in milliseconds with throughput."""
+        summary = summarize([0.001] * 10, elapsed=0.01)
+        assert summary["ops"] == 10
+        assert summary["throughput"] == 1000.0
+        assert summary["p50_ms"] == pytest.approx(1.0)
+
+    def test_compare_flags_regressions(self):
+        """Test that only changes beyond the threshold are reported."""
+        baseline = {"1000": {"get_node": {"throughput": 1000.0, "p95_ms": 1.0}}}
+        current = {
+            "1000": {"get_node": {"throughput": 700.0, "p95_ms": 1.1}},
+            "100000": {"get_node": {"throughput": 1.0, "p95_ms": 100.0}},
+        }
+
+        regressions = compare(current, baseline, threshold=0.2)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("1000/get_node throughput")
+
+    def test_compare_latency_increase(self):
+        """Test that slower percentiles count as regressions."""
+        baseline = {"1000": {"list_nodes": {"throughput": 100.0, "p95_ms": 10.0}}}
+        current = {"1000": {"list_nodes": {"throughput": 100.0, "p95_ms": 15.0}}}
+
+        assert compare(current, baseline, threshold=0.2) == ["1000/list_nodes p95_ms: 10 -> 15 (+50.0%)"]
+        assert compare(current, baseline, threshold=0.6) == []
+
+    def test_results_round_trip(self, tmp_path):
+        """Test that results files keep metadata next to the results."""
+        path = tmp_path / "results" / "run.json"
+        results = {"1000": {"count_nodes": {"throughput": 5.0}}}
+        write_results(path, {"backend": "memory"}, results)
+
+        assert load_results(path) == results
+        assert json.loads(path.read_text())["meta"] == {"backend": "memory"}
+
+    def test_histogram(self):
+        """Test latencies land in the first bucket bounding them."""
+        counts = histogram([0.2, 0.5, 3.0, 7000.0], buckets=(0.5, 5))
+        assert counts == {"<=0.5": 2, "<=5": 1, "+Inf": 1}
+
+
+class TestLoadTest:
+    """Test suite for the HTTP load test harness."""
+
+    def test_parse_mix(self):
+        """Test request mixes parse into weights and reject unknown operations."""
+        assert parse_mix("get_album=3, search=1,health") == {"get_album": 3.0, "search": 1.0, "health": 1.0}
+
+        with pytest.raises(ValueError, match="Unknown operation"):
+            parse_mix("get_album=1,nope=2")
+        with pytest.raises(ValueError, match="positive weight"):
+            parse_mix("health=0")
+
+    def test_failed_create_before_delete(self):
+        """Test a delete whose fallback create fails is recorded as an error instead of raising."""
+        transport = httpx.MockTransport(lambda request: httpx.Response(500))
+        recorder = Recorder()
+        recorder.start()
+
+        async def delete():
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await issue("delete_album", client, LoadState(random.Random(0)), recorder, time.perf_counter())
+
+        asyncio.run(delete())
+        assert recorder.errors == {"delete_album": 1}
+
+    def test_closed_loop_against_in_process_server(self, memory_db):
+        """Test a short closed-loop run records every operation without errors."""
+        args = parse_args(["--duration", "0.5", "--warmup", "0", "--albums", "20", "--concurrency", "4"])
+
+        with serve_in_thread("memory://") as base_url:
+            scenario, results = asyncio.run(run_load(base_url, args))
+
+        assert scenario == "closed-c4"
+        assert results["all"]["ops"] > 0
+        assert results["all"]["errors"] == 0
+        assert sum(results["all"]["histogram_ms"].values()) == results["all"]["ops"]
+
+
+class TestEncodeBenchmark:
+    """Test suite for the response encoding benchmark."""
+
+    def test_encoders_agree(self):
+        """Test every encoder produces the same JSON for a page."""
+        page = album_page(50)
+        assert len(page["items"]) == 50
+        decoded = {name: json.loads(encode(page)) for name, encode in ENCODERS.items()}
+        assert decoded["stdlib"] == decoded["jsonable_encoder"] == page
+        assert len(decoded["response_model"]) == 50
+
+    def test_time_encoder(self):
+        """Test timings include the encoded size."""
+        result = time_encoder(ENCODERS["stdlib"], album_page(10), 3)
+        assert result["ops"] == 3
+        assert result["bytes"] > 0
@@ -0,0 +1,140 @@
+"""
+Unit tests for the in-process node cache.
+"""
+
+from musical_brain.cache import NodeCache
+from musical_brain.config import CacheSettings
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestNodeCache:
+    """Test suite for NodeCache."""
+
+    def test_hit_and_miss(self):
+        """Test that cached nodes are returned and counted."""
+        cache = NodeCache()
+        assert cache.get("Album", "a1") is None
+        
+        cache.set("Album", "a1", {"id": "a1", "title": "Cached"})
+        assert cache.get("Album", "a1") == {"id": "a1", "title": "Cached"}
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    def test_keys_include_label(self):
+        """Test that the same ID under another label is a different entry."""
+        cache = NodeCache()
+        cache.set("Album", "x", {"id": "x"})
+        assert cache.get("Artist", "x") is None
+
+    def test_returns_copies(self):
+        """Test that mutating a returned node doesn't change the cache."""
+        cache = NodeCache()
+        node = {"id": "a1", "title": "Original"}
+        cache.set("Album", "a1", node)
+        node["title"] = "Mutated input"
+        
+        result = cache.get("Album", "a1")
+        result["title"] = "Mutated output"
+        assert cache.get("Album", "a1")["title"] == "Original"
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = NodeCache(max_size=2)
+        cache.set("Album", "a1", {"id": "a1"})
+        cache.set("Album", "a2", {"id": "a2"})
+        cache.get("Album", "a1")
+        cache.set("Album", "a3", {"id": "a3"})
+        
+        assert cache.get("Album", "a2") is None
+        assert cache.get("Album", "a1") is not None
+        assert cache.get("Album", "a3") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after the TTL."""
+        clock = FakeClock()
+        cache = NodeCache(ttl_seconds=10, clock=clock)
+        cache.set("Album", "a1", {"id": "a1"})
+        
+        clock.now = 9.9
+        assert cache.get("Album", "a1") is not None
+        clock.now = 10.0
+        assert cache.get("Album", "a1") is None
+        assert cache.stats()["expirations"] == 1
+        assert cache.stats()["size"] == 0
+
+    def test_invalidate(self):
+        """Test that invalidated entries are gone."""
+        cache = NodeCache()
+        cache.set("Album", "a1", {"id": "a1"})
+        cache.invalidate("Album", "a1")
+        cache.invalidate("Album", "missing")
+        assert cache.get("Album", "a1") is None
+
+    def test_generation_guards_set(self):
+        """Test a set with a generation taken before an invalidation is skipped."""
+        cache = NodeCache(max_size=2)
+        generation = cache.generation("Album", "a1")
+        cache.invalidate("Album", "a1")
+        cache.set("Album", "a1", {"id": "a1", "title": "Old"}, generation)
+        assert cache.get("Album", "a1") is None
+
+        generation = cache.generation("Album", "a1")
+        cache.invalidate("Album", "a2")
+        cache.set("Album", "a1", {"id": "a1", "title": "New"}, generation)
+        assert cache.get("Album", "a1") == {"id": "a1", "title": "New"}
+
+        generation = cache.generation("Album", "a1")
+        for node_id in ("b1", "b2", "b3"):
+            cache.invalidate("Album", node_id)
+        assert cache.generation("Album", "a1") != generation
+
+        generation = cache.generation("Album", "a1")
+        cache.clear()
+        cache.set("Album", "a1", {"id": "a1"}, generation)
+        assert cache.get("Album", "a1") is None
+
+    def test_disabled(self):
+        """Test that a disabled cache stores nothing."""
+        cache = NodeCache()
+        cache.set("Album", "a1", {"id": "a1"})
+        cache.configure(enabled=False)
+        
+        assert cache.stats()["size"] == 0
+        cache.set("Album", "a2", {"id": "a2"})
+        assert cache.get("Album", "a2") is None
+
+    def test_configure_shrinks(self):
+        """Test that shrinking the cache evicts overflow immediately."""
+        cache = NodeCache(max_size=3)
+        for i in range(3):
+            cache.set("Album", f"a{i}", {"id": f"a{i}"})
+        cache.configure(max_size=1)
+        
+        assert cache.stats()["size"] == 1
+        assert cache.get("Album", "a2") is not None
+
+    def test_configure_from_settings(self):
+        """Test that cache settings load from the environment."""
+        settings = CacheSettings.from_env({
+            "MUSICAL_BRAIN_CACHE_ENABLED": "0",
+            "MUSICAL_BRAIN_CACHE_MAX_SIZE": "5",
+        })
+        cache = NodeCache()
+        cache.configure(**settings.model_dump())
+        
+        assert cache.enabled is False
+        assert cache.max_size == 5
+        assert cache.ttl_seconds == 60.0
@@ -0,0 +1,85 @@
+"""
+Unit tests for environment-driven settings.
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from musical_brain.config import DatabaseSettings, GenreSettings, HealthSettings, SimilaritySettings
+
+
+class TestDatabaseSettings:
+    """Test suite for DatabaseSettings."""
+
+    def test_defaults(self):
+        """Test defaults match a local docker-compose Neo4j."""
+        settings = DatabaseSettings.from_env({})
+        assert settings.uri == "bolt://localhost:7687"
+        assert settings.user == "neo4j"
+        assert settings.max_connection_pool_size == 100
+        assert settings.liveness_check_timeout is None
+
+    def test_from_env(self):
+        """Test values are read from prefixed variables and coerced."""
+        settings = DatabaseSettings.from_env({
+            "MUSICAL_BRAIN_NEO4J_URI": "neo4j://db:7687",
+            "MUSICAL_BRAIN_NEO4J_MAX_CONNECTION_POOL_SIZE": "250",
+            "MUSICAL_BRAIN_NEO4J_CONNECTION_ACQUISITION_TIMEOUT": "2.5",
+            "MUSICAL_BRAIN_NEO4J_KEEP_ALIVE": "false",
+            "MUSICAL_BRAIN_NEO4J_FETCH_SIZE": "-1",
+            "MUSICAL_BRAIN_NEO4J_LIVENESS_CHECK_TIMEOUT": "",
+        })
+        assert settings.uri == "neo4j://db:7687"
+        assert settings.max_connection_pool_size == 250
+        assert settings.connection_acquisition_timeout == 2.5
+        assert settings.keep_alive is False
+        assert settings.fetch_size == -1
+        assert settings.liveness_check_timeout is None
+
+    def test_invalid_values(self):
+        """Test that invalid values are rejected."""
+        with pytest.raises(ValidationError):
+            DatabaseSettings.from_env({"MUSICAL_BRAIN_NEO4J_MAX_CONNECTION_POOL_SIZE": "0"})
+        
+        with pytest.raises(ValidationError):
+            DatabaseSettings.from_env({"MUSICAL_BRAIN_NEO4J_FETCH_SIZE": "lots"})
+
+
+class TestHealthSettings:
+    """Test suite for HealthSettings."""
+
+    def test_from_env(self):
+        """Test values are read from prefixed variables."""
+        settings = HealthSettings.from_env({"MUSICAL_BRAIN_HEALTH_INTERVAL_SECONDS": "1.5"})
+        assert settings.interval_seconds == 1.5
+        assert settings.timeout_seconds == 2.0
+
+        with pytest.raises(ValidationError):
+            HealthSettings.from_env({"MUSICAL_BRAIN_HEALTH_TIMEOUT_SECONDS": "0"})
+
+
+class TestGenreSettings:
+    """Test suite for GenreSettings."""
+
+    def test_from_env(self):
+        """Test the closure refresh interval is read and validated."""
+        assert GenreSettings.from_env({}).refresh_seconds == 30.0
+        settings = GenreSettings.from_env({"MUSICAL_BRAIN_GENRES_REFRESH_SECONDS": "0"})
+        assert settings.refresh_seconds == 0.0
+
+        with pytest.raises(ValidationError):
+            GenreSettings.from_env({"MUSICAL_BRAIN_GENRES_REFRESH_SECONDS": "-1"})
+
+
+class TestSimilaritySettings:
+    """Test suite for SimilaritySettings."""
+
+    def test_from_env(self):
+        """Test values are read from prefixed variables and validated."""
+        settings = SimilaritySettings.from_env({"MUSICAL_BRAIN_SIMILARITY_TOP_K": "5"})
+        assert settings.top_k == 5
+        assert settings.block_size == 1024
+        assert settings.index_path is None
+
+        with pytest.raises(ValidationError):
+            SimilaritySettings.from_env({"MUSICAL_BRAIN_SIMILARITY_MIN_SCORE": "2"})
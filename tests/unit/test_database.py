@@ -1,5 +1,10 @@
+import asyncio
+from types import SimpleNamespace
+
 import pytest
-from musical_brain.database import DatabaseManager, db
+from musical_brain.config import DatabaseSettings
+from musical_brain.database import DatabaseManager, _pool_usage, db
+from musical_brain.inmemory.driver import MemoryTransaction
 
 
 class TestDatabaseManager:
@@ -12,6 +17,23 @@ class TestDatabaseManager:
         assert db is not None
         assert db.driver is None
         assert db.logger is not None
+        assert db.settings == DatabaseSettings()
+
+    @pytest.mark.asyncio
+    async def test_pool_stats_when_not_connected(self):
+        """Test that pool gauges are zero without a driver."""
+        db = DatabaseManager(DatabaseSettings(max_connection_pool_size=5))
+
+        stats = db.pool_stats()
+        assert stats == {"max_size": 5, "in_use": 0, "idle": 0, "active_sessions": 0}
+
+    def test_pool_usage(self):
+        """Test connections are counted from the driver's pool, and an unknown pool layout gives zeros."""
+        connections = [SimpleNamespace(in_use=True), SimpleNamespace(in_use=False), SimpleNamespace(in_use=False)]
+        driver = SimpleNamespace(_pool=SimpleNamespace(connections={"localhost:7687": connections}))
+        assert _pool_usage(driver) == (1, 2)
+        assert _pool_usage(SimpleNamespace(_pool=SimpleNamespace(connections=None))) == (0, 0)
+        assert _pool_usage(None) == (0, 0)
 
     @pytest.mark.asyncio
     async def test_run_query_requires_connection(self):
@@ -21,6 +43,36 @@ class TestDatabaseManager:
         with pytest.raises(RuntimeError, match="Not connected to database"):
             await db.run_query("RETURN 1")
 
+    @pytest.mark.asyncio
+    async def test_managed_queries_require_connection(self):
+        """Test that run_read and run_write raise error when not connected."""
+        db = DatabaseManager()
+
+        with pytest.raises(RuntimeError, match="Not connected to database"):
+            await db.run_read("RETURN 1")
+
+        with pytest.raises(RuntimeError, match="Not connected to database"):
+            await db.run_write("RETURN 1")
+
+    @pytest.mark.asyncio
+    async def test_stream_query_requires_connection(self):
+        """Test that stream_query raises error when not connected."""
+        db = DatabaseManager()
+
+        with pytest.raises(RuntimeError, match="Not connected to database"):
+            async for _ in db.stream_query("RETURN 1"):
+                pass
+
+    @pytest.mark.asyncio
+    async def test_transaction_requires_connection(self):
+        """Test that transaction() raises error when not connected."""
+        db = DatabaseManager()
+
+        with pytest.raises(RuntimeError, match="Not connected to database"):
+            async with db.transaction():
+                pass
+        assert db.in_transaction is False
+
     @pytest.mark.asyncio
     async def test_disconnect_when_not_connected(self):
         """Test that disconnect can be called safely when not connected."""
@@ -59,3 +111,102 @@ class TestDatabaseIntegration:
         
         # Check that error was logged
         assert "Attempted to run query without database connection" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_memory_backend(self):
+        """Test that a memory:// URI runs queries in process."""
+        db = DatabaseManager()
+        await db.connect("memory://")
+
+        await db.run_write("CREATE (:Genre {id: 'g1', name: 'Jazz'})")
+        assert await db.run_read("MATCH (g:Genre) RETURN g.name AS name") == [{"name": "Jazz"}]
+
+        with pytest.raises(RuntimeError, match="boom"):
+            async with db.transaction():
+                await db.run_write("MATCH (g:Genre) SET g.name = 'Bebop'")
+                raise RuntimeError("boom")
+
+        assert await db.run_read("MATCH (g:Genre) RETURN g.name AS name") == [{"name": "Jazz"}]
+        await db.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_transaction_closed_by_driver(self, monkeypatch):
+        """Test errors raised after the driver closed the transaction aren't replaced by the rollback."""
+        db = DatabaseManager()
+        await db.connect("memory://")
+
+        async def failing_commit(tx):
+            await MemoryTransaction.rollback(tx)
+            raise RuntimeError("constraint violated on commit")
+
+        with pytest.raises(asyncio.CancelledError):
+            async with db.transaction() as tx:
+                await db.run_write("CREATE (:Genre {id: 'g1', name: 'Jazz'})")
+                await tx.close()
+                raise asyncio.CancelledError()
+
+        monkeypatch.setattr(MemoryTransaction, "commit", failing_commit)
+        with pytest.raises(RuntimeError, match="on commit"):
+            async with db.transaction():
+                await db.run_write("CREATE (:Genre {id: 'g1', name: 'Jazz'})")
+        monkeypatch.undo()
+        assert await db.run_read("MATCH (g:Genre) RETURN g.id AS id") == []
+        await db.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_transaction_not_shared_with_spawned_tasks(self):
+        """Test tasks spawned inside a transaction block can't run queries in it."""
+        db = DatabaseManager()
+        await db.connect("memory://")
+
+        async with db.transaction():
+            assert db.in_transaction
+            with pytest.raises(RuntimeError, match="task that opened it"):
+                await asyncio.create_task(db.run_read("RETURN 1 AS x"))
+            assert await db.run_read("RETURN 1 AS x") == [{"x": 1}]
+        await db.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_after_transaction(self):
+        """Test callbacks run once the outermost block ends, committed or not, and at once outside one."""
+        db = DatabaseManager()
+        await db.connect("memory://")
+        calls = []
+
+        db.after_transaction(lambda: calls.append("now"))
+        async with db.transaction():
+            async with db.transaction():
+                db.after_transaction(lambda: calls.append("committed"))
+            assert calls == ["now"]
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                db.after_transaction(lambda: calls.append("rolled back"))
+                raise RuntimeError("boom")
+        assert calls == ["now", "committed", "rolled back"]
+        await db.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_query_stats(self, caplog):
+        """Test that queries are timed and slow ones are logged."""
+        db = DatabaseManager()
+        await db.connect("memory://")
+        db.query_stats.configure(slow_query_ms=0)
+
+        await db.run_write("CREATE (:Genre {id: 'g1', name: 'Jazz'})")
+        await db.run_read("MATCH (g:Genre {id: $id}) RETURN g.name AS name", {"id": "g1"})
+        await db.run_read("MATCH (g:Genre {id: $id}) RETURN g.name AS name", {"id": "g2"})
+        async for _ in db.stream_query("MATCH (g:Genre) RETURN g.id AS id"):
+            pass
+
+        stats = {row["query"]: row for row in db.query_stats.snapshot()}
+        lookup = stats["MATCH (g:Genre {id: $id}) RETURN g.name AS name"]
+        assert lookup["count"] == 2
+        assert lookup["records"] == 1
+        assert lookup["p95_ms"] >= lookup["p50_ms"] > 0
+        assert stats["MATCH (g:Genre) RETURN g.id AS id"]["records"] == 1
+
+        slow = db.query_stats.slow_queries()
+        assert len(slow) == 4
+        assert slow[1]["parameters"] == {"id": "str"}
+        assert "Slow query" in caplog.text
+        await db.disconnect()
@@ -0,0 +1,200 @@
+"""
+Unit tests for the genre hierarchy closure.
+"""
+
+import random
+
+import pytest
+import pytest_asyncio
+
+from musical_brain.genres import (
+    GenreClosure, genre_closure, link_subgenres, list_albums_in_genre, load_genre_closure, refresh_genre_closure,
+    unlink_subgenres
+)
+from musical_brain.services import create_nodes, create_relationships, delete_relationships
+
+# rock <- punk <- hardcore, rock <- metal, {punk, metal} <- crossover
+EDGES = [("punk", "rock"), ("hardcore", "punk"), ("metal", "rock"), ("crossover", "punk"), ("crossover", "metal")]
+
+
+def closure_of(closure: GenreClosure) -> dict:
+    return {genre_id: sorted(closure.ancestors(genre_id)) for genre_id in closure.ids}
+
+
+class TestGenreClosure:
+    """Test suite for the in-memory closure."""
+
+    def test_build(self):
+        """Test ancestors and descendants through a diamond."""
+        closure = GenreClosure()
+        closure.build(["rock", "jazz"], EDGES)
+        assert sorted(closure.ancestors("crossover")) == ["metal", "punk", "rock"]
+        assert closure.ancestors("jazz") == []
+        assert sorted(closure.descendants("rock")) == ["crossover", "hardcore", "metal", "punk"]
+        assert closure.descendants("punk", include_self=True)[0] == "punk"
+        assert closure.descendants("unknown", include_self=True) == ["unknown"]
+        assert closure.stats() == {"genres": 6, "edges": 5, "closure_pairs": 7, "max_ancestors": 3}
+
+    def test_cycles_rejected(self):
+        """Test cycles fail both when building and when linking."""
+        closure = GenreClosure()
+        with pytest.raises(ValueError, match="cycle"):
+            closure.build([], [("a", "b"), ("b", "c"), ("c", "a")])
+        assert not closure.loaded
+
+        closure.build([], EDGES)
+        with pytest.raises(ValueError, match="cycle"):
+            closure.add_edge("rock", "hardcore")
+        with pytest.raises(ValueError, match="cycle"):
+            closure.add_edge("rock", "rock")
+
+    def test_incremental_matches_rebuild(self):
+        """Test random links and unlinks give the same closure as a rebuild."""
+        rng = random.Random(7)
+        genres = [f"g{i}" for i in range(40)]
+        closure = GenreClosure()
+        closure.build(genres, [])
+        edges = set()
+        for _ in range(300):
+            child, parent = rng.sample(genres, 2)
+            if (child, parent) in edges:
+                changed = closure.remove_edge(child, parent)
+                edges.discard((child, parent))
+            else:
+                try:
+                    changed = closure.add_edge(child, parent)
+                except ValueError:
+                    continue
+                edges.add((child, parent))
+            rebuilt = GenreClosure()
+            rebuilt.build(genres, edges)
+            assert closure_of(closure) == closure_of(rebuilt)
+            assert set(changed) <= set(genres)
+        for genre_id in genres:
+            assert sorted(closure.descendants(genre_id)) == sorted(rebuilt.descendants(genre_id))
+
+
+class TestPersistedClosure:
+    """Test suite for loading, persisting and querying the closure."""
+
+    @pytest_asyncio.fixture
+    async def catalogue(self, memory_db):
+        genre_closure.clear()
+        await create_nodes("Genre", [{"id": g, "name": g.title()} for g in ["rock", "punk", "hardcore", "jazz"]])
+        await create_nodes("Album", [
+            {"id": f"album-{i}", "title": f"Album {i}", "album_type": "LP"} for i in range(4)
+        ])
+        await create_relationships("Genre", "SUBGENRE_OF", "Genre", [("punk", "rock")])
+        await create_relationships("Album", "BELONGS_TO_GENRE", "Genre", [
+            ("album-0", "rock"), ("album-1", "punk"), ("album-1", "rock"), ("album-2", "hardcore"), ("album-3", "jazz"),
+        ])
+        yield memory_db
+        genre_closure.clear()
+        genre_closure.persist_mode = None
+
+    @staticmethod
+    def ids(page: dict) -> list:
+        return sorted(album["id"] for album in page["items"])
+
+    @pytest.mark.asyncio
+    async def test_listing(self, catalogue):
+        """Test genre listings with the closure match the traversal fallback."""
+        fallback = await list_albums_in_genre("rock")
+        await load_genre_closure()
+        assert self.ids(await list_albums_in_genre("rock")) == self.ids(fallback) == ["album-0", "album-1"]
+        assert self.ids(await list_albums_in_genre("rock", include_subgenres=False)) == ["album-0", "album-1"]
+        assert self.ids(await list_albums_in_genre("punk", include_subgenres=False)) == ["album-1"]
+
+        await link_subgenres([("hardcore", "punk")])
+        assert self.ids(await list_albums_in_genre("rock")) == ["album-0", "album-1", "album-2"]
+        assert sorted(genre_closure.ancestors("hardcore")) == ["punk", "rock"]
+
+        first = await list_albums_in_genre("rock", limit=2)
+        second = await list_albums_in_genre("rock", limit=2, cursor=first["next_cursor"])
+        assert sorted(self.ids(first) + self.ids(second)) == ["album-0", "album-1", "album-2"]
+        assert second["next_cursor"] is None
+
+    @pytest.mark.asyncio
+    async def test_persist_edges(self, catalogue):
+        """Test ANCESTOR_OF edges follow incremental changes."""
+        await load_genre_closure(persist="edges")
+        genre_closure.persist_mode = "edges"
+        await link_subgenres([("hardcore", "punk")])
+
+        query = "MATCH (a:Genre)-[:ANCESTOR_OF]->(g:Genre) RETURN a.id AS ancestor, g.id AS genre"
+        pairs = {(row["ancestor"], row["genre"]) for row in await catalogue.run_read(query)}
+        assert pairs == {("rock", "punk"), ("punk", "hardcore"), ("rock", "hardcore")}
+
+        await unlink_subgenres([("punk", "rock")])
+        pairs = {(row["ancestor"], row["genre"]) for row in await catalogue.run_read(query)}
+        assert pairs == {("punk", "hardcore")}
+
+    @pytest.mark.asyncio
+    async def test_persist_property(self, catalogue):
+        """Test the ancestor_ids property mode."""
+        await load_genre_closure()
+        await link_subgenres([("hardcore", "punk")], persist="property")
+        rows = await catalogue.run_read("MATCH (g:Genre {id: 'hardcore'}) RETURN g.ancestor_ids AS ancestors")
+        assert sorted(rows[0]["ancestors"]) == ["punk", "rock"]
+
+    @pytest.mark.asyncio
+    async def test_cycle_rolls_back(self, catalogue):
+        """Test a cyclic link writes nothing and leaves the closure as it was."""
+        await load_genre_closure()
+        with pytest.raises(ValueError, match="cycle"):
+            await link_subgenres([("hardcore", "punk"), ("rock", "hardcore")])
+        edges = await catalogue.run_read("MATCH (:Genre)-[r:SUBGENRE_OF]->(:Genre) RETURN count(r) AS n")
+        assert edges == [{"n": 1}]
+        assert genre_closure.ancestors("hardcore") == []
+        assert genre_closure.loaded
+
+    @pytest.mark.asyncio
+    async def test_missing_genres_skipped(self, catalogue):
+        """Test links to genres that don't exist are not added to the closure."""
+        await load_genre_closure()
+        assert await link_subgenres([("hardcore", "punk"), ("ghost", "rock")]) == 1
+        assert sorted(genre_closure.ancestors("hardcore")) == ["punk", "rock"]
+        assert "ghost" not in genre_closure.index
+        assert "ghost" not in genre_closure.descendants("rock")
+
+        assert await unlink_subgenres([("ghost", "rock"), ("jazz", "rock")]) == 0
+        assert sorted(genre_closure.descendants("rock")) == ["hardcore", "punk"]
+
+    @pytest.mark.asyncio
+    async def test_failed_write_leaves_closure(self, catalogue):
+        """Test the closure only changes once the transaction commits."""
+        await load_genre_closure()
+        with pytest.raises(ValueError, match="persist mode"):
+            await link_subgenres([("hardcore", "punk")], persist="nowhere")
+        edges = await catalogue.run_read("MATCH (:Genre)-[r:SUBGENRE_OF]->(:Genre) RETURN count(r) AS n")
+        assert edges == [{"n": 1}]
+        assert genre_closure.ancestors("hardcore") == []
+
+    @pytest.mark.asyncio
+    async def test_refresh(self, catalogue):
+        """Test changes written elsewhere are picked up by a refresh."""
+        await load_genre_closure()
+        assert not await refresh_genre_closure()
+
+        await create_relationships("Genre", "SUBGENRE_OF", "Genre", [("hardcore", "punk")])
+        assert await refresh_genre_closure()
+        assert sorted(genre_closure.ancestors("hardcore")) == ["punk", "rock"]
+        assert not await refresh_genre_closure()
+
+        await delete_relationships("Genre", "SUBGENRE_OF", "Genre", [("punk", "rock")])
+        assert await refresh_genre_closure()
+        assert genre_closure.ancestors("hardcore") == ["punk"]
+
+    @pytest.mark.asyncio
+    async def test_local_changes_keep_closure_current(self, catalogue):
+        """Test links made here don't make the next refresh reload, unless the database changed first."""
+        await load_genre_closure()
+        await link_subgenres([("hardcore", "punk")])
+        assert not await refresh_genre_closure()
+        await unlink_subgenres([("hardcore", "punk")])
+        assert not await refresh_genre_closure()
+
+        await create_relationships("Genre", "SUBGENRE_OF", "Genre", [("jazz", "rock")])
+        await link_subgenres([("hardcore", "punk")])
+        assert await refresh_genre_closure()
+        assert genre_closure.ancestors("jazz") == ["rock"]
@@ -0,0 +1,88 @@
+"""
+Unit tests for the background health monitor and probes.
+"""
+
+import httpx
+import pytest
+
+from musical_brain.app import app
+from musical_brain.database import DatabaseManager
+from musical_brain.health import HealthMonitor, health_monitor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestHealthMonitor:
+    """Test suite for HealthMonitor."""
+
+    @pytest.mark.asyncio
+    async def test_ready_after_check(self, memory_db):
+        """Test that a successful ping makes the database ready until it goes stale."""
+        clock = FakeClock()
+        monitor = HealthMonitor(stale_after=10.0, clock=clock)
+        assert not monitor.ready
+        assert monitor.snapshot()["checked_at"] is None
+
+        assert await monitor.check()
+        assert monitor.ready
+        assert monitor.snapshot()["database"] == "connected"
+
+        clock.now += 11
+        assert not monitor.ready
+        assert monitor.snapshot()["age_seconds"] == 11.0
+
+    @pytest.mark.asyncio
+    async def test_failed_check(self, monkeypatch):
+        """Test that failures are counted and reported."""
+        monkeypatch.setattr("musical_brain.health.db", DatabaseManager())
+        monitor = HealthMonitor()
+        assert not await monitor.check()
+        assert not await monitor.check()
+        state = monitor.snapshot()
+        assert state["ready"] is False
+        assert state["consecutive_failures"] == 2
+        assert state["error"] == "connection test failed"
+
+    @pytest.mark.asyncio
+    async def test_start_and_stop(self, memory_db):
+        """Test that start checks immediately and stop cancels the loop."""
+        monitor = HealthMonitor(interval=60.0)
+        await monitor.start()
+        assert monitor.ready
+        assert monitor._task is not None
+        await monitor.stop()
+        assert monitor._task is None
+
+
+class TestProbes:
+    """Test suite for the probe endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_probes(self, memory_db, monkeypatch):
+        """Test that probes serve the cached state without a round trip."""
+        # Restore the global monitor's check results afterwards
+        for name in ("ok", "error", "latency_ms", "checked_at", "consecutive_failures", "_checked_monotonic"):
+            monkeypatch.setattr(health_monitor, name, getattr(health_monitor, name))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/livez")).json() == {"status": "alive"}
+
+            await health_monitor.check()
+            ready = await client.get("/readyz")
+            assert ready.status_code == 200
+            assert ready.json()["status"] == "ready"
+            health = (await client.get("/health")).json()
+            assert health["status"] == "healthy"
+            assert health["database"] == "connected"
+            assert "pool" in health
+
+            monkeypatch.setattr(health_monitor, "ok", False)
+            not_ready = await client.get("/readyz")
+            assert not_ready.status_code == 503
+            assert (await client.get("/health")).json()["status"] == "unhealthy"
@@ -0,0 +1,153 @@
+"""
+Unit tests for artist influence scores.
+"""
+
+import httpx
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from musical_brain.app import app
+from musical_brain.database import db
+from musical_brain.influence import (
+    betweenness, compute_influence, influence_snapshot, list_artists_by_score, pagerank, run_influence_job,
+    write_influence_scores,
+)
+from musical_brain.services import create_nodes, create_relationships, get_node
+from musical_brain.snapshot import GraphSnapshot, pack_csr, refresh_graph_snapshot
+
+
+def edge_arrays(edges):
+    sources, targets = zip(*edges)
+    return np.array(sources, dtype=np.int32), np.array(targets, dtype=np.int32)
+
+
+def dense_pagerank(edges, n, damping=0.85, iterations=200):
+    matrix = np.zeros((n, n))
+    for start, end in edges:
+        matrix[end, start] += 1
+    out_degree = matrix.sum(axis=0)
+    for node in range(n):
+        matrix[:, node] = matrix[:, node] / out_degree[node] if out_degree[node] else 1.0 / n
+    rank = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        rank = damping * matrix @ rank + (1 - damping) / n
+    return rank
+
+
+class TestScores:
+    """Test suite for PageRank and betweenness."""
+
+    def test_pagerank_matches_dense(self):
+        """Test the sparse iteration against a dense transition matrix, dangling nodes included."""
+        rng = np.random.default_rng(1)
+        edges = sorted({(int(s), int(e)) for s, e in rng.integers(0, 30, size=(80, 2)) if s != e})
+        ranks, iterations = pagerank(*edge_arrays(edges), 32)
+        assert iterations < 100
+        assert ranks.sum() == pytest.approx(1.0)
+        np.testing.assert_allclose(ranks, dense_pagerank(edges, 32), atol=1e-9)
+
+    def test_betweenness_exact(self):
+        """Test every-source betweenness on a path and a diamond."""
+        # 0 -> 1 -> 2, and 3 -> {4, 5} -> 6
+        edges = [(0, 1), (1, 2), (3, 4), (3, 5), (4, 6), (5, 6)]
+        csr = pack_csr(*edge_arrays(edges), 7)
+        assert betweenness(csr, samples=7).tolist() == [0.0, 1.0, 0.0, 0.0, 0.5, 0.5, 0.0]
+
+    def test_betweenness_sampled(self):
+        """Test sampling is seeded and scaled to the exact total."""
+        rng = np.random.default_rng(2)
+        sources, targets = rng.integers(0, 200, size=(2, 1000)).astype(np.int32)
+        csr = pack_csr(sources, targets, 200)
+        exact = betweenness(csr, samples=200)
+        sampled = betweenness(csr, samples=100, seed=5)
+        assert sampled.tolist() == betweenness(csr, samples=100, seed=5).tolist()
+        assert sampled.sum() == pytest.approx(exact.sum(), rel=0.2)
+
+    def test_compute_influence(self):
+        """Test scores cover artists only and follow the INFLUENCED_BY direction."""
+        snapshot = GraphSnapshot(labels=["Artist", "Album"], rel_types=["INFLUENCED_BY"])
+        snapshot.add_nodes("Album", [("album-0", None)])
+        snapshot.add_nodes("Artist", [(f"artist-{i}", None) for i in range(4)])
+        snapshot.add_edges("INFLUENCED_BY", [
+            ("artist-1", "artist-0", None), ("artist-2", "artist-0", None), ("artist-3", "artist-2", None),
+        ])
+        scores = compute_influence(snapshot)
+        assert scores.ids == [f"artist-{i}" for i in range(4)]
+        assert scores.in_degree.tolist() == [2, 0, 1, 0]
+        assert scores.out_degree.tolist() == [0, 1, 1, 1]
+        assert int(np.argmax(scores.pagerank)) == 0
+        assert scores.betweenness.tolist() == [0.0, 0.0, 1.0, 0.0]
+
+
+@pytest_asyncio.fixture
+async def influence_graph(memory_db):
+    """Six artists, where artist-0 influenced everyone and artist-1 influenced two."""
+    influence_snapshot.clear()
+    await create_nodes("Artist", [{"id": f"artist-{i}", "name": f"Artist {i}"} for i in range(6)])
+    await create_relationships("Artist", "INFLUENCED_BY", "Artist", [
+        *((f"artist-{i}", "artist-0") for i in range(1, 6)),
+        ("artist-4", "artist-1"), ("artist-5", "artist-1"),
+    ])
+    yield
+    influence_snapshot.clear()
+
+
+class TestInfluenceJob:
+    """Test suite for writing and listing scores."""
+
+    @pytest.mark.asyncio
+    async def test_job_writes_scores(self, influence_graph):
+        """Test the job scores every artist and keeps the cache in step."""
+        assert (await get_node("Artist", "artist-0")).get("influence_pagerank") is None
+        stats = await run_influence_job()
+        assert stats["artists"] == stats["updated"] == 6
+        assert stats["edges"] == 7
+        artist = await get_node("Artist", "artist-0")
+        assert artist["influence_in_degree"] == 5
+        assert artist["influence_pagerank"] > 0.3
+        assert artist["influence_computed_at"]
+
+        await create_nodes("Artist", [{"id": "artist-6", "name": "Artist 6"}])
+        await create_relationships("Artist", "INFLUENCED_BY", "Artist", [("artist-6", "artist-1")])
+        assert (await run_influence_job())["artists"] == 7
+        assert (await get_node("Artist", "artist-1"))["influence_in_degree"] == 3
+
+    @pytest.mark.asyncio
+    async def test_batches_commit_separately(self, influence_graph, monkeypatch):
+        """Test each batch of scores is written in its own transaction."""
+        await refresh_graph_snapshot(influence_snapshot)
+        scores = compute_influence(influence_snapshot)
+        writes = []
+        run_write = db.run_write
+
+        async def recording_write(query, parameters=None):
+            writes.append((len(parameters["rows"]), db.in_transaction))
+            return await run_write(query, parameters)
+
+        monkeypatch.setattr(db, "run_write", recording_write)
+        assert await write_influence_scores(scores, batch_size=4) == 6
+        assert writes == [(4, False), (2, False)]
+
+    @pytest.mark.asyncio
+    async def test_list_by_score(self, influence_graph):
+        """Test sorting by a score with cursor pagination."""
+        await run_influence_job()
+        first = await list_artists_by_score("pagerank", limit=2)
+        assert [a["id"] for a in first["items"]] == ["artist-0", "artist-1"]
+        rest = await list_artists_by_score("pagerank", limit=10, cursor=first["next_cursor"])
+        assert len(rest["items"]) == 4
+        assert rest["next_cursor"] is None
+        with pytest.raises(ValueError, match="Unknown sort"):
+            await list_artists_by_score("popularity")
+
+    @pytest.mark.asyncio
+    async def test_artists_endpoint_sort(self, influence_graph):
+        """Test GET /artists?sort= lists by score and rejects unknown sorts."""
+        await run_influence_job()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/artists", params={"sort": "in_degree", "limit": 3})
+            assert response.status_code == 200
+            assert [a["influence_in_degree"] for a in response.json()["items"]] == [5, 2, 0]
+            assert (await client.get("/artists", params={"sort": "name"})).status_code == 400
@@ -0,0 +1,179 @@
+import pytest
+
+from musical_brain.inmemory import CypherError, MemoryDriver
+
+
+async def run(driver: MemoryDriver, query: str, **params) -> list:
+    async with driver.session() as session:
+        result = await session.run(query, params)
+        return await result.data()
+
+
+class TestMemoryCypher:
+    """Test suite for the in-memory Cypher interpreter."""
+
+    @pytest.mark.asyncio
+    async def test_create_and_match(self):
+        """Test that created nodes can be matched by label and properties."""
+        driver = MemoryDriver()
+        await run(driver, "CREATE (n:Album $props) RETURN n", props={"id": "a1", "title": "Kind of Blue"})
+        await run(driver, "CREATE (:Album {id: 'a2', title: 'Blue Train'})")
+
+        assert await run(driver, "MATCH (n:Album {id: $id}) RETURN n", id="a1") == [
+            {"n": {"id": "a1", "title": "Kind of Blue"}}
+        ]
+        rows = await run(driver, "MATCH (n:Album) WHERE n.id IN ['a2', 'zz'] RETURN n.title AS title")
+        assert rows == [{"title": "Blue Train"}]
+        assert await run(driver, "MATCH (n:Artist) RETURN n") == []
+
+    @pytest.mark.asyncio
+    async def test_order_skip_limit(self):
+        """Test ordering with nulls last ascending and first descending."""
+        driver = MemoryDriver()
+        await run(driver, "UNWIND $rows AS row CREATE (n:Album) SET n = row", rows=[
+            {"id": "a", "year": 1959}, {"id": "b"}, {"id": "c", "year": 1957}, {"id": "d", "year": 1964},
+        ])
+
+        rows = await run(driver, "MATCH (n:Album) RETURN n.id AS id ORDER BY n.year")
+        assert [row["id"] for row in rows] == ["c", "a", "d", "b"]
+        rows = await run(driver, "MATCH (n:Album) RETURN n.id AS id ORDER BY n.year DESC SKIP 1 LIMIT 2")
+        assert [row["id"] for row in rows] == ["d", "a"]
+
+    @pytest.mark.asyncio
+    async def test_aggregation(self):
+        """Test grouping keys and aggregate functions."""
+        driver = MemoryDriver()
+        await run(driver, "UNWIND range(1, 6) AS i CREATE (:Track {album: i % 2, length: i})")
+
+        rows = await run(driver, """
+            MATCH (t:Track)
+            RETURN t.album AS album, count(*) AS tracks, sum(t.length) AS total, collect(t.length) AS lengths
+            ORDER BY album
+        """)
+        assert rows == [
+            {"album": 0, "tracks": 3, "total": 12, "lengths": [2, 4, 6]},
+            {"album": 1, "tracks": 3, "total": 9, "lengths": [1, 3, 5]},
+        ]
+        assert await run(driver, "MATCH (n:Nothing) RETURN count(n) AS c") == [{"c": 0}]
+
+    @pytest.mark.asyncio
+    async def test_relationships(self):
+        """Test creating and traversing relationships in both directions."""
+        driver = MemoryDriver()
+        await run(driver, """
+            CREATE (a:Artist {name: 'Coltrane'})-[:PERFORMED_ON {role: 'sax'}]->(b:Album {title: 'Blue Train'})
+        """)
+        await run(driver, """
+            MATCH (b:Album {title: 'Blue Train'})
+            CREATE (b)-[:HAS_GENRE]->(:Genre {name: 'Hard Bop'})
+        """)
+
+        rows = await run(driver, """
+            MATCH (a:Artist)-[r:PERFORMED_ON]->(b)<-[:PERFORMED_ON]-(a)
+            RETURN a.name AS name
+        """)
+        assert rows == []
+        rows = await run(driver, """
+            MATCH (g:Genre)<-[:HAS_GENRE]-(b:Album)<-[r]-(a:Artist)
+            RETURN a.name AS artist, r.role AS role, type(r) AS type, g.name AS genre
+        """)
+        assert rows == [{"artist": "Coltrane", "role": "sax", "type": "PERFORMED_ON", "genre": "Hard Bop"}]
+        rows = await run(driver, "MATCH (a:Artist)-[*2]->(g) RETURN g.name AS name")
+        assert rows == [{"name": "Hard Bop"}]
+
+    @pytest.mark.asyncio
+    async def test_merge(self):
+        """Test that MERGE matches existing nodes and creates missing ones."""
+        driver = MemoryDriver()
+        query = """
+            UNWIND $rows AS row
+            MERGE (g:Genre {name: row.name})
+            ON CREATE SET g.created = true
+            ON MATCH SET g.matched = true
+            RETURN g.name AS name
+        """
+        await run(driver, query, rows=[{"name": "Jazz"}])
+        await run(driver, query, rows=[{"name": "Jazz"}, {"name": "Blues"}])
+
+        rows = await run(driver, "MATCH (g:Genre) RETURN properties(g) AS g ORDER BY g.name")
+        assert rows == [
+            {"g": {"name": "Blues", "created": True}},
+            {"g": {"name": "Jazz", "created": True, "matched": True}},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_null_semantics(self):
+        """Test three-valued logic in WHERE and SET of null removing properties."""
+        driver = MemoryDriver()
+        await run(driver, "CREATE (:Album {id: 'a', score: 5}), (:Album {id: 'b'})")
+
+        assert await run(driver, "MATCH (n:Album) WHERE n.score <> 5 RETURN n.id AS id") == []
+        rows = await run(driver, "MATCH (n:Album) WHERE n.score IS NULL RETURN n.id AS id")
+        assert rows == [{"id": "b"}]
+
+        await run(driver, "MATCH (n:Album {id: 'a'}) SET n += {score: null, title: 'A'}")
+        assert await run(driver, "MATCH (n:Album {id: 'a'}) RETURN n") == [{"n": {"id": "a", "title": "A"}}]
+
+    @pytest.mark.asyncio
+    async def test_delete_requires_detach(self):
+        """Test that nodes with relationships need DETACH DELETE."""
+        driver = MemoryDriver()
+        await run(driver, "CREATE (:Artist {id: 'x'})-[:PERFORMED_ON]->(:Album {id: 'y'})")
+
+        with pytest.raises(CypherError, match="still has relationships"):
+            await run(driver, "MATCH (n:Artist) DELETE n")
+        await run(driver, "MATCH (n:Artist) DETACH DELETE n")
+        assert await run(driver, "MATCH (n) RETURN n.id AS id") == [{"id": "y"}]
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_undone(self):
+        """Test that an auto-commit query failing midway leaves no changes."""
+        driver = MemoryDriver()
+
+        with pytest.raises(CypherError):
+            await run(driver, "UNWIND [1, 2, 0] AS i CREATE (:N {v: 10 / i})")
+        assert await run(driver, "MATCH (n) RETURN count(n) AS c") == [{"c": 0}]
+
+    @pytest.mark.asyncio
+    async def test_transaction_rollback(self):
+        """Test that explicit transactions undo their writes on rollback."""
+        driver = MemoryDriver()
+        await run(driver, "CREATE (:Album {id: 'a', title: 'Old'})")
+
+        async with driver.session() as session:
+            tx = await session.begin_transaction()
+            await tx.run("MATCH (n:Album) SET n.title = 'New' CREATE (:Album {id: 'b'})")
+            await tx.rollback()
+
+        assert await run(driver, "MATCH (n:Album) RETURN n") == [{"n": {"id": "a", "title": "Old"}}]
+
+    @pytest.mark.asyncio
+    async def test_closed_transaction(self):
+        """Test a failed query fails the transaction, and a closed one can't be rolled back again."""
+        driver = MemoryDriver()
+
+        async with driver.session() as session:
+            tx = await session.begin_transaction()
+            await tx.run("CREATE (:Album {id: 'a'})")
+            with pytest.raises(CypherError):
+                await tx.run("UNWIND [1, 0] AS i CREATE (:N {v: 10 / i})")
+            with pytest.raises(CypherError, match="failed"):
+                await tx.run("CREATE (:Album {id: 'b'})")
+            assert not tx.closed()
+            await tx.rollback()
+            assert tx.closed()
+            with pytest.raises(CypherError, match="closed"):
+                await tx.rollback()
+            await tx.close()
+
+        assert await run(driver, "MATCH (n) RETURN count(n) AS c") == [{"c": 0}]
+
+    @pytest.mark.asyncio
+    async def test_unsupported_syntax(self):
+        """Test that queries outside the subset raise CypherError."""
+        driver = MemoryDriver()
+
+        with pytest.raises(CypherError):
+            await run(driver, "CALL db.labels()")
+        with pytest.raises(CypherError, match="Unknown function"):
+            await run(driver, "RETURN nope(1) AS x")
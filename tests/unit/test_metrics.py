@@ -0,0 +1,108 @@
+"""
+Unit tests for the Prometheus metrics exposition.
+"""
+
+import httpx
+import pytest
+
+from musical_brain import services
+from musical_brain.app import app
+from musical_brain.database import db
+from musical_brain.metrics import MetricsRegistry, query_duration
+
+
+class TestMetrics:
+    """Test suite for in-process metrics."""
+
+    def test_text_format(self):
+        """Test counters, gauges and cumulative histogram buckets."""
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests.", ("route",))
+        in_flight = registry.gauge("in_flight", "In flight.")
+        latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+
+        requests.inc('/a"b')
+        requests.inc('/a"b')
+        in_flight.inc()
+        in_flight.dec()
+        for value in (0.05, 0.1, 0.5, 2.0):
+            latency.observe(value, "/x")
+
+        lines = registry.render().splitlines()
+        assert "# TYPE requests_total counter" in lines
+        assert 'requests_total{route="/a\\"b"} 2.0' in lines
+        assert "in_flight 0.0" in lines
+        assert 'latency_seconds_bucket{route="/x",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/x",le="1.0"} 3' in lines
+        assert 'latency_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+        assert 'latency_seconds_sum{route="/x"} 2.65' in lines
+        assert 'latency_seconds_count{route="/x"} 4' in lines
+
+    def test_failing_collector(self):
+        """Test that a broken collector doesn't break the scrape."""
+        registry = MetricsRegistry()
+        registry.gauge("up", "Up.").set(1)
+
+        def broken():
+            raise RuntimeError("boom")
+
+        registry.collectors.append(broken)
+        assert registry.render() == "# HELP up Up.\n# TYPE up gauge\nup 1\n"
+
+    @pytest.mark.asyncio
+    async def test_queries_attributed_to_service(self, memory_db):
+        """Test that queries are labelled with the calling service function."""
+        before = query_duration.series.get(("get_node", "Album"), ([0], [0.0]))[0][:]
+        album = await services.create_node("Album", {"title": "Kind of Blue"})
+        services.node_cache.clear()
+        await services.get_node("Album", album["id"])
+
+        counts = query_duration.series[("get_node", "Album")][0]
+        assert sum(counts) == sum(before) + 1
+
+    @pytest.mark.asyncio
+    async def test_wrappers_not_instrumented(self, memory_db):
+        """Test that delegating wrappers leave attribution to the function running the query."""
+        album = await services.create_node("Album", {"title": "Kind of Blue"})
+        before = sum(query_duration.series.get(("apply_updates", "Album"), ([0], [0.0]))[0])
+        await services.update_node("Album", album["id"], {"review_score": 5.0})
+
+        assert sum(query_duration.series[("apply_updates", "Album")][0]) == before + 1
+        assert not any(function == "update_node" for function, _ in query_duration.series)
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self, memory_db):
+        """Test that requests show up in /metrics by route template."""
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/albums/missing")).status_code == 404
+            response = await client.get("/metrics")
+
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert 'musical_brain_http_requests_total{method="GET",route="/albums/{album_id}",status="404"}' in body
+        assert 'musical_brain_db_query_duration_seconds_count{function="get_node",label="Album"}' in body
+        assert "musical_brain_db_pool_max_size" in body
+        assert "musical_brain_cache_hit_ratio" in body
+        assert "musical_brain_http_requests_in_flight 1.0" in body
+
+    @pytest.mark.asyncio
+    async def test_query_stats_exposed(self, memory_db):
+        """Test that per-query aggregates reach /metrics and /debug/queries."""
+        threshold = db.query_stats.slow_query_ms
+        db.query_stats.reset()
+        db.query_stats.configure(slow_query_ms=0.0, enabled=True)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/albums", json={"title": "Kind of Blue", "album_type": "LP"})
+            metrics_body = (await client.get("/metrics")).text
+            debug = (await client.get("/debug/queries", params={"limit": 5})).json()
+        db.query_stats.configure(slow_query_ms=threshold)
+
+        query = debug["queries"][0]["query"]
+        assert query.startswith("CREATE (n:Album")
+        assert {"count", "p50_ms", "p95_ms", "p99_ms"} <= set(debug["queries"][0])
+        assert debug["slow_queries"][0]["query"] == query
+        assert 'musical_brain_db_query_latency_ms{query="' in metrics_body
+        assert 'quantile="0.99"} ' in metrics_body
+        assert "musical_brain_db_slow_queries 1" in metrics_body
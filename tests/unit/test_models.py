@@ -3,10 +3,13 @@ Unit tests for Pydantic models.
 """
 
 import pytest
-from datetime import datetime
+from datetime import datetime, timezone
 from pydantic import ValidationError
 
-from musical_brain.models import Album, Artist, Genre, AlbumType
+from musical_brain.models import (
+    Album, AlbumUpdate, Artist, ArtistUpdate, Genre, GenreUpdate, AlbumType, from_db_rows, parse_datetime,
+    validate_many
+)
 
 
 class TestAlbumModel:
@@ -97,6 +100,43 @@ class TestAlbumModel:
             Album(title="Test", album_type="Invalid")
 
 
+class TestAlbumUpdateModel:
+    """Test suite for partial album updates."""
+
+    def test_only_set_fields_are_dumped(self):
+        """Test that unset fields are left out of the update."""
+        updates = AlbumUpdate(review_score=4.0, album_type="EP")
+        assert updates.model_dump(mode="json", exclude_unset=True) == {
+            "review_score": 4.0,
+            "album_type": "EP",
+        }
+
+    def test_update_validation(self):
+        """Test that updates use the same constraints as Album."""
+        with pytest.raises(ValidationError):
+            AlbumUpdate(review_score=5.1)
+        
+        with pytest.raises(ValidationError):
+            AlbumUpdate(title="")
+
+    def test_required_fields_reject_null(self):
+        """Test that required fields cannot be cleared but optional ones can."""
+        with pytest.raises(ValidationError):
+            AlbumUpdate(title=None)
+        
+        with pytest.raises(ValidationError):
+            AlbumUpdate(album_type=None)
+        
+        with pytest.raises(ValidationError):
+            ArtistUpdate(name=None)
+        
+        with pytest.raises(ValidationError):
+            GenreUpdate(name=None)
+        
+        updates = AlbumUpdate(review_notes=None)
+        assert updates.model_dump(exclude_unset=True) == {"review_notes": None}
+
+
 class TestArtistModel:
     """Test suite for Artist model."""
 
@@ -207,4 +247,54 @@ class TestGenreModel:
         genre = Genre.model_validate(record)
         assert genre.id == "test-id"
         assert genre.name == "Test Genre"
-        assert genre.description == "Test description"
\ No newline at end of file
+        assert genre.description == "Test description"
+
+class TestBulkConversion:
+    """Test suite for bulk validation and stored-row conversion."""
+
+    ROWS = [
+        {
+            "id": f"album-{i}",
+            "title": f"Album {i}",
+            "album_type": "LP",
+            "release_year": 1970 + i,
+            "created_at": "2025-01-01T12:00:00+00:00",
+            "pagerank": 0.5,
+        }
+        for i in range(3)
+    ]
+
+    def test_validate_many(self):
+        """Test rows are validated in one call and errors carry the row index."""
+        albums = validate_many(Album, iter(self.ROWS))
+        assert [album.title for album in albums] == ["Album 0", "Album 1", "Album 2"]
+        assert albums[0].album_type == AlbumType.LP
+        assert albums[0].created_at == datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+
+        with pytest.raises(ValidationError) as error:
+            validate_many(Album, [self.ROWS[0], {"title": "", "album_type": "LP"}])
+        assert error.value.errors()[0]["loc"][:2] == (1, "title")
+
+    def test_from_db_rows(self):
+        """Test stored rows become models matching full validation."""
+        albums = from_db_rows(Album, self.ROWS)
+        assert albums == validate_many(Album, self.ROWS)
+        assert albums[0].model_fields_set == {"id", "title", "album_type", "release_year", "created_at"}
+        assert not hasattr(albums[0], "pagerank")
+
+    def test_from_db_rows_keeps_invalid_rows(self):
+        """Test rows that no longer pass validation are constructed, not rejected."""
+        legacy = {**self.ROWS[0], "id": "old", "release_year": 1850}
+        albums = from_db_rows(Album, [self.ROWS[1], legacy])
+        assert albums[0].release_year == 1971
+        assert albums[1].release_year == 1850
+        assert albums[1].created_at == datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+        assert albums[1].album_type == AlbumType.LP
+        assert "pagerank" not in albums[1].model_dump()
+
+    def test_parse_datetime(self):
+        """Test stored datetime values are parsed cheaply."""
+        now = datetime.now(timezone.utc)
+        assert parse_datetime(now.isoformat()) == now
+        assert parse_datetime(now) is now
+        assert parse_datetime(None) is None
@@ -0,0 +1,73 @@
+"""
+Unit tests for query timing statistics.
+"""
+
+import logging
+
+from musical_brain.querystats import QueryStats, QueryTiming, normalize_query, parameter_shape
+
+
+def _timing(total_ms: float, records: int = 1) -> QueryTiming:
+    timing = QueryTiming()
+    timing.total_ms = total_ms
+    timing.records = records
+    return timing
+
+
+class TestQueryStats:
+    """Test suite for query timing aggregates and the slow-query log."""
+
+    def test_normalize_query(self):
+        """Test that literals and whitespace don't split query groups."""
+        assert normalize_query("MATCH (a:Album)\n  WHERE a.year > 1999 RETURN a LIMIT 10") == (
+            "MATCH (a:Album) WHERE a.year > ? RETURN a LIMIT ?"
+        )
+        assert normalize_query("MATCH (g {name: 'Jazz'}) RETURN g") == "MATCH (g {name: ?}) RETURN g"
+        assert normalize_query("RETURN $p1") == "RETURN $p1"
+
+    def test_parameter_shape(self):
+        """Test that parameter values are described, not recorded."""
+        shape = parameter_shape({"rows": [{}, {}], "props": {"a": 1}, "id": "x", "limit": 5})
+        assert shape == {"rows": "list[2]", "props": "map[1]", "id": "str", "limit": "int"}
+        assert parameter_shape(None) == {}
+
+    def test_aggregates(self):
+        """Test counts, records and percentiles per normalised query."""
+        stats = QueryStats(slow_query_ms=None)
+        for ms in range(1, 101):
+            stats.record("RETURN 1", None, _timing(float(ms)))
+        stats.record("MATCH (n)  RETURN n", None, _timing(10000.0, records=0), error=ValueError("x"))
+
+        rows = stats.snapshot()
+        assert [row["count"] for row in rows] == [1, 100]
+        assert rows[0]["errors"] == 1
+        assert rows[1]["records"] == 100
+        assert rows[1]["p50_ms"] == 51.0
+        assert rows[1]["p99_ms"] == 99.0
+        assert rows[1]["max_ms"] == 100.0
+        assert stats.slow_queries() == []
+
+    def test_slow_query_log(self, caplog):
+        """Test that only queries over the threshold are logged."""
+        stats = QueryStats(slow_query_ms=100.0, slow_log_size=2)
+        with caplog.at_level(logging.WARNING, logger="musical_brain.querystats.slow"):
+            stats.record("RETURN $x", {"x": [1, 2, 3]}, _timing(50.0))
+            for _ in range(3):
+                stats.record("RETURN $x", {"x": [1, 2, 3]}, _timing(150.0, records=3))
+
+        slow = stats.slow_queries()
+        assert len(slow) == 2
+        assert slow[0]["parameters"] == {"x": "list[3]"}
+        assert slow[0]["records"] == 3
+        assert len(caplog.records) == 3
+
+    def test_disabled(self):
+        """Test that a disabled collector records nothing."""
+        stats = QueryStats(enabled=False)
+        stats.record("RETURN 1", None, _timing(1000.0))
+        assert stats.snapshot() == []
+        stats.configure(enabled=True)
+        stats.record("RETURN 1", None, _timing(1000.0))
+        assert len(stats.slow_queries()) == 1
+        stats.reset()
+        assert stats.snapshot() == [] and stats.slow_queries() == []
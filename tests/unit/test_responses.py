@@ -0,0 +1,60 @@
+"""
+Unit tests for fast JSON response encoding.
+"""
+
+import json
+from datetime import datetime, UTC
+
+import pytest
+
+from musical_brain.models import Album, AlbumType
+from musical_brain.responses import FastJSONResponse, dumps_orjson, dumps_stdlib, orjson
+
+ENCODERS = [dumps_stdlib] + ([dumps_orjson] if orjson is not None else [])
+
+
+class TestResponses:
+    """Test suite for the JSON response encoders."""
+
+    @pytest.mark.parametrize("dumps", ENCODERS)
+    def test_node_values(self, dumps):
+        """Test node dicts with datetimes, enums and unicode encode compactly."""
+        content = {
+            "items": [{"title": "Björk", "score": 4.5, "tags": ("a", "b")}],
+            "at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=UTC),
+            "type": AlbumType.LP,
+            "next_cursor": None,
+        }
+        body = dumps(content)
+        assert b" " not in body.replace(b"Bj\xc3\xb6rk", b"")
+        assert json.loads(body) == {
+            "items": [{"title": "Björk", "score": 4.5, "tags": ["a", "b"]}],
+            "at": "2025-01-02T03:04:05+00:00",
+            "type": "LP",
+            "next_cursor": None,
+        }
+
+    @pytest.mark.parametrize("dumps", ENCODERS)
+    def test_models(self, dumps):
+        """Test Pydantic models serialise without revalidation."""
+        album = Album.model_construct(title="Blue", album_type=AlbumType.LP, release_year=1971)
+        assert json.loads(dumps(album))["album_type"] == "LP"
+        assert json.loads(dumps({"album": album}))["album"]["title"] == "Blue"
+
+    @pytest.mark.parametrize("dumps", ENCODERS)
+    def test_non_finite_floats(self, dumps):
+        """Test NaN and infinities encode as null with either encoder."""
+        content = {"score": float("nan"), "items": [float("inf"), 1.5], "range": (float("-inf"),)}
+        assert dumps(content) == b'{"score":null,"items":[null,1.5],"range":[null]}'
+
+    def test_unsupported_type(self):
+        """Test unknown types raise like the stdlib encoder."""
+        with pytest.raises(TypeError):
+            dumps_stdlib({"x": object()})
+
+    def test_response(self):
+        """Test the response class sets the body and media type."""
+        response = FastJSONResponse({"a": 1}, status_code=201)
+        assert response.body == b'{"a":1}'
+        assert response.status_code == 201
+        assert response.media_type == "application/json"
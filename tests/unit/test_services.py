@@ -0,0 +1,290 @@
+"""
+Unit tests for service helpers, using the in-memory backend where a database is needed.
+"""
+
+import asyncio
+import contextvars
+
+import pytest
+
+from musical_brain.cache import node_cache
+from musical_brain.services import (
+    NATURAL_KEYS, BatchWrite, apply_batch, create_node, create_nodes, create_relationship, create_relationships,
+    decode_cursor, delete_node, delete_relationship, encode_cursor, get_node, list_neighbours, read_flight,
+    search_nodes, update_node, upsert_node, upsert_nodes,
+)
+
+
+class TestCursor:
+    """Test suite for pagination cursors."""
+
+    def test_cursor_round_trip(self):
+        """Test that a cursor decodes back to its position."""
+        cursor = encode_cursor("2024-01-01T00:00:00+00:00", "abc-123")
+        assert decode_cursor(cursor) == ("2024-01-01T00:00:00+00:00", "abc-123")
+
+    def test_cursor_is_url_safe(self):
+        """Test that cursors can be passed as query parameters unescaped."""
+        cursor = encode_cursor("2024-01-01T00:00:00+00:00", "???>>>")
+        assert "=" not in cursor
+        assert "+" not in cursor
+        assert "/" not in cursor
+
+    def test_invalid_cursor(self):
+        """Test that malformed cursors raise ValueError."""
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor("not-a-cursor")
+        
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(encode_cursor("x", "y")[:-3])
+
+
+class TestUpsertValidation:
+    """Test upsert argument checks that run before any query."""
+
+    @pytest.mark.asyncio
+    async def test_missing_key_fields(self):
+        """Test that upserts merging on a graph-wide unique key need every key field."""
+        with pytest.raises(ValueError, match="Missing natural key fields for Genre: name"):
+            await upsert_node("Genre", NATURAL_KEYS["Genre"], {"description": "No name"})
+
+    @pytest.mark.asyncio
+    async def test_invalid_key_field(self):
+        """Test that key fields must be plain identifiers."""
+        with pytest.raises(ValueError, match="Invalid key field"):
+            await upsert_node("Genre", ["name}) DETACH DELETE n //"], {"name": "x"})
+
+    @pytest.mark.asyncio
+    async def test_invalid_batch_size(self):
+        """Test that bulk writes reject empty batches."""
+        with pytest.raises(ValueError, match="batch_size"):
+            await create_nodes("Album", [{"title": "x"}], batch_size=0)
+        
+        with pytest.raises(ValueError, match="batch_size"):
+            await upsert_nodes("Genre", ["name"], [{"name": "x"}], batch_size=0)
+
+
+class TestUpsertKeys:
+    """Test which nodes upserts merge into."""
+
+    @pytest.mark.asyncio
+    async def test_created_albums_may_share_natural_key(self, memory_db):
+        """Test upserts match on the import key and leave API-created albums alone."""
+        data = {"title": "Greatest Hits", "release_year": 1990, "album_type": "Compilation"}
+        first = await create_node("Album", data)
+        second = await create_node("Album", data)
+        assert first["id"] != second["id"]
+        
+        imported = await upsert_node("Album", NATURAL_KEYS["Album"], data)
+        again = await upsert_node("Album", NATURAL_KEYS["Album"], {**data, "review_score": 3.0})
+        
+        assert imported["id"] not in (first["id"], second["id"])
+        assert again["id"] == imported["id"]
+        assert again["import_key"] == '{"release_year": 1990, "title": "Greatest Hits"}'
+        assert len(await memory_db.run_read("MATCH (a:Album) RETURN a")) == 3
+
+    @pytest.mark.asyncio
+    async def test_null_key_fields(self, memory_db):
+        """Test optional key fields may be missing, and match only other nodes missing them."""
+        key = NATURAL_KEYS["Artist"]
+        first = await upsert_node("Artist", key, {"name": "Anonymous"})
+        again = await upsert_node("Artist", key, {"name": "Anonymous", "country": None, "formed_year": 1990})
+        other = await upsert_node("Artist", key, {"name": "Anonymous", "country": "UK"})
+        
+        assert again["id"] == first["id"]
+        assert again["import_key"] == '{"country": null, "name": "Anonymous"}'
+        assert other["id"] != first["id"]
+        ids = await upsert_nodes("Album", NATURAL_KEYS["Album"], [{"title": "Demo", "album_type": "EP"}] * 2)
+        assert ids[0] == ids[1]
+
+    @pytest.mark.asyncio
+    async def test_updates_recompute_import_key(self, memory_db):
+        """Test a renamed upserted node is matched by its new key, singly and in a batch."""
+        key = NATURAL_KEYS["Album"]
+        album = await upsert_node("Album", key, {"title": "Demo", "release_year": 1990, "album_type": "EP"})
+        single = await update_node("Album", album["id"], {"title": "Debut"})
+        assert single["import_key"] == '{"release_year": 1990, "title": "Debut"}'
+        assert (await upsert_node("Album", key, {"title": "Debut", "release_year": 1990}))["id"] == album["id"]
+        
+        await apply_batch([BatchWrite("update", "Album", album["id"], {"release_year": 1991})])
+        assert (await upsert_node("Album", key, {"title": "Debut", "release_year": 1991}))["id"] == album["id"]
+        created = await create_node("Album", {"title": "Debut", "album_type": "LP"})
+        assert "import_key" not in await update_node("Album", created["id"], {"release_year": 1992})
+        assert len(await memory_db.run_read("MATCH (a:Album) RETURN a")) == 2
+
+    @pytest.mark.asyncio
+    async def test_unique_key_merges_directly(self, memory_db):
+        """Test genre upserts merge on the graph-wide unique name."""
+        created = await create_node("Genre", {"name": "Jazz"})
+        
+        upserted = await upsert_node("Genre", NATURAL_KEYS["Genre"], {"name": "Jazz", "description": "Swing"})
+        
+        assert upserted["id"] == created["id"]
+        assert upserted["description"] == "Swing"
+        assert "import_key" not in upserted
+
+
+class TestMemoryBackedServices:
+    """Test services end to end against the in-memory backend."""
+
+    @pytest.mark.asyncio
+    async def test_search_nodes(self, memory_db):
+        """Test case-insensitive substring search ordered by the search field."""
+        await create_nodes("Album", [
+            {"title": "Blue Train", "album_type": "LP"},
+            {"title": "Kind of Blue", "album_type": "LP"},
+            {"title": "Giant Steps", "album_type": "LP"},
+        ])
+
+        results = await search_nodes("Album", "BLUE")
+        assert [album["title"] for album in results] == ["Blue Train", "Kind of Blue"]
+        assert len(await search_nodes("Album", "blue", limit=1)) == 1
+        assert await search_nodes("Artist", "blue") == []
+
+    @pytest.mark.asyncio
+    async def test_apply_batch(self, memory_db):
+        """Test grouped writes report per-operation status in input order."""
+        kept, doomed = await create_nodes("Album", [
+            {"title": "Blue Train", "album_type": "LP"},
+            {"title": "Giant Steps", "album_type": "LP"},
+        ])
+
+        results = await apply_batch([
+            BatchWrite("delete", "Album", doomed, {}),
+            BatchWrite("create", "Artist", None, {"name": "John Coltrane"}),
+            BatchWrite("update", "Album", kept, {"review_score": 4.5}),
+            BatchWrite("update", "Album", "missing", {"review_score": 1.0}),
+            BatchWrite("create", "Album", None, {"title": "Ballads", "album_type": "LP"}),
+        ])
+
+        assert [result["status"] for result in results] == ["deleted", "created", "updated", "not_found", "created"]
+        assert results[0]["id"] == doomed
+        titles = await memory_db.run_read("MATCH (a:Album) RETURN a.title AS title, a.review_score AS score")
+        assert sorted((row["title"], row["score"]) for row in titles) == [("Ballads", None), ("Blue Train", 4.5)]
+
+    @pytest.mark.asyncio
+    async def test_apply_batch_rolls_back(self, memory_db, monkeypatch):
+        """Test a failing batch leaves nothing behind."""
+        with pytest.raises(ValueError, match="Unknown batch action"):
+            await apply_batch([BatchWrite("merge", "Album", None, {})])
+
+        async def failing_delete(label, node_ids):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr("musical_brain.services.delete_nodes", failing_delete)
+        with pytest.raises(RuntimeError, match="boom"):
+            await apply_batch([
+                BatchWrite("create", "Album", None, {"title": "Ballads", "album_type": "LP"}),
+                BatchWrite("delete", "Album", "missing", {}),
+            ])
+        assert await memory_db.run_read("MATCH (a:Album) RETURN a") == []
+
+    @pytest.mark.asyncio
+    async def test_relationships(self, memory_db):
+        """Test bulk linking, neighbour listing and unlinking by ID."""
+        await create_nodes("Artist", [{"id": f"artist-{i}", "name": f"Artist {i}"} for i in range(3)])
+        await create_nodes("Album", [{"id": "album-0", "title": "Debut", "album_type": "LP"}])
+
+        written = await create_relationships("Artist", "INFLUENCED_BY", "Artist", [
+            ("artist-0", "artist-1", {"weight": 0.9}),
+            ("artist-2", "artist-1"),
+            ("artist-0", "missing"),
+        ], batch_size=2)
+        assert written == 2
+        assert await create_relationship("Artist", "artist-0", "CREATED", "Album", "album-0", {"role": "lead"})
+        assert await create_relationship("Artist", "artist-0", "CREATED", "Album", "album-0")
+        assert not await create_relationship("Artist", "artist-0", "CREATED", "Album", "missing")
+
+        outgoing = await list_neighbours("Artist", "artist-0")
+        assert [(n["type"], n["node"]["id"], n["labels"]) for n in outgoing] == [
+            ("CREATED", "album-0", ["Album"]),
+            ("INFLUENCED_BY", "artist-1", ["Artist"]),
+        ]
+        assert outgoing[0]["properties"]["role"] == "lead"
+        assert outgoing[0]["properties"]["created_at"]
+        incoming = await list_neighbours("Artist", "artist-1", "INFLUENCED_BY", direction="in")
+        assert [n["node"]["id"] for n in incoming] == ["artist-0", "artist-2"]
+        both = await list_neighbours("Artist", "artist-2", direction="both")
+        assert [(n["direction"], n["node"]["id"]) for n in both] == [("out", "artist-1")]
+
+        assert await delete_relationship("Artist", "artist-0", "INFLUENCED_BY", "Artist", "artist-1")
+        assert not await delete_relationship("Artist", "artist-0", "INFLUENCED_BY", "Artist", "artist-1")
+        assert [n["node"]["id"] for n in await list_neighbours("Artist", "artist-1", direction="in")] == ["artist-2"]
+
+        with pytest.raises(ValueError, match="Unknown relationship type"):
+            await create_relationship("Artist", "artist-0", "LIKES", "Album", "album-0")
+        with pytest.raises(ValueError, match="Unknown direction"):
+            await list_neighbours("Artist", "artist-0", direction="sideways")
+
+    @pytest.mark.asyncio
+    async def test_delete_linked_nodes(self, memory_db):
+        """Test deleting nodes also removes their relationships, singly and in a batch."""
+        await create_nodes("Genre", [{"id": "genre-0", "name": "Jazz"}])
+        await create_nodes("Album", [
+            {"id": f"album-{i}", "title": f"Album {i}", "album_type": "LP"} for i in range(3)
+        ])
+        await create_relationships("Album", "BELONGS_TO_GENRE", "Genre", [(f"album-{i}", "genre-0") for i in range(3)])
+
+        assert await delete_node("Album", "album-0")
+        results = await apply_batch([
+            BatchWrite("delete", "Album", "album-1", {}),
+            BatchWrite("update", "Album", "album-2", {"review_score": 4.0}),
+        ])
+
+        assert [result["status"] for result in results] == ["deleted", "updated"]
+        assert await get_node("Album", "album-1") is None
+        incoming = await list_neighbours("Genre", "genre-0", direction="in")
+        assert [n["node"]["id"] for n in incoming] == ["album-2"]
+
+
+class TestNodeCaching:
+    """Test suite for keeping the node cache consistent with writes."""
+
+    @pytest.mark.asyncio
+    async def test_read_overtaken_by_write(self, memory_db, monkeypatch):
+        """Test a read that finishes after a write neither caches nor shares the old node."""
+        album = await create_node("Album", {"title": "Old", "album_type": "LP"})
+        node_cache.clear()
+        read, release = asyncio.Event(), asyncio.Event()
+        run_read = memory_db.run_read
+
+        async def slow_read(query, parameters=None):
+            result = await run_read(query, parameters)
+            if not release.is_set():
+                read.set()
+                await release.wait()
+            return result
+
+        monkeypatch.setattr(memory_db, "run_read", slow_read)
+        slow = asyncio.create_task(get_node("Album", album["id"]))
+        await read.wait()
+        await update_node("Album", album["id"], {"title": "New"})
+        node_cache.invalidate("Album", album["id"])
+        executed = read_flight.executed
+        release.set()
+        assert (await get_node("Album", album["id"]))["title"] == "New"
+        assert read_flight.executed == executed + 1
+        assert (await slow)["title"] == "Old"
+        assert node_cache.get("Album", album["id"])["title"] == "New"
+
+    @pytest.mark.asyncio
+    async def test_rolled_back_batch_leaves_no_cached_writes(self, memory_db, monkeypatch):
+        """Test a node read mid-batch from outside the transaction isn't served after a rollback."""
+        album = await create_node("Album", {"title": "A", "album_type": "LP"})
+        outside = []
+
+        async def failing_delete(label, node_ids):
+            # Another request, outside the transaction, reads the uncommitted title
+            outside.append(await asyncio.create_task(get_node("Album", album["id"]), context=contextvars.Context()))
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr("musical_brain.services.delete_nodes", failing_delete)
+        with pytest.raises(RuntimeError, match="boom"):
+            await apply_batch([
+                BatchWrite("update", "Album", album["id"], {"title": "B"}),
+                BatchWrite("delete", "Album", "missing", {}),
+            ])
+
+        assert outside[0]["title"] == "B"
+        assert (await get_node("Album", album["id"]))["title"] == "A"
+        assert (await memory_db.run_read("MATCH (a:Album) RETURN a.title AS title")) == [{"title": "A"}]
@@ -0,0 +1,227 @@
+"""
+Unit tests for album similarity.
+"""
+
+import numpy as np
+import pytest
+
+from musical_brain.config import SimilaritySettings
+from musical_brain.services import create_nodes, create_relationships, delete_node, list_neighbours
+from musical_brain.similarity import (
+    AlbumFeatures, SimilarityIndex, SparseRows, build_similar_albums, run_similarity_job, top_k_similar,
+    update_similar_albums
+)
+
+
+def brute_force(vectors: np.ndarray, k: int) -> np.ndarray:
+    products = vectors @ vectors.T
+    np.fill_diagonal(products, -np.inf)
+    return np.sort(products, axis=1)[:, ::-1][:, :k]
+
+
+def random_albums(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    words = ["warm", "noisy", "lush", "sparse", "angular", "hazy", "bright", "dark"]
+    return [
+        AlbumFeatures(
+            id=f"album-{i}",
+            genres=[f"genre-{g}" for g in rng.choice(12, size=rng.integers(1, 3), replace=False).tolist()],
+            artists=[f"artist-{rng.integers(40)}"],
+            influences=[f"artist-{rng.integers(40)}"],
+            release_year=int(rng.integers(1960, 2020)),
+            review_score=float(rng.integers(0, 11)) / 2,
+            review_notes=" ".join(rng.choice(words, size=4).tolist()),
+        )
+        for i in range(n)
+    ]
+
+
+class TestTopK:
+    """Test suite for the blocked nearest-neighbour search."""
+
+    def test_matches_brute_force(self):
+        """Test blocks smaller than the input give the exact top-k, self excluded."""
+        vectors = np.random.default_rng(1).normal(size=(500, 16)).astype(np.float32)
+        indices, scores = top_k_similar(vectors, vectors, 4, block_size=64, exclude=np.arange(500))
+        np.testing.assert_allclose(scores, brute_force(vectors, 4), atol=1e-5)
+        assert not (indices == np.arange(500)[:, None]).any()
+
+    def test_padding(self):
+        """Test a corpus smaller than k pads with -1 and -inf."""
+        vectors = np.eye(3, dtype=np.float32)
+        indices, scores = top_k_similar(vectors, vectors, 4, exclude=np.arange(3))
+        assert (indices[:, 2:] == -1).all()
+        assert np.isneginf(scores[:, 2:]).all()
+
+
+class TestSparseRows:
+    """Test suite for sparse feature rows."""
+
+    def test_assign(self):
+        """Test rows are replaced and appended, and read back dense."""
+        dense = np.zeros((3, 5), dtype=np.float32)
+        dense[0, 1], dense[2, [0, 4]] = 1.0, [0.5, 0.25]
+        rows = SparseRows.empty(5).assign(np.arange(3), SparseRows(
+            np.array([0, 1, 1, 3]), np.array([1, 0, 4], dtype=np.int32),
+            np.array([1.0, 0.5, 0.25], dtype=np.float32), 5,
+        ))
+        np.testing.assert_array_equal(rows[:], dense)
+        rows = rows.assign(np.array([3, 0]), SparseRows(
+            np.array([0, 1, 1]), np.array([3], dtype=np.int32), np.array([2.0], dtype=np.float32), 5,
+        ))
+        dense = np.vstack([dense, np.eye(5, dtype=np.float32)[3] * 2])
+        dense[0] = 0
+        assert len(rows) == 4
+        np.testing.assert_array_equal(rows[:], dense)
+        np.testing.assert_array_equal(rows[np.array([3, 2])], dense[[3, 2]])
+
+
+class TestSimilarityIndex:
+    """Test suite for album vectors and incremental updates."""
+
+    def test_vectors(self):
+        """Test vectors are unit length and shared features score higher."""
+        index = SimilarityIndex()
+        albums = [
+            AlbumFeatures("a", genres=["jazz"], artists=["coltrane"], release_year=1959, review_notes="modal"),
+            AlbumFeatures("b", genres=["jazz"], artists=["coltrane"], release_year=1961, review_notes="modal"),
+            AlbumFeatures("c", genres=["metal"], artists=["slayer"], release_year=1986, review_notes="fast"),
+            AlbumFeatures("d"),
+        ]
+        index.fit(albums)
+        norms = np.linalg.norm(index.vectors[:], axis=1)
+        np.testing.assert_allclose(norms, [1, 1, 1, 0], atol=1e-6)
+        assert index.similar("a")[0][0] == "b"
+        assert index.similar("a")[0][1] > 0.9
+        assert [album_id for album_id, _ in index.similar("d")] == []
+        assert index.edges(["a"])[0][:2] == ("a", "b")
+
+    def test_add_matches_brute_force(self):
+        """Test adding albums leaves every list as a full search over the grown index would."""
+        albums = random_albums(300)
+        index = SimilarityIndex(SimilaritySettings(top_k=5, block_size=64))
+        index.fit(albums[:250])
+        before = index.neighbours.copy()
+        changed = index.add(albums[250:])
+        assert len(index) == 300
+        np.testing.assert_allclose(index.scores, brute_force(index.vectors[:], 5), atol=1e-5)
+        assert {f"album-{i}" for i in range(250, 300)} <= set(changed)
+        unchanged = [row for row in range(250) if index.ids[row] not in set(changed)]
+        assert (index.neighbours[unchanged] == before[unchanged]).all()
+        assert index.add([]) == []
+
+    def test_remove_matches_brute_force(self):
+        """Test removing albums refills the lists that lost a neighbour."""
+        albums = random_albums(300)
+        index = SimilarityIndex(SimilaritySettings(top_k=5, block_size=64))
+        index.fit(albums)
+        removed = {f"album-{i}" for i in range(0, 300, 10)}
+        had_removed = {index.ids[row] for row in range(300) if {index.ids[n] for n in index.neighbours[row]} & removed}
+
+        changed = index.remove(sorted(removed) + ["missing"])
+        assert len(index) == 270
+        assert not removed & set(index.ids)
+        assert set(changed) == had_removed - removed
+        assert (index.neighbours >= 0).all()
+        np.testing.assert_allclose(index.scores, brute_force(index.vectors[:], 5), atol=1e-5)
+        assert index.remove([]) == []
+
+    def test_sparse_vectors(self):
+        """Test each album stores only the columns it sets."""
+        index = SimilarityIndex()
+        index.fit(random_albums(100))
+        assert index.dims > 2 * 256
+        assert np.diff(index.vectors.offsets).max() < 20
+        assert index.vectors[:].shape == (100, index.dims)
+
+    def test_save_and_load(self, tmp_path):
+        """Test a loaded index matches the saved one and keeps updating the same way."""
+        albums = random_albums(120)
+        settings = SimilaritySettings(top_k=5, block_size=32)
+        index = SimilarityIndex(settings)
+        index.fit(albums[:100])
+        index.watermark = "2024-01-01T00:00:00"
+        path = str(tmp_path / "similarity.npz")
+        index.save(path)
+
+        loaded = SimilarityIndex.load(path, settings)
+        assert loaded.fitted
+        assert loaded.ids == index.ids
+        assert loaded.vocabulary == index.vocabulary
+        assert loaded.watermark == index.watermark
+        np.testing.assert_array_equal(loaded.vectors[:], index.vectors[:])
+        assert loaded.similar("album-0") == index.similar("album-0")
+        assert loaded.add(albums[100:]) == index.add(albums[100:])
+        np.testing.assert_array_equal(loaded.neighbours, index.neighbours)
+
+        assert not SimilarityIndex.load(path, SimilaritySettings(top_k=3)).fitted
+
+
+class TestSimilarityWrites:
+    """Test suite for writing SIMILAR_TO edges."""
+
+    @pytest.mark.asyncio
+    async def test_build_and_update(self, memory_db):
+        """Test a full build, then an update that only adds the new album."""
+        await create_nodes("Genre", [{"id": "jazz", "name": "Jazz"}, {"id": "metal", "name": "Metal"}])
+        await create_nodes("Artist", [{"id": "coltrane", "name": "John Coltrane"}])
+        await create_nodes("Album", [
+            {"id": "blue-train", "title": "Blue Train", "album_type": "LP", "release_year": 1957},
+            {"id": "giant-steps", "title": "Giant Steps", "album_type": "LP", "release_year": 1960},
+            {"id": "reign", "title": "Reign in Blood", "album_type": "LP", "release_year": 1986},
+        ])
+        await create_relationships("Album", "BELONGS_TO_GENRE", "Genre", [
+            ("blue-train", "jazz"), ("giant-steps", "jazz"), ("reign", "metal"),
+        ])
+        await create_relationships("Artist", "CREATED", "Album", [("coltrane", "blue-train"), ("coltrane", "giant-steps")])
+
+        index = SimilarityIndex(SimilaritySettings(top_k=2, min_score=0.3))
+        stats = await build_similar_albums(index)
+        assert stats["albums"] == 3
+        similar = await list_neighbours("Album", "blue-train", "SIMILAR_TO")
+        assert [n["node"]["id"] for n in similar] == ["giant-steps"]
+        assert similar[0]["properties"]["score"] > 0.5
+
+        await create_nodes("Album", [{"id": "a-love-supreme", "title": "A Love Supreme", "album_type": "LP",
+                                      "release_year": 1965}])
+        await create_relationships("Album", "BELONGS_TO_GENRE", "Genre", [("a-love-supreme", "jazz")])
+        await create_relationships("Artist", "CREATED", "Album", [("coltrane", "a-love-supreme")])
+        stats = await update_similar_albums(index=index)
+        assert stats["albums"] == 1
+        assert len(index) == 4
+        similar = await list_neighbours("Album", "a-love-supreme", "SIMILAR_TO")
+        assert {n["node"]["id"] for n in similar} == {"blue-train", "giant-steps"}
+        assert (await update_similar_albums(index=index))["albums"] == 0
+
+        await delete_node("Album", "giant-steps")
+        stats = await update_similar_albums(index=index)
+        assert stats["removed"] == 1
+        assert "giant-steps" not in index.ids
+        similar = await list_neighbours("Album", "blue-train", "SIMILAR_TO")
+        assert [n["node"]["id"] for n in similar] == ["a-love-supreme"]
+
+    @pytest.mark.asyncio
+    async def test_job_updates_saved_index(self, memory_db, tmp_path):
+        """Test an update run loads the saved index and only adds the albums created since."""
+        await create_nodes("Genre", [{"id": "jazz", "name": "Jazz"}])
+        await create_nodes("Album", [
+            {"id": "blue-train", "title": "Blue Train", "album_type": "LP", "release_year": 1957},
+            {"id": "giant-steps", "title": "Giant Steps", "album_type": "LP", "release_year": 1960},
+        ])
+        await create_relationships("Album", "BELONGS_TO_GENRE", "Genre", [("blue-train", "jazz"), ("giant-steps", "jazz")])
+        path = str(tmp_path / "similarity.npz")
+        settings = SimilaritySettings(top_k=2)
+
+        stats = await run_similarity_job(path, update=True, settings=settings)
+        assert stats["albums"] == 2
+        assert "changed" not in stats
+
+        await create_nodes("Album", [{"id": "a-love-supreme", "title": "A Love Supreme", "album_type": "LP",
+                                      "release_year": 1965}])
+        await create_relationships("Album", "BELONGS_TO_GENRE", "Genre", [("a-love-supreme", "jazz")])
+        stats = await run_similarity_job(path, update=True, settings=settings)
+        assert stats["albums"] == 1
+        assert stats["changed"] == 3
+        assert len(SimilarityIndex.load(path, settings)) == 3
+        similar = await list_neighbours("Album", "a-love-supreme", "SIMILAR_TO")
+        assert {n["node"]["id"] for n in similar} == {"blue-train", "giant-steps"}
@@ -0,0 +1,124 @@
+"""
+Unit tests for the in-memory graph snapshot.
+"""
+
+import random
+from collections import deque
+
+import numpy as np
+import pytest
+
+from musical_brain.services import create_nodes, create_relationships, delete_relationship
+from musical_brain.snapshot import GraphSnapshot, load_graph_snapshot, pack_csr, refresh_graph_snapshot
+
+# a -> b -> c -> d, a -> c, e isolated
+INFLUENCES = [("a", "b", None), ("b", "c", None), ("c", "d", None), ("a", "c", None)]
+
+
+def small_snapshot() -> GraphSnapshot:
+    snapshot = GraphSnapshot(labels=["Artist", "Album"], rel_types=["INFLUENCED_BY", "CREATED"])
+    snapshot.add_nodes("Artist", [(node_id, None) for node_id in "abcde"])
+    snapshot.add_nodes("Album", [("x", None)])
+    snapshot.add_edges("INFLUENCED_BY", INFLUENCES)
+    snapshot.add_edges("CREATED", [("d", "x", None), ("d", "missing", None)])
+    return snapshot
+
+
+def reference_bfs(adjacency: dict, start: str) -> dict:
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for neighbour in adjacency.get(node, ()):
+            if neighbour not in distances:
+                distances[neighbour] = distances[node] + 1
+                queue.append(neighbour)
+    return distances
+
+
+class TestGraphSnapshot:
+    """Test suite for CSR packing and traversals."""
+
+    def test_pack_csr(self):
+        """Test edges are grouped by source."""
+        csr = pack_csr(np.array([2, 0, 2], dtype=np.int32), np.array([1, 2, 0], dtype=np.int32), 4)
+        assert csr.offsets.tolist() == [0, 1, 1, 3, 3]
+        assert csr.neighbours(2).tolist() == [1, 0]
+        assert csr.degrees().tolist() == [1, 0, 2, 0]
+
+    def test_degrees(self):
+        """Test degrees per type, direction and across types."""
+        snapshot = small_snapshot()
+        assert snapshot.degree("a", "INFLUENCED_BY") == 2
+        assert snapshot.degree("c", "INFLUENCED_BY", direction="in") == 2
+        assert snapshot.degree("d", direction="both") == 2
+        assert snapshot.degrees("INFLUENCED_BY").tolist() == [2, 1, 1, 0, 0, 0]
+        assert snapshot.skipped["CREATED"] == 1
+        assert snapshot.label_of("x") == "Album"
+        assert snapshot.nodes_with_label("Artist").tolist() == [0, 1, 2, 3, 4]
+
+    def test_traversals(self):
+        """Test BFS distances, k-hop neighbourhoods and neighbours."""
+        snapshot = small_snapshot()
+        assert snapshot.bfs("a", "INFLUENCED_BY") == {"a": 0, "b": 1, "c": 1, "d": 2}
+        assert snapshot.bfs("a") == {"a": 0, "b": 1, "c": 1, "d": 2, "x": 3}
+        assert snapshot.bfs("a", max_depth=1) == {"a": 0, "b": 1, "c": 1}
+        assert snapshot.k_hop("d", 2, "INFLUENCED_BY", direction="in") == ["c", "a", "b"]
+        assert snapshot.neighbours("c", direction="both") == ["a", "b", "d"]
+        assert snapshot.k_hop("e", 3) == []
+        with pytest.raises(KeyError):
+            snapshot.bfs("missing")
+        with pytest.raises(ValueError, match="direction"):
+            snapshot.degree("a", direction="sideways")
+        with pytest.raises(ValueError, match="not in snapshot"):
+            snapshot.degree("a", "SIMILAR_TO")
+
+    def test_bfs_matches_reference(self):
+        """Test BFS on a random graph against a plain Python BFS."""
+        rng = random.Random(3)
+        ids = [f"n{i}" for i in range(200)]
+        edges = [(rng.choice(ids), rng.choice(ids), None) for _ in range(600)]
+        snapshot = GraphSnapshot(labels=["Artist"], rel_types=["INFLUENCED_BY"])
+        snapshot.add_nodes("Artist", [(node_id, None) for node_id in ids])
+        snapshot.add_edges("INFLUENCED_BY", edges)
+        adjacency = {}
+        for start, end, _ in edges:
+            adjacency.setdefault(start, []).append(end)
+        for start in ids[:20]:
+            assert snapshot.bfs(start) == reference_bfs(adjacency, start)
+
+    def test_incremental_edges(self):
+        """Test added edges invalidate the packed arrays and move the watermark."""
+        snapshot = small_snapshot()
+        assert snapshot.degree("e", "INFLUENCED_BY") == 0
+        snapshot.add_edges("INFLUENCED_BY", [("e", "a", "2025-01-02T00:00:00+00:00")])
+        assert snapshot.degree("e", "INFLUENCED_BY") == 1
+        assert snapshot.bfs("e", "INFLUENCED_BY")["d"] == 3
+        snapshot.add_nodes("Artist", [("f", "2025-01-01T00:00:00+00:00")])
+        assert snapshot.watermark == "2025-01-02T00:00:00+00:00"
+        assert snapshot.degrees("INFLUENCED_BY").tolist() == [2, 1, 1, 0, 1, 0, 0]
+
+
+class TestSnapshotLoading:
+    """Test suite for loading and refreshing from the database."""
+
+    @pytest.mark.asyncio
+    async def test_load_and_refresh(self, memory_db):
+        """Test a full load, then an incremental refresh, then a reload after a delete."""
+        await create_nodes("Artist", [{"id": f"artist-{i}", "name": f"Artist {i}"} for i in range(3)])
+        await create_relationships("Artist", "INFLUENCED_BY", "Artist", [("artist-0", "artist-1")])
+        snapshot = await load_graph_snapshot(GraphSnapshot())
+        assert snapshot.loaded
+        assert snapshot.k_hop("artist-0", 2) == ["artist-1"]
+
+        await create_nodes("Artist", [{"id": "artist-3", "name": "Artist 3"}])
+        await create_relationships("Artist", "INFLUENCED_BY", "Artist", [("artist-1", "artist-3")])
+        assert await refresh_graph_snapshot(snapshot) == {"nodes": 1, "edges": 1, "reloaded": False}
+        assert snapshot.k_hop("artist-0", 2) == ["artist-1", "artist-3"]
+        assert await refresh_graph_snapshot(snapshot) == {"nodes": 0, "edges": 0, "reloaded": False}
+
+        await delete_relationship("Artist", "artist-0", "INFLUENCED_BY", "Artist", "artist-1")
+        result = await refresh_graph_snapshot(snapshot)
+        assert result["reloaded"]
+        assert snapshot.k_hop("artist-0", 2) == []
+        assert snapshot.degree("artist-1", "INFLUENCED_BY") == 1
@@ -0,0 +1,105 @@
+import json
+
+import numpy as np
+import pytest
+
+from musical_brain.models import Album, Artist, Genre
+from musical_brain.synthetic import CatalogueGenerator, CatalogueSpec, load, write_csv, write_ndjson
+
+SMALL = CatalogueSpec(seed=7, artists=300, genres=40, root_genres=5, batch_size=64)
+
+
+def collect_edges(generator: CatalogueGenerator) -> dict:
+    edges = {}
+    for batch in generator.edges():
+        start, end = edges.get(batch.rel_type, ([], []))
+        start.append(batch.start)
+        end.append(batch.end)
+        edges[batch.rel_type] = (start, end)
+    return {rel: (np.concatenate(s), np.concatenate(e)) for rel, (s, e) in edges.items()}
+
+
+class TestCatalogueGenerator:
+    """Test suite for the synthetic catalogue generator."""
+
+    def test_deterministic(self):
+        """Test that the same spec always produces the same catalogue."""
+        first, second = CatalogueGenerator(SMALL), CatalogueGenerator(SMALL)
+        assert list(first.albums()) == list(second.albums())
+        for a, b in zip(first.edges(), second.edges()):
+            assert a.rel_type == b.rel_type
+            assert np.array_equal(a.start, b.start) and np.array_equal(a.end, b.end)
+
+        other = CatalogueGenerator(SMALL.model_copy(update={"seed": 8}))
+        assert list(other.albums()) != list(first.albums())
+
+    def test_nodes_match_models(self):
+        """Test that generated properties pass model validation."""
+        generator = CatalogueGenerator(SMALL)
+        genres = [Genre(**row) for batch in generator.genres() for row in batch]
+        artists = [Artist(**row) for batch in generator.artists() for row in batch]
+        albums = [Album(**row) for batch in generator.albums() for row in batch]
+
+        assert len(genres) == 40
+        assert len(artists) == 300
+        assert len(albums) >= 300
+        assert all(round(album.review_score * 10) == album.review_score * 10 for album in albums)
+        assert all(len(batch) <= SMALL.batch_size for batch in generator.albums())
+
+    def test_edges(self):
+        """Test relationship invariants."""
+        generator = CatalogueGenerator(SMALL)
+        n_albums = sum(len(batch) for batch in generator.albums())
+        edges = collect_edges(generator)
+
+        start, end = edges["SUBGENRE_OF"]
+        assert len(start) == 40 - 5
+        assert (end < start).all()
+
+        start, end = edges["CREATED"]
+        assert np.array_equal(np.sort(end), np.arange(n_albums))
+        assert ((start >= 0) & (start < 300)).all()
+
+        start, end = edges["INFLUENCED_BY"]
+        assert (start != end).all()
+        assert len(set(zip(start.tolist(), end.tolist()))) == len(start)
+
+        start, end = edges["BELONGS_TO_GENRE"]
+        assert set(np.unique(start).tolist()) == set(range(n_albums))
+        assert ((end >= 0) & (end < 40)).all()
+
+    def test_influence_in_degree_is_skewed(self):
+        """Test that a few artists attract most influence edges."""
+        spec = CatalogueSpec(artists=5000, batch_size=1000)
+        _, end = collect_edges(CatalogueGenerator(spec))["INFLUENCED_BY"]
+        degrees = np.sort(np.bincount(end, minlength=spec.artists))[::-1]
+
+        assert degrees[:50].sum() > degrees[-2500:].sum()
+
+    def test_write_files(self, tmp_path):
+        """Test NDJSON and CSV output."""
+        generator = CatalogueGenerator(SMALL)
+        counts = write_ndjson(generator, tmp_path / "ndjson")
+        lines = (tmp_path / "ndjson" / "Artist.ndjson").read_text().splitlines()
+        assert len(lines) == counts["Artist"] == 300
+        assert json.loads(lines[0])["id"] == "artist-0"
+        edge = json.loads((tmp_path / "ndjson" / "CREATED.ndjson").read_text().splitlines()[0])
+        assert edge["start"].startswith("artist-") and edge["end"].startswith("album-")
+
+        assert write_csv(generator, tmp_path / "csv") == counts
+        rows = (tmp_path / "csv" / "SUBGENRE_OF.csv").read_text().splitlines()
+        assert rows[0] == "start,end"
+        assert len(rows) == counts["SUBGENRE_OF"] + 1
+
+    @pytest.mark.asyncio
+    async def test_load_into_memory_database(self, memory_db):
+        """Test loading through the bulk write path."""
+        spec = CatalogueSpec(artists=50, genres=10, root_genres=2, batch_size=16)
+
+        counts = await load(CatalogueGenerator(spec))
+
+        assert counts["Artist"] == 50
+        result = await memory_db.run_read("MATCH (:Artist)-[r:CREATED]->(:Album) RETURN count(r) AS c")
+        assert result[0]["c"] == counts["CREATED"] == counts["Album"]
+        result = await memory_db.run_read("MATCH (:Genre)-[r:SUBGENRE_OF]->(:Genre) RETURN count(r) AS c")
+        assert result[0]["c"] == 8